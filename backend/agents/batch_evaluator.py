@@ -0,0 +1,119 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agents.conversation_phase import ConversationPhase
+from agents.rubric import PHASE_SIGNAL, WHOLE_WORDS, Rubric, get_rubric
+
+PHASES = (
+    ConversationPhase.INTRODUCTION_DISCOVERY,
+    ConversationPhase.VALUE_PROPOSITION,
+    ConversationPhase.OBJECTION_HANDLING,
+    ConversationPhase.CLOSING
+)
+PHASE_INDEX = {phase.value: index for index, phase in enumerate(PHASES)}
+
+# Maximum score of a phase (see PLGPhaseScore)
+MAX_PHASE_SCORE = 20
+
+
+def _columns(mask: int) -> List[int]:
+    """Column indices of the bits set in a signal mask."""
+    return [index for index in range(mask.bit_length()) if mask >> index & 1]
+
+
+class BatchScorer:
+    """Scores many conversations at once with the ObserverCoach rubric.
+
+    Every interaction becomes a row of a boolean turn x signal hit matrix. The
+    rows are OR-reduced per conversation and the rubric's scoring table is
+    applied as array expressions, giving the same phase scores as
+    ObserverCoach.analyze_conversation for each conversation.
+    """
+
+    def __init__(self, rubric: Optional[Rubric] = None):
+        # None uses the current rubric at each call, following hot swaps
+        self.rubric = rubric
+
+    def hit_matrix(self, turns: Sequence[Tuple[str, str]], rubric: Optional[Rubric] = None) -> np.ndarray:
+        """Returns the turn x signal hit matrix of (representative, customer) pairs."""
+        rubric = rubric or self.rubric or get_rubric()
+        hits = np.zeros((len(turns), len(rubric.bits)), dtype=bool)
+        if not turns:
+            return hits
+
+        user = np.array([message.lower() for message, _ in turns], dtype=str)
+        customer = np.array([response.lower() for _, response in turns], dtype=str)
+        for pattern, (user_bits, customer_bits) in rubric.pattern_bits.items():
+            in_user = np.char.find(user, pattern) >= 0 if user_bits else None
+            in_customer = np.char.find(customer, pattern) >= 0 if customer_bits else None
+            for column in _columns(user_bits):
+                hits[:, column] |= in_user
+            for column in _columns(customer_bits):
+                hits[:, column] |= in_customer
+        # Whole-word patterns need a regex; there are few of them
+        for pattern, (user_bits, customer_bits) in rubric.word_pattern_bits.items():
+            search = re.compile(WHOLE_WORDS.format(re.escape(pattern))).search
+            for texts, bits in ((user, user_bits), (customer, customer_bits)):
+                if not bits:
+                    continue
+                found = np.fromiter((search(text) is not None for text in texts), dtype=bool, count=len(texts))
+                for column in _columns(bits):
+                    hits[:, column] |= found
+        return hits
+
+    def score(self, conversations: Sequence[Sequence[Tuple[str, str]]],
+              phases: Optional[Sequence[Sequence[str]]] = None) -> np.ndarray:
+        """Returns an array of shape (conversations, 4) with the score of each phase.
+
+        phases holds the phase value of each turn; by default every turn is in
+        the introduction phase, like an ObserverCoach without a phase classifier.
+        """
+        rubric = self.rubric or get_rubric()
+        lengths = np.array([len(turns) for turns in conversations], dtype=np.int64)
+        scores = np.zeros((len(conversations), len(PHASES)), dtype=np.int64)
+        non_empty = lengths > 0
+        if not non_empty.any():
+            return scores
+
+        flat_turns = [turn for turns in conversations for turn in turns]
+        hits = self.hit_matrix(flat_turns, rubric)
+        if phases is None:
+            phase_values = [ConversationPhase.INTRODUCTION_DISCOVERY.value] * len(flat_turns)
+        else:
+            phase_values = [phase for turn_phases in phases for phase in turn_phases]
+        phase_columns = np.array(
+            [_columns(rubric.bits[PHASE_SIGNAL.format(phase)])[0] for phase in phase_values], dtype=np.int64
+        )
+        hits[np.arange(len(flat_turns)), phase_columns] = True
+
+        # Per-conversation OR of the hit rows
+        starts = (np.cumsum(lengths) - lengths)[non_empty]
+        seen = np.logical_or.reduceat(hits, starts, axis=0)
+
+        for index, phase in enumerate(PHASES):
+            phase_score = np.zeros(len(seen), dtype=np.int64)
+            for aspect in rubric.table[phase]:
+                applies = seen[:, _columns(aspect.when_mask)].all(axis=1)
+                found = applies & seen[:, _columns(aspect.mask)].all(axis=1)
+                points = -aspect.weight if aspect.type == "red_flag" else aspect.weight
+                # Clipped after every aspect, like PLGPhaseScore.adjust_score
+                phase_score = np.where(found, np.clip(phase_score + points, 0, MAX_PHASE_SCORE), phase_score)
+            scores[non_empty, index] = phase_score
+        return scores
+
+    def score_records(self, conversations: Sequence[Sequence[Tuple[str, str]]],
+                      phases: Optional[Sequence[Sequence[str]]] = None) -> List[Dict]:
+        """Returns the score and phase scores of each conversation, shaped like analyze_conversation."""
+        scores = self.score(conversations, phases)
+        records = []
+        for turns, row in zip(conversations, scores.tolist()):
+            if not turns:
+                records.append({"score": 0, "phase_scores": {}})
+                continue
+            records.append({
+                "score": sum(row),
+                "phase_scores": {phase.value: points for phase, points in zip(PHASES, row)}
+            })
+        return records
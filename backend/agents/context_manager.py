@@ -0,0 +1,193 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from llm.cassette import CASSETTE_PATH
+from llm.client import ChatClient
+from llm.tokens import estimate_tokens, truncate_to_tokens
+
+# Shared by every session so background summaries never pile up threads
+_SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="context-summary")
+
+# Upper bound of folded messages waiting for a background summary
+MAX_UNSUMMARIZED_MESSAGES = 20
+
+# Tokens kept per folded message in the local summary
+FOLDED_LINE_TOKENS = 40
+
+# Wait for the background summary before reading it, so prompts do not depend on
+# timing; on by default when completions are recorded or replayed (llm/cassette.py)
+SYNC_SUMMARIES = os.environ.get("CONTEXT_SUMMARY_SYNC", "1" if CASSETTE_PATH else "0") == "1"
+
+Summarizer = Callable[[str, List[Tuple[str, str]], int], Optional[str]]
+
+
+class LLMSummarizer:
+    """Folds older conversation messages into a rolling summary using Azure OpenAI."""
+
+    def __init__(self, azure_client, deployment: str):
+        self.client = ChatClient.wrap(azure_client)
+        self.deployment = deployment
+
+    def __call__(self, previous_summary: str, messages: List[Tuple[str, str]], max_tokens: int) -> Optional[str]:
+        """Returns the previous summary updated with the given messages."""
+        transcript = "\n".join(f"{speaker}: {content}" for speaker, content in messages)
+        prompt = f"""
+Update the running summary of a sales conversation with the new messages below.
+Keep facts the customer shared (needs, concerns, objections, numbers, decisions)
+and drop pleasantries. Answer with the updated summary only, in at most {max_tokens} tokens.
+
+Current summary:
+{previous_summary or "(empty)"}
+
+New messages:
+{transcript}
+"""
+        try:
+            response = self.client.complete(
+                agent="customer",
+                prompt_type="context_summary",
+                messages=[
+                    {"role": "system", "content": "You summarize conversations concisely and factually."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Error summarizing conversation context: {e}")
+            return None
+
+
+class ConversationContextManager:
+    """Keeps a token-budgeted view of a conversation for prompt building.
+
+    The most recent messages are kept verbatim. Older messages are folded into
+    a summary: a compact local version is produced immediately so the context
+    never exceeds its budget, and when a summarizer is configured the summary
+    is refreshed incrementally in the background without blocking the turn.
+    """
+
+    def __init__(self, max_tokens: int = 1200, summary_tokens: int = 300,
+                 recent_messages: int = 4, summarizer: Optional[Summarizer] = None):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.recent_messages = recent_messages
+        self.summarizer = summarizer
+        self.recent: Deque[Tuple[str, str, int]] = deque()
+        self.recent_tokens = 0
+        self.folded_count = 0
+        self._summary = ""
+        self._unsummarized: Deque[Tuple[str, str]] = deque()
+        self._refresh = None
+        self._lock = threading.Lock()
+
+    def add_message(self, speaker: str, content: str):
+        """Adds a message and folds the oldest ones once the window is over budget."""
+        with self._lock:
+            tokens = estimate_tokens(content)
+            self.recent.append((speaker, content, tokens))
+            self.recent_tokens += tokens
+            self._fold_overflow()
+        self._schedule_refresh()
+
+    def _fold_overflow(self):
+        """Moves messages out of the verbatim window until it fits its budget; needs the lock held."""
+        recent_budget = self.max_tokens - self.summary_tokens
+        while len(self.recent) > 1 and (
+            len(self.recent) > self.recent_messages or self.recent_tokens > recent_budget
+        ):
+            speaker, content, tokens = self.recent.popleft()
+            self.recent_tokens -= tokens
+            self.folded_count += 1
+            self._unsummarized.append((speaker, content))
+            if len(self._unsummarized) > MAX_UNSUMMARIZED_MESSAGES:
+                self._unsummarized.popleft()
+
+    def _schedule_refresh(self):
+        """Starts a background summary refresh if there is new folded content."""
+        if not self.summarizer:
+            return
+        with self._lock:
+            if not self._unsummarized or (self._refresh and not self._refresh.done()):
+                return
+            batch = list(self._unsummarized)
+            previous_summary = self._summary
+            self._refresh = _SUMMARY_EXECUTOR.submit(self._run_refresh, previous_summary, batch, self.folded_count)
+
+    def _run_refresh(self, previous_summary: str, batch: List[Tuple[str, str]], batch_end: int):
+        """Runs the summarizer and merges its result with messages folded meanwhile.
+
+        batch_end is the folded_count when the batch was taken: the unsummarized
+        messages are always the latest folded ones, so the messages folded since
+        then are the last folded_count - batch_end of them.
+        """
+        summary = self.summarizer(previous_summary, batch, self.summary_tokens)
+        with self._lock:
+            self._refresh = None
+            if not summary:
+                return
+            # Only drop the messages that made it into this summary
+            folded_since = self.folded_count - batch_end
+            for _ in range(max(0, len(self._unsummarized) - folded_since)):
+                self._unsummarized.popleft()
+            self._summary = truncate_to_tokens(summary, self.summary_tokens)
+        self._schedule_refresh()
+
+    def wait_for_refresh(self, timeout: float = None):
+        """Blocks until the in-flight background summary (if any) has finished."""
+        refresh = self._refresh
+        while refresh:
+            refresh.result(timeout=timeout)
+            refresh = self._refresh if self._refresh is not refresh else None
+
+    def get_summary(self) -> str:
+        """Returns the summary of every message outside the verbatim window."""
+        if SYNC_SUMMARIES:
+            self.wait_for_refresh()
+        with self._lock:
+            lines = [self._summary] if self._summary else []
+            lines.extend(
+                f"{speaker}: {truncate_to_tokens(content, FOLDED_LINE_TOKENS)}"
+                for speaker, content in self._unsummarized
+            )
+
+        # Drop the oldest local lines first so the summary stays within budget
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(1 if self._summary else 0)
+        return truncate_to_tokens("\n".join(lines), self.summary_tokens)
+
+    def get_recent_messages(self) -> List[Tuple[str, str]]:
+        """Returns the verbatim window as (speaker, content) pairs, oldest first."""
+        recent_budget = self.max_tokens - self.summary_tokens
+        with self._lock:
+            return [
+                (speaker, truncate_to_tokens(content, recent_budget))
+                for speaker, content, _ in self.recent
+            ]
+
+    def to_state(self) -> Dict:
+        """Returns the summary and windows as plain data, for session stores.
+
+        Waits for the background summary first: the manager is rebuilt from
+        this state on the next request, so a refresh still running would be lost.
+        """
+        self.wait_for_refresh()
+        with self._lock:
+            return {
+                "summary": self._summary,
+                "unsummarized": [list(message) for message in self._unsummarized],
+                "recent": [list(message) for message in self.recent],
+                "folded_count": self.folded_count
+            }
+
+    def load_state(self, state: Dict):
+        """Restores the summary and windows saved by to_state."""
+        with self._lock:
+            self._summary = state.get("summary", "")
+            self._unsummarized = deque(tuple(message) for message in state.get("unsummarized", []))
+            self.recent = deque(tuple(message) for message in state.get("recent", []))
+            self.recent_tokens = sum(tokens for _, _, tokens in self.recent)
+            self.folded_count = state.get("folded_count", 0)
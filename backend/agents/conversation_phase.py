@@ -1,22 +1,61 @@
+from collections import deque
 from enum import Enum
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional, Tuple
+import math
+import os
 import time
 
+from agents.context_manager import ConversationContextManager
+from llm.client import ChatClient
+from monitoring.metrics import PHASE_TRANSITIONS
+
 class ConversationPhase(Enum):
     INTRODUCTION_DISCOVERY = "introduction_discovery"
     VALUE_PROPOSITION = "value_proposition"
     OBJECTION_HANDLING = "objection_handling"
     CLOSING = "closing"
 
+# Single-token labels used by the compact classification protocol
+PHASE_LABELS = {
+    "1": ConversationPhase.INTRODUCTION_DISCOVERY,
+    "2": ConversationPhase.VALUE_PROPOSITION,
+    "3": ConversationPhase.OBJECTION_HANDLING,
+    "4": ConversationPhase.CLOSING
+}
+
+# Token ids of "1"-"4", identical in the cl100k_base and o200k_base tokenizers
+PHASE_LABEL_TOKEN_IDS = {"1": 16, "2": 17, "3": 18, "4": 19}
+
+# Messages kept verbatim by the phase manager; older ones are only counted
+RECENT_MESSAGES = 20
+
+PHASE_ORDER = {
+    ConversationPhase.INTRODUCTION_DISCOVERY: 0,
+    ConversationPhase.VALUE_PROPOSITION: 1,
+    ConversationPhase.OBJECTION_HANDLING: 2,
+    ConversationPhase.CLOSING: 3
+}
+
 class ConversationPhaseManager:
     """Manages the progression of PLG conversation phases using AI-based semantic analysis."""
     
-    def __init__(self, azure_client=None, deployment=None):
+    def __init__(self, azure_client=None, deployment=None, compact_labels: Optional[bool] = None):
         self.current_phase = ConversationPhase.INTRODUCTION_DISCOVERY
         self.phase_history: List[Dict] = []
-        self.client = azure_client
+        self.client = ChatClient.wrap(azure_client)
         self.deployment = deployment
-        self.conversation_history: List[Dict] = []
+        # Recent (message, is_agent) pairs; the classifier prompt is built from self.context
+        self.conversation_history: Deque[Tuple[str, bool]] = deque(maxlen=RECENT_MESSAGES)
+        self.message_count = 0
+        # Bounded view of the conversation used to build the analysis prompt
+        self.context = ConversationContextManager(max_tokens=800, summary_tokens=200, recent_messages=5)
+        
+        # Compact protocol: the model answers with a single constrained digit
+        if compact_labels is None:
+            compact_labels = os.environ.get("PHASE_CLASSIFIER_MODE", "compact") == "compact"
+        self.compact_labels = compact_labels
+        self.use_logprobs = os.environ.get("PHASE_CLASSIFIER_LOGPROBS", "1") == "1"
+        self.last_confidence: Optional[float] = None
         
         # Phase-specific semantic patterns and intents
         self.phase_patterns = {
@@ -88,11 +127,9 @@ class ConversationPhaseManager:
     
     def add_message(self, message: str, is_agent: bool = True):
         """Adds a message to the conversation history."""
-        self.conversation_history.append({
-            "message": message,
-            "is_agent": is_agent,
-            "timestamp": time.time()
-        })
+        self.conversation_history.append((message, is_agent))
+        self.message_count += 1
+        self.context.add_message("Agent" if is_agent else "Customer", message)
     
     def analyze_message(self, message: str) -> ConversationPhase:
         """Analyzes the conversation to determine the current phase using AI."""
@@ -116,6 +153,11 @@ class ConversationPhaseManager:
         # Prepare conversation context for analysis
         conversation_context = self._prepare_conversation_context()
         
+        if self.compact_labels:
+            answer_format = "Return only the phase number (1, 2, 3 or 4)."
+        else:
+            answer_format = 'Return only the phase name (e.g., "INTRODUCTION_DISCOVERY").'
+        
         # Create a more sophisticated analysis prompt
         analysis_prompt = f"""
         Analyze this conversation and determine which phase it's currently in.
@@ -164,22 +206,22 @@ class ConversationPhaseManager:
         4. Consider the relationship development
         5. Look for signs of natural conclusion or resolution
 
-        Return only the phase name (e.g., "INTRODUCTION_DISCOVERY").
+        {answer_format}
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
+            response = self.client.complete(
+                agent="phase_manager",
+                prompt_type="phase_classification",
                 messages=[
-                    {"role": "system", "content": """You are an expert conversation analyst.
+                    {"role": "system", "content": f"""You are an expert conversation analyst.
                     Your task is to analyze conversations holistically and determine their current phase.
                     Consider the natural flow, context, and relationship development.
                     Look for signs of natural conclusion and resolution.
-                    Return only the exact phase name without any additional text."""},
+                    Return only the exact phase {"number" if self.compact_labels else "name"} without any additional text."""},
                     {"role": "user", "content": analysis_prompt}
                 ],
-                temperature=0.2,
-                max_tokens=50
+                **self._label_params()
             )
             
             # Parse the response to get the phase
@@ -187,20 +229,17 @@ class ConversationPhaseManager:
             
             # Validate the phase name
             try:
-                new_phase = ConversationPhase(phase_name.lower())
+                if self.compact_labels:
+                    new_phase = PHASE_LABELS[phase_name[:1]]
+                    self.last_confidence = self._label_confidence(response)
+                else:
+                    new_phase = ConversationPhase(phase_name.lower())
                 
                 # Additional validation to prevent phase regression
                 if new_phase != self.current_phase:
                     # Check if the new phase follows logical progression
-                    phase_order = {
-                        ConversationPhase.INTRODUCTION_DISCOVERY: 0,
-                        ConversationPhase.VALUE_PROPOSITION: 1,
-                        ConversationPhase.OBJECTION_HANDLING: 2,
-                        ConversationPhase.CLOSING: 3
-                    }
-                    
-                    current_order = phase_order.get(self.current_phase, -1)
-                    new_order = phase_order.get(new_phase, -1)
+                    current_order = PHASE_ORDER.get(self.current_phase, -1)
+                    new_order = PHASE_ORDER.get(new_phase, -1)
                     
                     # Only allow forward progression or staying in the same phase
                     if new_order < current_order:
@@ -209,7 +248,7 @@ class ConversationPhaseManager:
                 
                 return new_phase
                 
-            except ValueError:
+            except (ValueError, KeyError):
                 print(f"Invalid phase name received: {phase_name}")
                 return self.current_phase
             
@@ -217,16 +256,35 @@ class ConversationPhaseManager:
             print(f"Error in phase analysis: {str(e)}")
             return self.current_phase
     
+    def _label_params(self) -> Dict:
+        """Returns the request parameters that constrain the answer to one label token."""
+        if not self.compact_labels:
+            return {}
+        params = {
+            "max_tokens": 1,
+            "temperature": 0,
+            "logit_bias": {str(token_id): 100 for token_id in PHASE_LABEL_TOKEN_IDS.values()}
+        }
+        if self.use_logprobs:
+            params["logprobs"] = True
+        return params
+    
+    def _label_confidence(self, response) -> Optional[float]:
+        """Returns the probability of the chosen label, if logprobs were returned."""
+        logprobs = getattr(response.choices[0], "logprobs", None)
+        if not logprobs or not logprobs.content:
+            return None
+        return round(math.exp(logprobs.content[0].logprob), 4)
+    
     def _prepare_conversation_context(self) -> str:
         """Prepares the conversation history for analysis."""
-        # Get the last 5 messages for context
-        recent_messages = self.conversation_history[-5:]
-        
-        # Format the conversation
+        # Summary of older messages followed by the last 5 messages
         formatted_conversation = []
-        for msg in recent_messages:
-            speaker = "Agent" if msg["is_agent"] else "Customer"
-            formatted_conversation.append(f"{speaker}: {msg['message']}")
+        summary = self.context.get_summary()
+        if summary:
+            formatted_conversation.append(f"Earlier in the conversation:\n{summary}\n")
+        for speaker, message in self.context.get_recent_messages():
+            formatted_conversation.append(f"{speaker}: {message}")
         
         return "\n".join(formatted_conversation)
     
@@ -237,8 +295,10 @@ class ConversationPhaseManager:
                 "from_phase": self.current_phase,
                 "to_phase": new_phase,
                 "timestamp": time.time(),
-                "conversation_length": len(self.conversation_history)
+                "conversation_length": self.message_count,
+                "confidence": self.last_confidence
             })
+            PHASE_TRANSITIONS.inc(self.current_phase.value, new_phase.value)
             self.current_phase = new_phase
     
     def is_closing_phase(self) -> bool:
@@ -251,4 +311,39 @@ class ConversationPhaseManager:
     
     def get_current_phase(self) -> ConversationPhase:
         """Returns the current conversation phase."""
-        return self.current_phase 
\ No newline at end of file
+        return self.current_phase 
+    
+    def to_state(self) -> Dict:
+        """Returns the phase tracking state as plain data, for session stores."""
+        return {
+            "current_phase": self.current_phase.value,
+            "phase_history": [
+                {**transition, "from_phase": transition["from_phase"].value, "to_phase": transition["to_phase"].value}
+                for transition in self.phase_history
+            ],
+            "conversation_history": [
+                {"message": message, "is_agent": is_agent} for message, is_agent in self.conversation_history
+            ],
+            "message_count": self.message_count,
+            "context": self.context.to_state(),
+            "last_confidence": self.last_confidence
+        }
+    
+    def load_state(self, state: Dict):
+        """Restores the phase tracking state saved by to_state."""
+        self.current_phase = ConversationPhase(state["current_phase"])
+        self.phase_history = [
+            {
+                **transition,
+                "from_phase": ConversationPhase(transition["from_phase"]),
+                "to_phase": ConversationPhase(transition["to_phase"])
+            }
+            for transition in state.get("phase_history", [])
+        ]
+        history = state.get("conversation_history", [])
+        self.conversation_history = deque(
+            ((entry["message"], entry.get("is_agent", True)) for entry in history), maxlen=RECENT_MESSAGES
+        )
+        self.message_count = state.get("message_count", len(history))
+        self.context.load_state(state.get("context", {}))
+        self.last_confidence = state.get("last_confidence")
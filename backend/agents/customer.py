@@ -1,10 +1,15 @@
 import re
 import time
 import os
-from typing import Dict, List
+from collections import deque
+from typing import Deque, Dict, Optional
 from openai import AzureOpenAI
+from llm.client import ChatClient
+from monitoring.metrics import stage_timer
 from profiles import CUSTOMER_PROFILES, PRODUCT_INFO
 from agents.conversation_phase import ConversationPhaseManager, ConversationPhase
+from agents.context_manager import ConversationContextManager, LLMSummarizer
+from agents.turns import RECENT_TURNS, Turn, turns_from_messages
 
 
 class CustomerAgent:
@@ -17,13 +22,21 @@ class CustomerAgent:
         self.industry = industry
         self.company_size = company_size
         self.profile = self._create_profile()
-        self.conversation_history = []
+        # The profile parts of the prompt are the same on every turn
+        self.persona_prompt, self.traits_prompt = self._render_persona()
+        # Recent turns only; the prompt is built from self.context
+        self.conversation_history: Deque[Turn] = deque(maxlen=RECENT_TURNS)
         self.phase_manager = ConversationPhaseManager(
             azure_client=azure_client,
             deployment=os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
         )
-        self.client = azure_client
+        self.client = ChatClient.wrap(azure_client)
         self.deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
+        # Token-budgeted prompt context: recent messages verbatim, older ones summarized
+        self.context = ConversationContextManager(
+            recent_messages=4,
+            summarizer=LLMSummarizer(self.client, self.deployment) if self.client else None
+        )
         
     def _create_profile(self) -> Dict:
         """Create a complete customer profile."""
@@ -35,42 +48,51 @@ class CustomerAgent:
             "company_size": CUSTOMER_PROFILES["company_size"][self.company_size]
         }
     
-    def generate_response(self, user_message: str) -> str:
-        """Generate a customer response based on the profile and conversation history."""
+    def generate_response(self, user_message: str, turn: Optional[Turn] = None) -> str:
+        """Generate a customer response based on the profile and conversation history.
+        
+        turn is the session's shared record of this exchange, if there is one.
+        """
         # Analyze conversation phase
-        current_phase = self.phase_manager.analyze_message(user_message)
+        with stage_timer("phase_classification", "phase_manager"):
+            current_phase = self.phase_manager.analyze_message(user_message)
         
         # Check for closing phase
         if current_phase == ConversationPhase.CLOSING:
             return self._generate_closing_remark()
         
         # Update conversation history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        if turn is None:
+            turn = Turn(user_message)
+        self.conversation_history.append(turn)
+        self.context.add_message("Microsoft Representative", user_message)
         
         # Build the prompt for customer response generation
-        prompt = self._build_prompt(user_message, current_phase)
+        with stage_timer("prompt_build", "customer"):
+            prompt = self._build_prompt(user_message, current_phase)
         
         try:
             # Generate response using Azure OpenAI
-            response = self.client.chat.completions.create(
-                model=self.deployment,  # Use the deployment name from environment
+            response = self.client.complete(
+                agent="customer",
+                prompt_type="customer_reply",
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": "Please generate a realistic customer response based on my previous message."}
                 ],
-                max_tokens=800,
-                temperature=0.5,
             )
             
             customer_response = response.choices[0].message.content
             
             # Clean up the response
-            customer_response = re.sub(r'^.*?:', '', customer_response).strip()
-            customer_response = re.sub(r'^"', '', customer_response).strip()
-            customer_response = re.sub(r'"$', '', customer_response).strip()
+            with stage_timer("response_cleanup", "customer"):
+                customer_response = re.sub(r'^.*?:', '', customer_response).strip()
+                customer_response = re.sub(r'^"', '', customer_response).strip()
+                customer_response = re.sub(r'"$', '', customer_response).strip()
             
             # Update conversation history
-            self.conversation_history.append({"role": "assistant", "content": customer_response})
+            turn.customer = customer_response
+            self.context.add_message("Customer", customer_response)
             
             return customer_response
             
@@ -104,11 +126,34 @@ class CustomerAgent:
         else:
             return base_remark
     
-    def _build_prompt(self, user_message: str, current_phase: ConversationPhase) -> str:
-        """Build a detailed prompt for the customer agent."""
+    def generate_opening_line(self, initial_query: str) -> str:
+        """Rephrases the scenario's opening query in this customer's voice.
+        
+        Falls back to the query itself if the call fails.
+        """
+        try:
+            response = self.client.complete(
+                agent="customer",
+                prompt_type="opening_line",
+                messages=[
+                    {"role": "system", "content": self.persona_prompt + f"""# INSTRUCTIONS:
+Rewrite the opening message below as this customer would say it to a Microsoft representative.
+Keep its meaning, use 1-2 sentences and respond with the message only.
+"""},
+                    {"role": "user", "content": initial_query}
+                ],
+            )
+            opening_line = response.choices[0].message.content.strip().strip('"')
+            return opening_line or initial_query
+        except Exception as e:
+            print(f"Error generating opening line: {e}")
+            return initial_query
+    
+    def _render_persona(self):
+        """Renders the profile and trait sections of the customer prompt."""
         product_name = PRODUCT_INFO["name"]
         
-        prompt = f"""
+        persona_prompt = f"""
 You are roleplaying as a customer interested in {product_name}.
 
 # YOUR CUSTOMER PROFILE:
@@ -118,13 +163,8 @@ You are roleplaying as a customer interested in {product_name}.
 - Industry: {self.industry} with concerns about {', '.join(self.profile['industry']['concerns'])}
 - Company Size: {self.company_size} - {self.profile['company_size']['description']}
 
-# CURRENT CONVERSATION PHASE:
-{current_phase.value}
-
-# PHASE-SPECIFIC GUIDELINES:
-{self._get_phase_guidelines(current_phase)}
-
-# PERSONALITY TRAITS (reflect these in your responses):
+"""
+        traits_prompt = f"""# PERSONALITY TRAITS (reflect these in your responses):
 {', '.join(self.profile['personality']['traits'])}
 
 # TECHNICAL KNOWLEDGE TRAITS (reflect these in your responses):
@@ -138,10 +178,24 @@ You are roleplaying as a customer interested in {product_name}.
 
 # PREVIOUS CONVERSATION:
 """
-        # Add conversation history to prompt
-        for message in self.conversation_history[-4:]:  # Include last 4 messages only to save context
-            role = "Microsoft Representative" if message["role"] == "user" else "You (Customer)"
-            prompt += f"{role}: {message['content']}\n\n"
+        return persona_prompt, traits_prompt
+    
+    def _build_prompt(self, user_message: str, current_phase: ConversationPhase) -> str:
+        """Build a detailed prompt for the customer agent."""
+        prompt = self.persona_prompt + f"""# CURRENT CONVERSATION PHASE:
+{current_phase.value}
+
+# PHASE-SPECIFIC GUIDELINES:
+{self._get_phase_guidelines(current_phase)}
+
+""" + self.traits_prompt
+        # Add the summary of older messages, then the most recent ones verbatim
+        summary = self.context.get_summary()
+        if summary:
+            prompt += f"Summary of the earlier conversation:\n{summary}\n\n"
+        for speaker, content in self.context.get_recent_messages():
+            role = "You (Customer)" if speaker == "Customer" else speaker
+            prompt += f"{role}: {content}\n\n"
         
         prompt += f"""
 # LATEST MESSAGE FROM MICROSOFT REPRESENTATIVE:
@@ -220,4 +274,31 @@ Generate a realistic, human-like response that this customer would give to the M
         elif current_phase == ConversationPhase.VALUE_PROPOSITION:
             return f"{base_remark} I'll review the ROI calculations and discuss with our finance team."
         else:
-            return base_remark
\ No newline at end of file
+            return base_remark
+    
+    def to_state(self) -> Dict:
+        """Returns the customer's profile and conversation state as plain data, for session stores."""
+        return {
+            "personality": self.personality,
+            "tech_level": self.tech_level,
+            "role": self.role,
+            "industry": self.industry,
+            "company_size": self.company_size,
+            "conversation_history": [turn.to_dict() for turn in self.conversation_history],
+            "phase_manager": self.phase_manager.to_state(),
+            "context": self.context.to_state()
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict, azure_client) -> "CustomerAgent":
+        """Recreates a customer saved by to_state, using the given client."""
+        agent = cls(
+            state["personality"], state["tech_level"], state["role"],
+            state["industry"], state["company_size"], azure_client=azure_client
+        )
+        agent.conversation_history = deque(
+            turns_from_messages(state.get("conversation_history", [])), maxlen=RECENT_TURNS
+        )
+        agent.phase_manager.load_state(state["phase_manager"])
+        agent.context.load_state(state.get("context", {}))
+        return agent
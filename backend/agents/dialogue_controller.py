@@ -1,27 +1,53 @@
+import re
+from typing import Dict
+
+from agents.customer import CustomerAgent
+from agents.naturalizer import LocalNaturalizer, MAX_RESPONSE_LENGTH, has_ai_patterns, is_too_formal
+from monitoring.metrics import DIALOGUE_REWRITES, stage_timer
+
 class DialogueController:
     """Controls and monitors the customer dialogue to ensure it remains realistic."""
     
     def __init__(self, customer_agent: CustomerAgent):
         self.customer_agent = customer_agent
-        self.question_control = customer_agent.question_control
+        self.question_control = getattr(customer_agent, "question_control", None)
         self.client = customer_agent.client
         self.deployment = customer_agent.deployment
+        self.naturalizer = LocalNaturalizer()
+        self.stats = {"checked": 0, "local_rewrites": 0, "llm_rewrites": 0}
     
     def process_customer_response(self, response: str) -> str:
         """Processes and potentially modifies customer responses to ensure realism."""
+        self.stats["checked"] += 1
+        
         # Check for closing remarks
-        if self.question_control.is_closing_remark(response):
+        if self.question_control and self.question_control.is_closing_remark(response):
+            DIALOGUE_REWRITES.inc("closing")
             return self.question_control.generate_closing_remark(self.customer_agent.personality, self.customer_agent.scenario["title"])
         
-        # Check response length
-        if len(response) > 500:
-            return self._fix_verbose_response(response)
+        is_verbose = len(response) > MAX_RESPONSE_LENGTH
+        if not is_verbose and not self._is_too_formal(response) and not self._has_ai_patterns(response):
+            DIALOGUE_REWRITES.inc("unchanged")
+            return response
+        
+        # Try the local post-processor first, it avoids a second LLM round-trip
+        revised = self.naturalizer.naturalize(response)
+        if self.naturalizer.passes_checks(revised):
+            self.stats["local_rewrites"] += 1
+            DIALOGUE_REWRITES.inc("local")
+            return revised
         
-        # Check for unnatural formality or AI patterns
-        if self._is_too_formal(response) or self._has_ai_patterns(response):
+        # Escalate to an LLM rewrite only when the local pass was not enough
+        self.stats["llm_rewrites"] += 1
+        DIALOGUE_REWRITES.inc("llm")
+        with stage_timer("dialogue_rewrite", "dialogue_controller"):
+            if is_verbose:
+                return self._fix_verbose_response(response)
             return self._naturalize_response(response)
-            
-        return response
+    
+    def get_stats(self) -> Dict:
+        """Returns how many responses were rewritten locally and how many needed the LLM."""
+        return {**self.stats, "rewrites_avoided": self.stats["local_rewrites"]}
     
     def _fix_verbose_response(self, response: str) -> str:
         """Fixes overly verbose responses."""
@@ -41,14 +67,13 @@ Make it:
 Return only the revised response with no explanation.
 """
         try:
-            result = self.client.chat.completions.create(
-                model=self.deployment,
+            result = self.client.complete(
+                agent="dialogue_controller",
+                prompt_type="verbose_fix",
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": "Please revise this customer response to be more concise and natural."}
                 ],
-                max_tokens=300,
-                temperature=0.4,
             )
             
             revised = result.choices[0].message.content
@@ -58,42 +83,16 @@ Return only the revised response with no explanation.
             return revised
         except Exception as e:
             print(f"Error fixing verbose response: {e}")
-            # Fallback to simple truncation if API call fails
-            sentences = response.split('. ')
-            if len(sentences) > 3:
-                return '. '.join(sentences[:3]) + '.'
-            return response
+            # Fallback to sentence-level truncation if API call fails
+            return self.naturalizer.truncate(response)
     
     def _is_too_formal(self, response: str) -> bool:
         """Checks if a response is unnaturally formal."""
-        formal_indicators = [
-            "I would like to inquire",
-            "I am writing to",
-            "I hereby",
-            "thus",
-            "furthermore",
-            "nevertheless",
-            "I am pleased to inform you",
-            "per our conversation",
-            "kindly assist"
-        ]
-        
-        return any(indicator in response.lower() for indicator in formal_indicators)
+        return is_too_formal(response)
     
     def _has_ai_patterns(self, response: str) -> bool:
         """Checks for common AI response patterns."""
-        ai_patterns = [
-            "As an AI",
-            "I'm happy to help",
-            "I don't have personal",
-            "I don't have access to",
-            "As requested",
-            "I'd be happy to assist",
-            "Thank you for providing",
-            "I appreciate your patience"
-        ]
-        
-        return any(pattern in response for pattern in ai_patterns)
+        return has_ai_patterns(response)
     
     def _naturalize_response(self, response: str) -> str:
         """Makes an unnatural response sound more human."""
@@ -116,14 +115,13 @@ Make it:
 Return only the revised response with no explanation.
 """
         try:
-            result = self.client.chat.completions.create(
-                model=self.deployment,
+            result = self.client.complete(
+                agent="dialogue_controller",
+                prompt_type="naturalization",
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": "Please naturalize this customer response."}
                 ],
-                max_tokens=300,
-                temperature=0.7,
             )
             
             revised = result.choices[0].message.content
@@ -134,88 +132,3 @@ Return only the revised response with no explanation.
         except Exception as e:
             print(f"Error naturalizing response: {e}")
             return response
-
-class RoleplaySystem:
-    """Main system that manages the roleplay scenario."""
-    
-    def __init__(self):
-        self.scenario = None
-        self.customer_agent = None
-        self.dialogue_controller = None
-        self.observer = None
-        self.conversation_history = []
-    
-    def setup_scenario(self):
-        """Set up a new roleplay scenario."""
-        # Choose a random scenario
-        self.scenario = random.choice(SCENARIOS)
-        
-        # Choose random customer attributes
-        personality = random.choice(list(CUSTOMER_PROFILES["personalities"].keys()))
-        tech_level = random.choice(list(CUSTOMER_PROFILES["tech_levels"].keys()))
-        role = random.choice(list(CUSTOMER_PROFILES["roles"].keys()))
-        industry = random.choice(list(CUSTOMER_PROFILES["industries"].keys()))
-        company_size = random.choice(list(CUSTOMER_PROFILES["company_size"].keys()))
-        
-        # Create customer agent
-        self.customer_agent = CustomerAgent(personality, tech_level, role, industry, company_size)
-        
-        # Create dialogue controller
-        self.dialogue_controller = DialogueController(self.customer_agent)
-        
-        # Create observer with Azure client
-        self.observer = ObserverCoach(
-            azure_client=self.customer_agent.client,
-            deployment=self.customer_agent.deployment
-        )
-        
-        # Format initial query with product name
-        initial_query = self.scenario["initial_query"].format(product_name=PRODUCT_INFO["name"])
-        
-        # Reset conversation history
-        self.conversation_history = []
-        
-        return {
-            "scenario": self.scenario["title"],
-            "description": self.scenario["description"],
-            "customer_profile": {
-                "personality": personality,
-                "tech_level": tech_level,
-                "role": role,
-                "industry": industry,
-                "company_size": company_size
-            },
-            "initial_query": initial_query
-        }
-    
-    def process_user_message(self, message: str) -> str:
-        """Process user message and get customer response."""
-        if not self.customer_agent:
-            return "Error: No scenario has been set up. Please set up a scenario first."
-        
-        # Check if current question needs verification
-        if self.customer_agent.question_control.current_question:
-            is_satisfactory, feedback = self.customer_agent.question_control.verify_answer(message)
-            if not is_satisfactory:
-                return feedback
-        
-        # Generate customer response
-        raw_response = self.customer_agent.generate_response(message)
-        
-        # Process response through dialogue controller
-        final_response = self.dialogue_controller.process_customer_response(raw_response)
-        
-        # Add to conversation history
-        self.conversation_history.append({
-            "user": message,
-            "customer": final_response
-        })
-        
-        # Update observer
-        self.observer.add_interaction(message, final_response)
-        
-        return final_response
-
-    def get_product_info(self) -> Dict:
-        """Return product information."""
-        return PRODUCT_INFO
@@ -1,6 +1,9 @@
-import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from agents.conversation_phase import ConversationPhase, ConversationPhaseManager
+from agents.rubric import INDICATORS, get_rubric
+from agents.turns import Turn
+from llm.client import ChatClient
+from monitoring.metrics import EVALUATOR_RUNS, RED_FLAGS
 
 class PLGPhaseScore:
     """Tracks scoring and feedback for each PLG phase."""
@@ -55,18 +58,27 @@ class ObserverCoach:
         self.objections = []
         self.blockers = []
         self.has_evaluated_closing = False
-        self.client = azure_client
+        # Red flags raised turn by turn
+        self.alerts = []
+        self.client = ChatClient.wrap(azure_client)
         self.deployment = deployment
+        # Signal bits of the turns matched so far against self._rubric
+        self._rubric = None
+        self._signals = 0
+        self._matched_turns = 0
     
-    def add_interaction(self, user_message: str, customer_response: str):
-        """Adds an interaction to the conversation history."""
+    def add_interaction(self, user_message: str, customer_response: str, turn: Optional[Turn] = None):
+        """Adds an interaction to the conversation history.
+        
+        turn is the session's shared record of this exchange, if there is one.
+        """
         current_phase = self.phase_manager.analyze_message(user_message)
-        self.conversation_history.append({
-            "user": user_message,
-            "customer": customer_response,
-            "timestamp": time.time(),
-            "phase": current_phase
-        })
+        if turn is None:
+            turn = Turn(user_message, customer_response)
+        turn.phase = current_phase
+        
+        # Red flags are raised on the turn that shows them, not at summary time
+        alerts = self._match_turn(turn)
         
         # Analyze for pain points, objections, and blockers
         self._analyze_customer_concerns(customer_response)
@@ -80,43 +92,48 @@ class ObserverCoach:
             self._evaluate_closing_phase()
             self.has_evaluated_closing = True
             print(self.get_summary())
+        
+        return alerts
+    
+    def _match_turn(self, turn: Turn) -> List[Dict]:
+        """Appends a turn, matches it against the rubric and returns the red flags it raises."""
+        rubric, previous = self._conversation_signals()
+        self.conversation_history.append(turn)
+        turn_signals = rubric.match(turn.user_lower, turn.customer_lower) | rubric.phase_bit(turn.phase)
+        self._signals = previous | turn_signals
+        self._matched_turns = len(self.conversation_history)
+        
+        alerts = []
+        for aspect in rubric.alerts(previous, self._signals, turn_signals):
+            alerts.append({
+                "id": aspect.id,
+                "phase": aspect.phase.value,
+                "turn": len(self.conversation_history) - 1,
+                "message": aspect.feedback or aspect.id,
+                "suggestion": aspect.suggestion
+            })
+            RED_FLAGS.inc(aspect.id)
+        self.alerts.extend(alerts)
+        return alerts
     
     def _analyze_customer_concerns(self, message: str):
         """Analyzes message for pain points, objections, and blockers."""
-        # Pain point indicators
-        pain_point_indicators = [
-            "struggle", "difficult", "challenge", "problem", "issue",
-            "frustrated", "pain", "hassle", "complicated", "time-consuming"
-        ]
-        
-        # Objection indicators
-        objection_indicators = [
-            "expensive", "cost", "price", "budget", "concerned",
-            "worried", "hesitant", "not sure", "doubt", "risk"
-        ]
-        
-        # Blocker indicators
-        blocker_indicators = [
-            "can't", "unable", "impossible", "blocked", "restricted",
-            "limitation", "constraint", "barrier", "obstacle", "hurdle"
-        ]
-        
         message_lower = message.lower()
         
         # Extract pain points
-        for indicator in pain_point_indicators:
+        for indicator in INDICATORS["pain_point"]:
             if indicator in message_lower:
                 self.pain_points.append(message)
                 break
         
         # Extract objections
-        for indicator in objection_indicators:
+        for indicator in INDICATORS["objection"]:
             if indicator in message_lower:
                 self.objections.append(message)
                 break
         
         # Extract blockers
-        for indicator in blocker_indicators:
+        for indicator in INDICATORS["blocker"]:
             if indicator in message_lower:
                 self.blockers.append(message)
                 break
@@ -130,6 +147,8 @@ class ObserverCoach:
                 "suggestions": ["Start a conversation to receive feedback."]
             }
         
+        EVALUATOR_RUNS.inc("analysis")
+        
         # Reset phase scores
         for score in self.phase_scores.values():
             score.score = 0
@@ -139,10 +158,7 @@ class ObserverCoach:
             score.missed_opportunities = []
         
         # Analyze each phase
-        self._analyze_introduction_discovery_phase()
-        self._analyze_value_proposition_phase()
-        self._analyze_objection_handling_phase()
-        self._analyze_closing_phase()
+        self._score_phases()
         
         # Calculate overall score
         total_score = sum(score.score for score in self.phase_scores.values())
@@ -171,201 +187,35 @@ class ObserverCoach:
             "blockers": self.blockers
         }
     
-    def _analyze_introduction_discovery_phase(self):
-        """Analyzes the introduction and discovery phase effectiveness."""
-        score = self.phase_scores[ConversationPhase.INTRODUCTION_DISCOVERY]
-        
-        # Check for pain point discovery
-        if self.pain_points:
-            score.adjust_score(5)
-            score.add_strength("Successfully identified customer pain points")
-        else:
-            score.add_feedback("Could have done more to uncover customer pain points")
-            score.add_suggestion("Ask more probing questions about current challenges")
-        
-        # Check for goal identification
-        goal_indicators = ["goal", "objective", "target", "aim", "want to achieve"]
-        found_goals = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                         for message in self.conversation_history 
-                         for indicator in goal_indicators)
-        
-        if found_goals:
-            score.adjust_score(5)
-            score.add_strength("Effectively identified customer goals")
-        else:
-            score.add_feedback("Could have better understood customer objectives")
-            score.add_suggestion("Ask about specific business goals and desired outcomes")
-        
-        # Check for needs analysis
-        needs_indicators = ["need", "requirement", "looking for", "seeking", "want"]
-        found_needs = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                         for message in self.conversation_history 
-                         for indicator in needs_indicators)
-        
-        if found_needs:
-            score.adjust_score(5)
-            score.add_strength("Good understanding of customer needs")
-        else:
-            score.add_feedback("Could have better explored customer needs")
-            score.add_suggestion("Ask more questions about specific requirements")
-        
-        # Check for industry context
-        if any(message.get("phase") == ConversationPhase.INTRODUCTION_DISCOVERY 
-               for message in self.conversation_history):
-            score.adjust_score(5)
-            score.add_strength("Maintained focus on industry-specific context")
-        else:
-            score.add_missed_opportunity("Could have explored industry-specific challenges")
-    
-    def _analyze_value_proposition_phase(self):
-        """Analyzes the value proposition phase effectiveness."""
-        score = self.phase_scores[ConversationPhase.VALUE_PROPOSITION]
-        
-        # Check for value proposition clarity
-        value_indicators = ["benefit", "value", "roi", "improve", "enhance", "increase"]
-        found_value = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                         for message in self.conversation_history 
-                         for indicator in value_indicators)
-        
-        if found_value:
-            score.adjust_score(5)
-            score.add_strength("Clear communication of value proposition")
-        else:
-            score.add_feedback("Could have better articulated product value")
-            score.add_suggestion("Focus more on specific benefits and ROI")
-        
-        # Check for pain point alignment
-        if self.pain_points and found_value:
-            score.adjust_score(5)
-            score.add_strength("Effectively aligned value with pain points")
-        else:
-            score.add_missed_opportunity("Could have better connected value to customer pain points")
-        
-        # Check for business impact
-        impact_indicators = ["impact", "result", "outcome", "improvement", "change"]
-        found_impact = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                          for message in self.conversation_history 
-                          for indicator in impact_indicators)
-        
-        if found_impact:
-            score.adjust_score(5)
-            score.add_strength("Strong focus on business impact")
-        else:
-            score.add_feedback("Could have better emphasized business impact")
-            score.add_suggestion("Include more specific examples of business outcomes")
-        
-        # Check for ROI discussion
-        roi_indicators = ["roi", "return on investment", "cost savings", "efficiency"]
-        found_roi = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                       for message in self.conversation_history 
-                       for indicator in roi_indicators)
-        
-        if found_roi:
-            score.adjust_score(5)
-            score.add_strength("Effective ROI discussion")
-        else:
-            score.add_missed_opportunity("Could have included more ROI analysis")
-    
-    def _analyze_objection_handling_phase(self):
-        """Analyzes the objection handling phase effectiveness."""
-        score = self.phase_scores[ConversationPhase.OBJECTION_HANDLING]
-        
-        # Check for objection acknowledgment
-        if self.objections:
-            score.adjust_score(5)
-            score.add_strength("Identified and acknowledged customer objections")
-        else:
-            score.add_missed_opportunity("Could have proactively addressed potential objections")
-        
-        # Check for empathy in responses
-        empathy_indicators = ["understand", "appreciate", "recognize", "hear", "feel"]
-        found_empathy = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                          for message in self.conversation_history 
-                          for indicator in empathy_indicators)
-        
-        if found_empathy:
-            score.adjust_score(5)
-            score.add_strength("Demonstrated empathy in responses")
-        else:
-            score.add_feedback("Could have shown more empathy in responses")
-            score.add_suggestion("Acknowledge concerns before addressing them")
-        
-        # Check for value-driven responses
-        if found_empathy and any(message.get("phase") == ConversationPhase.VALUE_PROPOSITION 
-                               for message in self.conversation_history):
-            score.adjust_score(5)
-            score.add_strength("Connected objections to value proposition")
-        else:
-            score.add_feedback("Could have better connected responses to value")
-            score.add_suggestion("Link solutions to customer value")
+    def _conversation_signals(self):
+        """Returns the current rubric and the signal bits of the whole conversation.
         
-        # Check for blocker resolution
-        if self.blockers:
-            resolution_indicators = ["solution", "address", "resolve", "overcome", "handle"]
-            found_resolution = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                                 for message in self.conversation_history 
-                                 for indicator in resolution_indicators)
-            
-            if found_resolution:
-                score.adjust_score(5)
-                score.add_strength("Effectively addressed blockers")
-            else:
-                score.add_feedback("Could have better addressed blockers")
-                score.add_suggestion("Provide specific solutions for identified blockers")
+        Turns are matched once; only the turns added since the last call are
+        scanned, unless the rubric was swapped in the meantime.
+        """
+        rubric = get_rubric()
+        if rubric is not self._rubric:
+            self._rubric, self._signals, self._matched_turns = rubric, 0, 0
+        for message in self.conversation_history[self._matched_turns:]:
+            self._signals |= rubric.match(message.user_lower, message.customer_lower) | rubric.phase_bit(message.phase)
+        self._matched_turns = len(self.conversation_history)
+        return rubric, self._signals
     
-    def _analyze_closing_phase(self):
-        """Analyzes the closing phase effectiveness."""
-        score = self.phase_scores[ConversationPhase.CLOSING]
-        
-        # Check for next steps
-        next_step_indicators = ["next step", "follow up", "schedule", "plan", "arrange"]
-        found_next_steps = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                             for message in self.conversation_history 
-                             for indicator in next_step_indicators)
-        
-        if found_next_steps:
-            score.adjust_score(5)
-            score.add_strength("Clear next steps established")
-        else:
-            score.add_feedback("Could have established clearer next steps")
-            score.add_suggestion("Outline specific follow-up actions")
-        
-        # Check for success metrics
-        metric_indicators = ["measure", "track", "monitor", "evaluate", "assess"]
-        found_metrics = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                          for message in self.conversation_history 
-                          for indicator in metric_indicators)
-        
-        if found_metrics:
-            score.adjust_score(5)
-            score.add_strength("Discussed success metrics")
-        else:
-            score.add_missed_opportunity("Could have discussed success metrics")
-        
-        # Check for expansion opportunities
-        expansion_indicators = ["expand", "grow", "scale", "additional", "more"]
-        found_expansion = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                            for message in self.conversation_history 
-                            for indicator in expansion_indicators)
-        
-        if found_expansion:
-            score.adjust_score(5)
-            score.add_strength("Identified expansion opportunities")
-        else:
-            score.add_missed_opportunity("Could have discussed expansion opportunities")
-        
-        # Check for support discussion
-        support_indicators = ["support", "help", "assist", "guide", "resource"]
-        found_support = any(indicator in message["user"].lower() or indicator in message["customer"].lower()
-                          for message in self.conversation_history 
-                          for indicator in support_indicators)
-        
-        if found_support:
-            score.adjust_score(5)
-            score.add_strength("Addressed support and resources")
-        else:
-            score.add_feedback("Could have discussed support options")
-            score.add_suggestion("Outline available support and resources")
+    def _score_phases(self):
+        """Scores every phase with the aspects of the rubric's scoring table."""
+        rubric, signals = self._conversation_signals()
+        for phase, outcome in rubric.outcome(signals).items():
+            score = self.phase_scores[phase]
+            if outcome.penalized:
+                # Penalties make the clipping order matter
+                for points in outcome.points:
+                    score.adjust_score(points)
+            elif outcome.points:
+                score.adjust_score(sum(outcome.points))
+            score.feedback.extend(outcome.feedback)
+            score.suggestions.extend(outcome.suggestions)
+            score.strengths.extend(outcome.strengths)
+            score.missed_opportunities.extend(outcome.missed_opportunities)
     
     def _generate_ai_feedback(self, phase: ConversationPhase, context: str) -> Dict:
         """Generates AI-powered feedback for a specific phase."""
@@ -413,17 +263,18 @@ class ObserverCoach:
         4. Recommendations for future conversations
 
         Format the response as JSON with:
-        {
+        {{
             "feedback": "Detailed analysis of what was done well and what could be improved",
             "suggestion": "Specific, actionable suggestion for improvement",
             "strength": "Key strength observed in this phase",
             "opportunity": "Missed opportunity or area for growth"
-        }
+        }}
         """
         
         try:
-            result = self.client.chat.completions.create(
-                model=self.deployment,
+            result = self.client.complete(
+                agent="observer",
+                prompt_type="phase_feedback",
                 messages=[
                     {"role": "system", "content": """You are an expert conversation evaluator.
                     Your task is to provide detailed, actionable feedback on conversation phases.
@@ -432,8 +283,6 @@ class ObserverCoach:
                     Return the response in the specified JSON format."""},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=500,
-                temperature=0.3,
             )
             
             # Parse the response as JSON
@@ -455,32 +304,42 @@ class ObserverCoach:
     
     def _evaluate_closing_phase(self):
         """Performs a comprehensive evaluation of the conversation when entering the closing phase."""
+        EVALUATOR_RUNS.inc("closing")
+        
         # Analyze each phase
-        self._analyze_introduction_discovery_phase()
-        self._analyze_value_proposition_phase()
-        self._analyze_objection_handling_phase()
-        self._analyze_closing_phase()
+        self._score_phases()
         
         # Calculate phase coverage
         covered_phases = set()
         for message in self.conversation_history:
-            if message.get("phase"):
-                covered_phases.add(message["phase"])
+            if message.phase:
+                covered_phases.add(message.phase)
         
         # Evaluate phase transitions
         phase_transitions = []
         for i in range(1, len(self.conversation_history)):
-            if self.conversation_history[i].get("phase") != self.conversation_history[i-1].get("phase"):
+            if self.conversation_history[i].phase != self.conversation_history[i-1].phase:
                 phase_transitions.append({
-                    "from": self.conversation_history[i-1].get("phase"),
-                    "to": self.conversation_history[i].get("phase")
+                    "from": self.conversation_history[i-1].phase,
+                    "to": self.conversation_history[i].phase
                 })
         
         # Generate comprehensive AI feedback for each phase
+        self.add_ai_feedback(covered_phases)
+        
+        # Generate comprehensive feedback
+        self._generate_comprehensive_feedback(covered_phases, phase_transitions)
+    
+    def add_ai_feedback(self, covered_phases: set = None) -> Dict:
+        """Generates AI feedback for each covered phase and adds it to the phase scores."""
+        if covered_phases is None:
+            covered_phases = {message.phase for message in self.conversation_history if message.phase}
+        
+        results = {}
         for phase in covered_phases:
             # Create context for the phase
-            phase_messages = [msg for msg in self.conversation_history if msg.get("phase") == phase]
-            context = "\n".join([f"{msg['user']}\n{msg['customer']}" for msg in phase_messages])
+            phase_messages = [msg for msg in self.conversation_history if msg.phase == phase]
+            context = "\n".join([f"{msg.user}\n{msg.customer}" for msg in phase_messages])
             
             # Get AI feedback
             ai_feedback = self._generate_ai_feedback(phase, context)
@@ -492,9 +351,8 @@ class ObserverCoach:
                 self.phase_scores[phase].add_strength(ai_feedback["strength"])
             if ai_feedback["opportunity"]:
                 self.phase_scores[phase].add_missed_opportunity(ai_feedback["opportunity"])
-        
-        # Generate comprehensive feedback
-        self._generate_comprehensive_feedback(covered_phases, phase_transitions)
+            results[phase.value] = ai_feedback
+        return results
     
     def _generate_comprehensive_feedback(self, covered_phases: set, phase_transitions: List[Dict]):
         """Generates comprehensive feedback based on the conversation analysis."""
@@ -606,4 +464,56 @@ class ObserverCoach:
             return self.comprehensive_summary
             
         # Otherwise, return the basic analysis
-        return self.analyze_conversation() 
\ No newline at end of file
+        return self.analyze_conversation() 
+    
+    def to_state(self) -> Dict:
+        """Returns the evaluator's accumulated state as plain data, for session stores."""
+        state = {
+            "conversation_history": [
+                message.to_dict(("user", "customer", "timestamp", "phase"))
+                for message in self.conversation_history
+            ],
+            "score": self.score,
+            "feedback_points": self.feedback_points,
+            "phase_manager": self.phase_manager.to_state(),
+            "phase_scores": {
+                phase.value: {
+                    "score": phase_score.score,
+                    "feedback": phase_score.feedback,
+                    "suggestions": phase_score.suggestions,
+                    "strengths": phase_score.strengths,
+                    "missed_opportunities": phase_score.missed_opportunities
+                }
+                for phase, phase_score in self.phase_scores.items()
+            },
+            "pain_points": self.pain_points,
+            "objections": self.objections,
+            "blockers": self.blockers,
+            "has_evaluated_closing": self.has_evaluated_closing,
+            "alerts": self.alerts
+        }
+        if hasattr(self, 'comprehensive_summary'):
+            state["comprehensive_summary"] = self.comprehensive_summary
+        return state
+    
+    def load_state(self, state: Dict):
+        """Restores the accumulated state saved by to_state."""
+        self.conversation_history = [Turn.from_dict(message) for message in state.get("conversation_history", [])]
+        self._rubric = None
+        self.score = state.get("score", 0)
+        self.feedback_points = list(state.get("feedback_points", []))
+        self.phase_manager.load_state(state["phase_manager"])
+        for phase_value, saved in state.get("phase_scores", {}).items():
+            phase_score = self.phase_scores[ConversationPhase(phase_value)]
+            phase_score.score = saved["score"]
+            phase_score.feedback = list(saved["feedback"])
+            phase_score.suggestions = list(saved["suggestions"])
+            phase_score.strengths = list(saved["strengths"])
+            phase_score.missed_opportunities = list(saved["missed_opportunities"])
+        self.pain_points = list(state.get("pain_points", []))
+        self.objections = list(state.get("objections", []))
+        self.blockers = list(state.get("blockers", []))
+        self.has_evaluated_closing = state.get("has_evaluated_closing", False)
+        self.alerts = list(state.get("alerts", []))
+        if "comprehensive_summary" in state:
+            self.comprehensive_summary = state["comprehensive_summary"]
@@ -0,0 +1,187 @@
+import re
+from typing import List
+
+# Longest response a customer would realistically type in a chat
+MAX_RESPONSE_LENGTH = 500
+MAX_SENTENCES = 3
+
+# Formal phrases and their conversational replacement ("" removes the phrase)
+FORMAL_PHRASES = {
+    "I would like to inquire": "I wanted to ask",
+    "I am writing to": "I wanted to",
+    "I hereby": "I",
+    "thus": "so",
+    "furthermore": "also",
+    "nevertheless": "still",
+    "I am pleased to inform you": "just so you know,",
+    "per our conversation": "like we talked about",
+    "kindly assist": "can you help"
+}
+
+# Phrases that give away an AI writer and their replacement ("" removes the phrase)
+AI_PATTERNS = {
+    "As an AI": "",
+    "I'm happy to help": "",
+    "I don't have personal": "I don't really have",
+    "I don't have access to": "I can't see",
+    "As requested": "",
+    "I'd be happy to assist": "",
+    "Thank you for providing": "Thanks for",
+    "I appreciate your patience": ""
+}
+
+CONTRACTIONS = {
+    "I am": "I'm",
+    "I will": "I'll",
+    "I would": "I'd",
+    "we are": "we're",
+    "they are": "they're",
+    "you are": "you're",
+    "it is": "it's",
+    "that is": "that's",
+    "we will": "we'll",
+    "do not": "don't",
+    "does not": "doesn't",
+    "did not": "didn't",
+    "is not": "isn't",
+    "are not": "aren't",
+    "cannot": "can't",
+    "can not": "can't",
+    "will not": "won't",
+    "would not": "wouldn't",
+    "should not": "shouldn't",
+    "have not": "haven't"
+}
+
+
+# Abbreviations whose period does not end a sentence
+ABBREVIATIONS = ("Mr", "Mrs", "Ms", "Dr", "Prof", "Sr", "Jr", "St", "Inc", "Ltd", "Co", "vs", "etc", "approx",
+                 "e.g", "i.e")
+
+
+def _phrase_pattern(phrases) -> re.Pattern:
+    """Compiles a case-insensitive, word-bounded alternation of the phrases, longest first."""
+    ordered = sorted(phrases, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(phrase) for phrase in ordered) + r")\b", re.IGNORECASE)
+
+
+FORMAL_PATTERN = _phrase_pattern(FORMAL_PHRASES)
+AI_PATTERN = _phrase_pattern(AI_PATTERNS)
+# A pronoun and its verb are only contracted inside a clause: "I know who they are."
+# and "Yes, I am." keep the full verb
+_CLAUSE_END = r"\s*(?:[.!?,;:]|$)"
+_PRONOUN_FORMS = [phrase for phrase, contraction in CONTRACTIONS.items() if not contraction.endswith("n't")]
+CONTRACTION_PATTERN = re.compile(
+    _phrase_pattern([phrase for phrase in CONTRACTIONS if phrase not in _PRONOUN_FORMS]).pattern
+    + "|" + _phrase_pattern(_PRONOUN_FORMS).pattern + f"(?!{_CLAUSE_END})",
+    re.IGNORECASE
+)
+STRANDED_CONTRACTION_PATTERN = re.compile(
+    _phrase_pattern([CONTRACTIONS[phrase] for phrase in _PRONOUN_FORMS]).pattern + f"(?={_CLAUSE_END})", re.IGNORECASE
+)
+# A removed phrase takes its trailing punctuation with it or, when it opens a clause
+# ("I'd be happy to assist you with this!"), the rest of that clause
+REMOVAL_PATTERN = re.compile(
+    _phrase_pattern(
+        [phrase for phrase, replacement in {**FORMAL_PHRASES, **AI_PATTERNS}.items() if not replacement]
+    ).pattern + r"(?:\s*[,:;.!?]+|[^,:;.!?]*[,:;.!?]*)",
+    re.IGNORECASE
+)
+# Fixed-width lookbehinds, one per abbreviation, so "Mr. Smith" stays one sentence
+_SENTENCE_SPLIT = re.compile(
+    "".join(rf"(?<!\b{re.escape(abbreviation)}\.)" for abbreviation in ABBREVIATIONS) + r"(?<=[.!?])\s+"
+)
+_ABBREVIATION_END = re.compile(r"\b(" + "|".join(re.escape(abbreviation) for abbreviation in ABBREVIATIONS) + r")\.$")
+
+_FORMAL_LOOKUP = {phrase.lower(): replacement for phrase, replacement in FORMAL_PHRASES.items()}
+_AI_LOOKUP = {phrase.lower(): replacement for phrase, replacement in AI_PATTERNS.items()}
+_CONTRACTION_LOOKUP = {phrase.lower(): replacement for phrase, replacement in CONTRACTIONS.items()}
+
+
+def is_too_formal(response: str) -> bool:
+    """Checks if a response contains unnaturally formal phrases."""
+    return FORMAL_PATTERN.search(response) is not None
+
+
+def has_ai_patterns(response: str) -> bool:
+    """Checks if a response contains common AI response phrases."""
+    return AI_PATTERN.search(response) is not None
+
+
+def has_stranded_contraction(response: str) -> bool:
+    """Checks for a contraction ending a clause, like "I know who they're." """
+    return STRANDED_CONTRACTION_PATTERN.search(response) is not None
+
+
+def _match_case(original: str, replacement: str) -> str:
+    """Capitalizes the replacement when the replaced text was capitalized."""
+    if replacement and original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class LocalNaturalizer:
+    """Deterministic post-processor that makes customer responses sound human.
+
+    Replaces formal and AI-sounding phrases, inserts contractions and cuts long
+    responses at sentence boundaries, so most responses can be fixed without a
+    second LLM round-trip.
+    """
+
+    def __init__(self, max_length: int = MAX_RESPONSE_LENGTH, max_sentences: int = MAX_SENTENCES):
+        self.max_length = max_length
+        self.max_sentences = max_sentences
+
+    def naturalize(self, response: str) -> str:
+        """Returns the response with phrases replaced, contractions and truncation applied."""
+        text = REMOVAL_PATTERN.sub("", response)
+        text = FORMAL_PATTERN.sub(
+            lambda match: _match_case(match.group(), _FORMAL_LOOKUP[match.group().lower()]), text
+        )
+        text = AI_PATTERN.sub(
+            lambda match: _match_case(match.group(), _AI_LOOKUP[match.group().lower()]), text
+        )
+        text = CONTRACTION_PATTERN.sub(
+            lambda match: _match_case(match.group(), _CONTRACTION_LOOKUP[match.group().lower()]), text
+        )
+        text = self._tidy(text)
+        return self.truncate(text) if len(text) > self.max_length else text
+
+    def truncate(self, text: str) -> str:
+        """Keeps whole sentences up to max_sentences and max_length characters."""
+        sentences: List[str] = []
+        length = 0
+        for sentence in _SENTENCE_SPLIT.split(text):
+            if len(sentences) >= self.max_sentences:
+                break
+            if sentences and length + len(sentence) + 1 > self.max_length:
+                break
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return " ".join(sentences)
+
+    def passes_checks(self, response: str) -> bool:
+        """Checks the same conditions that would trigger an LLM rewrite."""
+        return (
+            bool(response)
+            and len(response) <= self.max_length
+            and not is_too_formal(response)
+            and not has_ai_patterns(response)
+            and not has_stranded_contraction(response)
+            and not self.is_fragment(response)
+        )
+
+    def is_fragment(self, response: str) -> bool:
+        """Checks for text a removal or a cut can leave behind: a lowercase start or a trailing abbreviation."""
+        return response[:1].islower() or _ABBREVIATION_END.search(response) is not None
+
+    def _tidy(self, text: str) -> str:
+        """Cleans up punctuation and capitalization left behind by removed phrases."""
+        text = re.sub(r"\s+([,.!?])", r"\1", text)
+        text = re.sub(r"([.!?])[,.]+", r"\1", text)
+        text = re.sub(r"^[\s,.!]+", "", text)
+        text = re.sub(r"([.!?]\s+)[,\s]+", r"\1", text)
+        text = re.sub(r"\s{2,}", " ", text).strip()
+        # Sentences that lost their first words start with a lowercase letter
+        text = re.sub(r"(^|[.!?]\s+)([a-z])", lambda match: match.group(1) + match.group(2).upper(), text)
+        return text
@@ -0,0 +1,256 @@
+import os
+import random
+import uuid
+from collections import deque
+from typing import Dict, Optional
+
+from frontend.display import print_colored
+from agents.customer import CustomerAgent
+from agents.evaluator import ObserverCoach
+from agents.scenario_pool import OPENING_LINE_LLM, PreparedScenario
+from agents.turns import RECENT_TURNS, Turn, turns_from_messages
+from llm.azure import AzureConnection
+from llm.client import ChatClient
+from llm.usage import UsageMeter
+from monitoring.metrics import stage_timer
+from storage.catalog import get_catalog
+from storage.snapshots import decode_snapshot, encode_snapshot
+from storage.transcript_store import get_transcript_store
+from profiles import CUSTOMER_PROFILES, PRODUCT_INFO
+
+# Scenario seeds are drawn from [0, 2**SEED_BITS)
+SEED_BITS = 32
+
+
+class RoleplaySystem:
+    """Main system that manages the roleplay scenario."""
+    
+    def __init__(self, azure: AzureConnection = None):
+        self.scenario = None
+        self.scenario_info = None
+        self.customer_agent = None
+        self.observer = None
+        self.conversation_history = []
+        # Red flags raised by the last processed message
+        self.alerts = []
+        # Sessions restored from a session store share an initialized connection
+        self.azure = azure or AzureConnection()
+        self.session_id = None
+        self.usage_meter = None
+        # Optional per-session token budget (0 or unset means unlimited)
+        self.token_budget = int(os.environ.get("SESSION_TOKEN_BUDGET", "0"))
+        # Append-only store of turns, phase transitions and scorecards (None if disabled)
+        self.store = get_transcript_store()
+        self.persisted_transitions = 0
+    
+    def initialize(self) -> bool:
+        """Initialize the roleplay system."""
+        return self.azure.initialize()
+    
+    def prepare_scenario(self, seed: Optional[int] = None, scenario: Optional[Dict] = None,
+                         customer_profile: Optional[Dict] = None) -> PreparedScenario:
+        """Draw a scenario and customer profile and build its agents, without starting the session.
+        
+        The draw only depends on the seed (a new one if not given), so the same
+        seed gives the same scenario and profile. scenario and customer_profile
+        replace the drawn ones, e.g. to replay a recorded session.
+        """
+        if seed is None:
+            seed = random.getrandbits(SEED_BITS)
+        rng = random.Random(seed)
+        
+        # Choose a random scenario from the cached catalog
+        catalog = get_catalog().get()
+        drawn_scenario = rng.choice(catalog.scenarios)
+        
+        # Choose random customer attributes
+        drawn_profile = {
+            "personality": rng.choice(list(CUSTOMER_PROFILES["personalities"].keys())),
+            "tech_level": rng.choice(list(CUSTOMER_PROFILES["tech_levels"].keys())),
+            "role": rng.choice(list(CUSTOMER_PROFILES["roles"].keys())),
+            "industry": rng.choice(list(CUSTOMER_PROFILES["industries"].keys())),
+            "company_size": rng.choice(list(CUSTOMER_PROFILES["company_size"].keys()))
+        }
+        scenario = scenario or drawn_scenario
+        customer_profile = customer_profile or drawn_profile
+        
+        # The session gets its own token meter
+        session_id = uuid.uuid4().hex
+        usage_meter = UsageMeter(session_id, token_budget=self.token_budget)
+        
+        # Create customer agent with a metered Azure client
+        customer_agent = CustomerAgent(**customer_profile, azure_client=self._metered_client(usage_meter))
+        
+        # Format initial query with product name
+        initial_query = scenario["initial_query"].format(product_name=PRODUCT_INFO["name"])
+        if OPENING_LINE_LLM:
+            initial_query = customer_agent.generate_opening_line(initial_query)
+        
+        return PreparedScenario(
+            session_id, scenario, customer_profile, initial_query, usage_meter,
+            customer_agent, ObserverCoach(), catalog.version, seed
+        )
+    
+    def setup_scenario(self, prepared: Optional[PreparedScenario] = None, seed: Optional[int] = None):
+        """Set up a new roleplay scenario, from a prepared one or drawn with the given seed."""
+        # Keep the final scorecard of the previous session
+        self.end_session()
+        
+        prepared = prepared or self.prepare_scenario(seed)
+        self.scenario = prepared.scenario
+        self.session_id = prepared.session_id
+        self.usage_meter = prepared.usage_meter
+        self.customer_agent = prepared.customer_agent
+        self.observer = prepared.observer
+        
+        # Reset conversation history
+        self.conversation_history = []
+        self.persisted_transitions = 0
+        
+        customer_profile = prepared.customer_profile
+        if self.store:
+            self.store.record_session(self.session_id, self.scenario["title"], customer_profile, prepared.seed)
+        
+        self.scenario_info = {
+            "session_id": self.session_id,
+            "scenario": self.scenario["title"],
+            "description": self.scenario["description"],
+            "customer_profile": customer_profile,
+            "initial_query": prepared.initial_query,
+            "seed": prepared.seed
+        }
+        return self.scenario_info
+    
+    def process_user_message(self, message: str) -> str:
+        """Process user message and get customer response."""
+        self.alerts = []
+        if not self.customer_agent:
+            return "Error: No scenario has been set up. Please set up a scenario first."
+        
+        if self.usage_meter and self.usage_meter.is_over_budget():
+            return "This practice session has reached its token budget. Please start a new scenario."
+        
+        try:
+            with stage_timer("turn"):
+                # One record of the turn, shared by the customer, the observer and this history
+                turn = Turn(message)
+                
+                # Generate customer response
+                with stage_timer("customer_response", "customer"):
+                    customer_response = self.customer_agent.generate_response(message, turn)
+                turn.customer = customer_response
+                
+                # Add to conversation history
+                self.conversation_history.append(turn)
+                
+                # Update observer
+                with stage_timer("observer_update", "observer"):
+                    self.alerts = self.observer.add_interaction(message, customer_response, turn)
+                
+                # Queue the turn for the background writer
+                if self.store:
+                    self._persist_turn(message, customer_response)
+            
+            return customer_response
+            
+        except Exception as e:
+            print_colored(f"\nError generating customer response: {str(e)}", "red")
+            return "I apologize, but I encountered an error processing your message. Please try again."
+
+    def _persist_turn(self, message: str, customer_response: str):
+        """Queue the turn and any new phase transitions for persistence."""
+        phase_manager = self.customer_agent.phase_manager
+        self.store.record_turn(
+            self.session_id, len(self.conversation_history) - 1, message, customer_response,
+            phase_manager.get_current_phase().value
+        )
+        history = phase_manager.get_phase_history()
+        for transition in history[self.persisted_transitions:]:
+            self.store.record_phase_transition(
+                self.session_id, transition["from_phase"].value, transition["to_phase"].value,
+                transition.get("confidence")
+            )
+        self.persisted_transitions = len(history)
+
+    def end_session(self):
+        """Persist the final scorecard of the current session, if it has any turns."""
+        if not self.store or not self.session_id or not self.conversation_history:
+            return
+        try:
+            self.store.record_scorecard(self.session_id, self.observer.analyze_conversation())
+        except Exception as e:
+            print_colored(f"\nError saving the session scorecard: {str(e)}", "red")
+
+    def _metered_client(self, usage_meter: Optional[UsageMeter] = None) -> ChatClient:
+        """Azure client that records its usage on the session's meter."""
+        return ChatClient(self.azure.get_client(), usage_meter or self.usage_meter, self.azure.route_table)
+
+    def to_state(self) -> Dict:
+        """Return the whole session as plain data, for session stores."""
+        # Before the usage: it waits for the background summary, whose tokens go on the meter
+        customer_agent = self.customer_agent.to_state() if self.customer_agent else None
+        return {
+            "session_id": self.session_id,
+            "scenario": self.scenario,
+            "scenario_info": self.scenario_info,
+            "conversation_history": [turn.to_dict() for turn in self.conversation_history],
+            "usage": self.usage_meter.to_dict() if self.usage_meter else None,
+            "persisted_transitions": self.persisted_transitions,
+            "customer_agent": customer_agent,
+            "observer": self.observer.to_state() if self.observer else None
+        }
+
+    def load_state(self, state: Dict):
+        """Restore a session saved by to_state."""
+        self.session_id = state["session_id"]
+        self.scenario = state["scenario"]
+        self.scenario_info = state["scenario_info"]
+        self.conversation_history = turns_from_messages(state.get("conversation_history", []))
+        self.persisted_transitions = state.get("persisted_transitions", 0)
+        if state.get("usage"):
+            self.usage_meter = UsageMeter.from_dict(state["usage"])
+        else:
+            self.usage_meter = UsageMeter(self.session_id, token_budget=self.token_budget)
+        self.customer_agent = None
+        if state.get("customer_agent"):
+            self.customer_agent = CustomerAgent.from_state(state["customer_agent"], self._metered_client())
+        self.observer = ObserverCoach()
+        if state.get("observer"):
+            self.observer.load_state(state["observer"])
+        self._share_turns()
+
+    def _share_turns(self):
+        """Make the restored histories reference the same turn records again."""
+        observed = self.observer.conversation_history
+        if len(observed) == len(self.conversation_history) and all(
+            mine.user == theirs.user for mine, theirs in zip(self.conversation_history, observed)
+        ):
+            # The observer's records also carry the phase and timestamp
+            self.conversation_history = list(observed)
+        if self.customer_agent:
+            by_text = {(turn.user, turn.customer): turn for turn in self.conversation_history}
+            self.customer_agent.conversation_history = deque(
+                (by_text.get((turn.user, turn.customer), turn) for turn in self.customer_agent.conversation_history),
+                maxlen=RECENT_TURNS
+            )
+
+    def snapshot(self) -> bytes:
+        """Return the whole session as a versioned binary snapshot."""
+        return encode_snapshot(self.to_state())
+
+    @classmethod
+    def from_snapshot(cls, data: bytes, azure: AzureConnection = None) -> "RoleplaySystem":
+        """Restore a session from a snapshot made by snapshot()."""
+        system = cls(azure=azure)
+        system.load_state(decode_snapshot(data))
+        return system
+
+    def get_usage(self) -> Dict:
+        """Return the token usage of the current session."""
+        if not self.usage_meter:
+            return {}
+        return self.usage_meter.to_dict()
+
+    def get_product_info(self) -> Dict:
+        """Return product information."""
+        return PRODUCT_INFO
@@ -0,0 +1,526 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agents.conversation_phase import ConversationPhase
+
+# Optional JSON rubric replacing DEFAULT_RUBRIC; it is reloaded when the file changes
+RUBRIC_PATH = os.environ.get("RUBRIC_PATH", "")
+# Seconds between checks of the rubric file's modification time
+RUBRIC_CHECK_INTERVAL = float(os.environ.get("RUBRIC_CHECK_INTERVAL", "2"))
+
+# Keyword indicators of the rubric; the concern categories are matched on customer
+# messages only, the others on both sides of every interaction
+INDICATORS = {
+    "pain_point": [
+        "struggle", "difficult", "challenge", "problem", "issue",
+        "frustrated", "pain", "hassle", "complicated", "time-consuming"
+    ],
+    "objection": [
+        "expensive", "cost", "price", "budget", "concerned",
+        "worried", "hesitant", "not sure", "doubt", "risk"
+    ],
+    "blocker": [
+        "can't", "unable", "impossible", "blocked", "restricted",
+        "limitation", "constraint", "barrier", "obstacle", "hurdle"
+    ],
+    "goal": ["goal", "objective", "target", "aim", "want to achieve"],
+    "needs": ["need", "requirement", "looking for", "seeking", "want"],
+    "value": ["benefit", "value", "roi", "improve", "enhance", "increase"],
+    "impact": ["impact", "result", "outcome", "improvement", "change"],
+    "roi": ["roi", "return on investment", "cost savings", "efficiency"],
+    "empathy": ["understand", "appreciate", "recognize", "hear", "feel"],
+    "resolution": ["solution", "address", "resolve", "overcome", "handle"],
+    "next_step": ["next step", "follow up", "schedule", "plan", "arrange"],
+    "metric": ["measure", "track", "monitor", "evaluate", "assess"],
+    "expansion": ["expand", "grow", "scale", "additional", "more"],
+    "support": ["support", "help", "assist", "guide", "resource"],
+    # Red flags, looked for in the representative's messages as whole words
+    "overpromise": ["i guarantee", "we guarantee", "guaranteed results", "100% guaranteed", "100% sure",
+                    "never fails", "always works", "zero risk", "risk-free", "no risk at all"],
+    "dismissive": ["not a real problem", "that doesn't matter", "that's wrong", "you're wrong", "that's not true",
+                   "calm down", "just trust me", "whatever you say", "that's stupid"],
+    "pressure": ["sign today", "sign now", "act now", "decide now", "last chance", "today only",
+                 "offer expires", "before it's too late", "right now or"]
+}
+
+ASPECT_TYPES = ("critical", "optional", "red_flag")
+SCOPES = ("both", "user", "customer")
+# Signal set for every turn classified in a phase, e.g. "phase:closing"
+PHASE_SIGNAL = "phase:{}"
+# Wraps a pattern of a "whole_words" signal so it only matches whole words
+WHOLE_WORDS = r"(?<!\w)(?:{})(?!\w)"
+# Scoring outcomes kept per compiled rubric, by conversation signal bits
+OUTCOME_CACHE_SIZE = 4096
+
+# The ObserverCoach rubric. An aspect holds when its patterns are found (on the
+# side of the conversation given by scope) and every signal it requires is set;
+# aspects with a "when" list are skipped unless those signals are set. Signals
+# are the top-level "signals", the aspects that have patterns, and the phases.
+# Patterns match anywhere in a message, or only as whole words with
+# "whole_words". Red flags raise alerts; they only cost points in the phase
+# when the aspect sets a weight.
+DEFAULT_RUBRIC = {
+    "signals": {
+        "blockers": {"scope": "customer", "patterns": INDICATORS["blocker"]}
+    },
+    "aspects": [
+        {
+            "id": "pain_points", "phase": "introduction_discovery", "type": "critical", "weight": 5,
+            "scope": "customer", "patterns": INDICATORS["pain_point"],
+            "strength": "Successfully identified customer pain points",
+            "feedback": "Could have done more to uncover customer pain points",
+            "suggestion": "Ask more probing questions about current challenges"
+        },
+        {
+            "id": "goals", "phase": "introduction_discovery", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["goal"],
+            "strength": "Effectively identified customer goals",
+            "feedback": "Could have better understood customer objectives",
+            "suggestion": "Ask about specific business goals and desired outcomes"
+        },
+        {
+            "id": "needs", "phase": "introduction_discovery", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["needs"],
+            "strength": "Good understanding of customer needs",
+            "feedback": "Could have better explored customer needs",
+            "suggestion": "Ask more questions about specific requirements"
+        },
+        {
+            "id": "industry_context", "phase": "introduction_discovery", "type": "optional", "weight": 5,
+            "requires": ["phase:introduction_discovery"],
+            "strength": "Maintained focus on industry-specific context",
+            "missed_opportunity": "Could have explored industry-specific challenges"
+        },
+        {
+            "id": "value", "phase": "value_proposition", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["value"],
+            "strength": "Clear communication of value proposition",
+            "feedback": "Could have better articulated product value",
+            "suggestion": "Focus more on specific benefits and ROI"
+        },
+        {
+            "id": "value_alignment", "phase": "value_proposition", "type": "optional", "weight": 5,
+            "requires": ["pain_points", "value"],
+            "strength": "Effectively aligned value with pain points",
+            "missed_opportunity": "Could have better connected value to customer pain points"
+        },
+        {
+            "id": "impact", "phase": "value_proposition", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["impact"],
+            "strength": "Strong focus on business impact",
+            "feedback": "Could have better emphasized business impact",
+            "suggestion": "Include more specific examples of business outcomes"
+        },
+        {
+            "id": "roi", "phase": "value_proposition", "type": "optional", "weight": 5,
+            "patterns": INDICATORS["roi"],
+            "strength": "Effective ROI discussion",
+            "missed_opportunity": "Could have included more ROI analysis"
+        },
+        {
+            "id": "objections", "phase": "objection_handling", "type": "optional", "weight": 5,
+            "scope": "customer", "patterns": INDICATORS["objection"],
+            "strength": "Identified and acknowledged customer objections",
+            "missed_opportunity": "Could have proactively addressed potential objections"
+        },
+        {
+            "id": "empathy", "phase": "objection_handling", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["empathy"],
+            "strength": "Demonstrated empathy in responses",
+            "feedback": "Could have shown more empathy in responses",
+            "suggestion": "Acknowledge concerns before addressing them"
+        },
+        {
+            "id": "value_connection", "phase": "objection_handling", "type": "critical", "weight": 5,
+            "requires": ["empathy", "phase:value_proposition"],
+            "strength": "Connected objections to value proposition",
+            "feedback": "Could have better connected responses to value",
+            "suggestion": "Link solutions to customer value"
+        },
+        {
+            "id": "blocker_resolution", "phase": "objection_handling", "type": "critical", "weight": 5,
+            "when": ["blockers"], "patterns": INDICATORS["resolution"],
+            "strength": "Effectively addressed blockers",
+            "feedback": "Could have better addressed blockers",
+            "suggestion": "Provide specific solutions for identified blockers"
+        },
+        {
+            "id": "next_steps", "phase": "closing", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["next_step"],
+            "strength": "Clear next steps established",
+            "feedback": "Could have established clearer next steps",
+            "suggestion": "Outline specific follow-up actions"
+        },
+        {
+            "id": "metrics", "phase": "closing", "type": "optional", "weight": 5,
+            "patterns": INDICATORS["metric"],
+            "strength": "Discussed success metrics",
+            "missed_opportunity": "Could have discussed success metrics"
+        },
+        {
+            "id": "expansion", "phase": "closing", "type": "optional", "weight": 5,
+            "patterns": INDICATORS["expansion"],
+            "strength": "Identified expansion opportunities",
+            "missed_opportunity": "Could have discussed expansion opportunities"
+        },
+        {
+            "id": "support", "phase": "closing", "type": "critical", "weight": 5,
+            "patterns": INDICATORS["support"],
+            "strength": "Addressed support and resources",
+            "feedback": "Could have discussed support options",
+            "suggestion": "Outline available support and resources"
+        },
+        {
+            "id": "overpromising", "phase": "value_proposition", "type": "red_flag",
+            "scope": "user", "whole_words": True, "patterns": INDICATORS["overpromise"],
+            "feedback": "Made claims that cannot be supported",
+            "suggestion": "Back claims with specific, verifiable examples"
+        },
+        {
+            "id": "dismissiveness", "phase": "objection_handling", "type": "red_flag",
+            "scope": "user", "whole_words": True, "patterns": INDICATORS["dismissive"],
+            "feedback": "Dismissed or argued with the customer's concerns",
+            "suggestion": "Acknowledge the concern and ask what is behind it"
+        },
+        {
+            "id": "pressure", "phase": "closing", "type": "red_flag",
+            "scope": "user", "whole_words": True, "patterns": INDICATORS["pressure"],
+            "feedback": "Pressured the customer into a decision",
+            "suggestion": "Agree on next steps the customer is comfortable with"
+        }
+    ]
+}
+
+
+class RubricError(ValueError):
+    """Raised when a rubric definition is invalid."""
+
+
+class CompiledAspect:
+    """One row of the scoring table: bit masks, weight and feedback texts."""
+
+    __slots__ = ("id", "phase", "type", "weight", "bit", "mask", "when_mask", "strength", "feedback", "suggestion",
+                 "missed_opportunity")
+
+    def __init__(self, aspect: Dict, bit: int, mask: int, when_mask: int):
+        self.id = aspect["id"]
+        self.phase = ConversationPhase(aspect["phase"])
+        self.type = aspect["type"]
+        # Bit of the aspect's own patterns, 0 when it only requires other signals
+        self.bit = bit
+        # Red flags only raise alerts unless the rubric gives them a weight
+        self.weight = aspect.get("weight", 0 if self.type == "red_flag" else 5)
+        self.mask = mask
+        self.when_mask = when_mask
+        self.strength = aspect.get("strength")
+        self.feedback = aspect.get("feedback")
+        self.suggestion = aspect.get("suggestion")
+        self.missed_opportunity = aspect.get("missed_opportunity")
+
+
+class PhaseOutcome:
+    """What the aspects of one phase add to its PLGPhaseScore for a set of signals."""
+
+    __slots__ = ("points", "penalized", "strengths", "feedback", "suggestions", "missed_opportunities")
+
+    def __init__(self):
+        self.points: List[int] = []
+        self.penalized = False
+        self.strengths: List[str] = []
+        self.feedback: List[str] = []
+        self.suggestions: List[str] = []
+        self.missed_opportunities: List[str] = []
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex of a prefix tree of words; at any position it matches the longest word."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word may end here: the rest is optional, and tried first, so the longest word wins
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class Rubric:
+    """A rubric compiled into one pattern matcher and a per-phase scoring table.
+
+    Every signal is a bit. All patterns of all signals form a single prefix-tree
+    regex, which finds the longest pattern starting at each position of a
+    message; each pattern carries the bits of every pattern it contains, so one
+    scan gives all the signals of a message, at a cost that grows with the
+    message length rather than with the number of patterns. What the aspects add
+    to each phase only depends on the signals of the conversation, so it is
+    computed once per distinct set of signals and reused.
+    """
+
+    def __init__(self, definition: Dict):
+        self.definition = definition
+        self.version = hashlib.sha1(json.dumps(definition, sort_keys=True).encode()).hexdigest()[:12]
+
+        aspects = definition.get("aspects", [])
+        signal_patterns: Dict[str, Tuple[str, bool, List[str]]] = {}
+        for name, signal in definition.get("signals", {}).items():
+            signal_patterns[name] = (signal.get("scope", "both"), bool(signal.get("whole_words")), signal["patterns"])
+        ids = set()
+        for aspect in aspects:
+            self._validate(aspect, ids)
+            ids.add(aspect["id"])
+            if aspect.get("patterns"):
+                signal_patterns[aspect["id"]] = (
+                    aspect.get("scope", "both"), bool(aspect.get("whole_words")), aspect["patterns"]
+                )
+
+        self.bits: Dict[str, int] = {}
+        for phase in ConversationPhase:
+            self.bits[PHASE_SIGNAL.format(phase.value)] = 1 << len(self.bits)
+        for name in signal_patterns:
+            self.bits[name] = 1 << len(self.bits)
+
+        # Bits set by each pattern on the representative's and on the customer's
+        # side, for the patterns matched anywhere and for the whole-word ones
+        user_bits: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        customer_bits: Tuple[Dict[str, int], Dict[str, int]] = ({}, {})
+        for name, (scope, whole_words, patterns) in signal_patterns.items():
+            if scope not in SCOPES:
+                raise RubricError(f"Unknown scope {scope!r} of signal {name!r}")
+            for pattern in patterns:
+                pattern = pattern.lower()
+                if not pattern:
+                    continue
+                user_bits[whole_words].setdefault(pattern, 0)
+                customer_bits[whole_words].setdefault(pattern, 0)
+                if scope in ("both", "user"):
+                    user_bits[whole_words][pattern] |= self.bits[name]
+                if scope in ("both", "customer"):
+                    customer_bits[whole_words][pattern] |= self.bits[name]
+        # Bits of each pattern on its own, for matchers that test every pattern
+        self.pattern_bits = {
+            pattern: (bits, customer_bits[False][pattern]) for pattern, bits in user_bits[False].items()
+        }
+        self.word_pattern_bits = {
+            pattern: (bits, customer_bits[True][pattern]) for pattern, bits in user_bits[True].items()
+        }
+        # One (matcher, representative bits, customer bits) per kind of pattern;
+        # the longest match at a position hides the shorter patterns it contains
+        self.matchers: List[Tuple[re.Pattern, Dict[str, int], Dict[str, int]]] = []
+        for whole_words in (False, True):
+            if not user_bits[whole_words]:
+                continue
+            contains = _contains_word if whole_words else _contains
+            kind_user: Dict[str, int] = {}
+            kind_customer: Dict[str, int] = {}
+            for pattern in user_bits[whole_words]:
+                contained = [other for other in user_bits[whole_words] if contains(pattern, other)]
+                kind_user[pattern] = _or(user_bits[whole_words][other] for other in contained)
+                kind_customer[pattern] = _or(customer_bits[whole_words][other] for other in contained)
+            regex = _trie_pattern(user_bits[whole_words])
+            matcher = re.compile(WHOLE_WORDS.format(regex) if whole_words else regex)
+            self.matchers.append((matcher, kind_user, kind_customer))
+
+        self.table: Dict[ConversationPhase, List[CompiledAspect]] = {phase: [] for phase in ConversationPhase}
+        for aspect in aspects:
+            requires = list(aspect.get("requires", []))
+            if aspect.get("patterns"):
+                requires.append(aspect["id"])
+            compiled = CompiledAspect(
+                aspect, self.bits[aspect["id"]] if aspect.get("patterns") else 0, self._mask(requires, aspect),
+                self._mask(aspect.get("when", []), aspect)
+            )
+            self.table[compiled.phase].append(compiled)
+        self.red_flags = [aspect for aspects in self.table.values() for aspect in aspects if aspect.type == "red_flag"]
+        self._outcomes: Dict[int, Dict[ConversationPhase, PhaseOutcome]] = {}
+
+    def _validate(self, aspect: Dict, ids: set):
+        name = aspect.get("id")
+        if not name or name in ids:
+            raise RubricError(f"Aspect ids must be unique and non-empty: {name!r}")
+        if aspect.get("type") not in ASPECT_TYPES:
+            raise RubricError(f"Aspect {name!r} has an unknown type {aspect.get('type')!r}")
+        try:
+            ConversationPhase(aspect.get("phase"))
+        except ValueError:
+            raise RubricError(f"Aspect {name!r} has an unknown phase {aspect.get('phase')!r}")
+        if not aspect.get("patterns") and not aspect.get("requires"):
+            raise RubricError(f"Aspect {name!r} needs patterns or required signals")
+
+    def _mask(self, names: List[str], aspect: Dict) -> int:
+        mask = 0
+        for name in names:
+            if name not in self.bits:
+                raise RubricError(f"Aspect {aspect['id']!r} refers to an unknown signal {name!r}")
+            mask |= self.bits[name]
+        return mask
+
+    def match(self, user_lower: str, customer_lower: str) -> int:
+        """Returns the signal bits of one turn, from its lowercased texts."""
+        bits = 0
+        for matcher, user_bits, customer_bits in self.matchers:
+            bits |= self._scan(matcher, user_lower, user_bits) | self._scan(matcher, customer_lower, customer_bits)
+        return bits
+
+    @staticmethod
+    def _scan(matcher: re.Pattern, text: str, pattern_bits: Dict[str, int]) -> int:
+        # Restarting one character after each match start finds the longest
+        # pattern at every position where one starts, like an overlapping scan,
+        # while the regex engine skips quickly over positions that start none
+        bits = 0
+        position = 0
+        search = matcher.search
+        while True:
+            found = search(text, position)
+            if found is None:
+                return bits
+            bits |= pattern_bits[found.group()]
+            position = found.start() + 1
+
+    def alerts(self, previous: int, signals: int, turn_signals: int) -> List[CompiledAspect]:
+        """Returns the red flags raised by a turn.
+
+        previous and signals are the conversation's signal bits before and
+        after the turn, turn_signals the bits of the turn itself. A red flag is
+        raised when it starts to hold, or when the turn repeats its patterns.
+        """
+        raised = []
+        for aspect in self.red_flags:
+            if signals & aspect.mask != aspect.mask or signals & aspect.when_mask != aspect.when_mask:
+                continue
+            held = previous & aspect.mask == aspect.mask and previous & aspect.when_mask == aspect.when_mask
+            if not held or turn_signals & aspect.bit:
+                raised.append(aspect)
+        return raised
+
+    def outcome(self, signals: int) -> Dict[ConversationPhase, PhaseOutcome]:
+        """Returns the outcome of every phase for the signal bits of a conversation."""
+        outcomes = self._outcomes.get(signals)
+        if outcomes is None:
+            if len(self._outcomes) >= OUTCOME_CACHE_SIZE:
+                self._outcomes.clear()
+            outcomes = self._outcomes[signals] = {
+                phase: self._evaluate(aspects, signals) for phase, aspects in self.table.items()
+            }
+        return outcomes
+
+    def _evaluate(self, aspects: List[CompiledAspect], signals: int) -> PhaseOutcome:
+        outcome = PhaseOutcome()
+        for aspect in aspects:
+            # Conditional aspects only apply once their signals were seen
+            if signals & aspect.when_mask != aspect.when_mask:
+                continue
+            found = signals & aspect.mask == aspect.mask
+            if aspect.type == "red_flag":
+                # Without a weight, red flags only raise alerts
+                if found and aspect.weight:
+                    outcome.points.append(-aspect.weight)
+                    outcome.penalized = True
+                    if aspect.feedback:
+                        outcome.feedback.append(aspect.feedback)
+                        _append(outcome.suggestions, aspect.suggestion)
+            elif found:
+                outcome.points.append(aspect.weight)
+                _append(outcome.strengths, aspect.strength)
+            elif aspect.type == "critical":
+                _append(outcome.feedback, aspect.feedback)
+                _append(outcome.suggestions, aspect.suggestion)
+            else:
+                _append(outcome.missed_opportunities, aspect.missed_opportunity)
+        return outcome
+
+    def phase_bit(self, phase: Optional[ConversationPhase]) -> int:
+        return self.bits[PHASE_SIGNAL.format(phase.value)] if phase else 0
+
+    def signal_names(self, bits: int) -> List[str]:
+        return [name for name, bit in self.bits.items() if bits & bit]
+
+
+def _append(texts: List[str], text: Optional[str]):
+    if text:
+        texts.append(text)
+
+
+def _contains(pattern: str, other: str) -> bool:
+    return other in pattern
+
+
+def _contains_word(pattern: str, other: str) -> bool:
+    """Whether other occurs as whole words in pattern."""
+    return re.search(WHOLE_WORDS.format(re.escape(other)), pattern) is not None
+
+
+def _or(values: Iterable[int]) -> int:
+    result = 0
+    for value in values:
+        result |= value
+    return result
+
+
+_rubric = Rubric(DEFAULT_RUBRIC)
+_rubric_mtime: Optional[float] = None
+_rubric_checked_at = 0.0
+_rubric_lock = threading.Lock()
+
+
+def get_rubric() -> Rubric:
+    """Returns the current rubric, reloading RUBRIC_PATH if the file changed."""
+    if RUBRIC_PATH and time.monotonic() - _rubric_checked_at >= RUBRIC_CHECK_INTERVAL:
+        _check_rubric_file()
+    return _rubric
+
+
+def set_rubric(definition: Dict) -> Rubric:
+    """Compiles a rubric definition and swaps it in for every later evaluation."""
+    global _rubric
+    rubric = Rubric(definition)
+    _rubric = rubric
+    return rubric
+
+
+def reload_rubric() -> Rubric:
+    """Reloads RUBRIC_PATH now (or restores DEFAULT_RUBRIC when it is not set)."""
+    global _rubric_mtime
+    if not RUBRIC_PATH:
+        return set_rubric(DEFAULT_RUBRIC)
+    with _rubric_lock:
+        _rubric_mtime = None
+    _check_rubric_file()
+    return _rubric
+
+
+def _check_rubric_file():
+    global _rubric_mtime, _rubric_checked_at
+    with _rubric_lock:
+        _rubric_checked_at = time.monotonic()
+        try:
+            mtime = os.path.getmtime(RUBRIC_PATH)
+        except OSError as e:
+            print(f"Error reading rubric {RUBRIC_PATH}: {e}")
+            return
+        if mtime == _rubric_mtime:
+            return
+        _rubric_mtime = mtime
+        try:
+            with open(RUBRIC_PATH) as f:
+                set_rubric(json.load(f))
+        except Exception as e:
+            # Keep evaluating with the previous rubric until the file changes again
+            print(f"Error loading rubric {RUBRIC_PATH}: {e}")
+
+
+if __name__ == "__main__":
+    # Starting point for a custom RUBRIC_PATH file
+    print(json.dumps(DEFAULT_RUBRIC, indent=2))
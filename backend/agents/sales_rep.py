@@ -0,0 +1,81 @@
+import re
+from typing import Dict, List
+
+from llm.client import ChatClient
+from profiles import PRODUCT_INFO
+
+# Which phase the representative should be working on, by share of the turns played
+PHASE_PLAN = [
+    (0.25, "INTRODUCTION_DISCOVERY", "Introduce yourself and ask open questions about the customer's goals, needs and challenges."),
+    (0.5, "VALUE_PROPOSITION", "Explain the benefits and ROI of the product that fit the pain points the customer mentioned."),
+    (0.8, "OBJECTION_HANDLING", "Acknowledge the customer's concerns with empathy and address them with concrete answers."),
+    (1.0, "CLOSING", "Summarize the value, agree on next steps (pilot, demo, follow up) and thank the customer.")
+]
+
+
+class SalesRepAgent:
+    """Agent that plays the Microsoft sales representative in headless self-play runs."""
+
+    def __init__(self, azure_client, scenario: Dict, max_turns: int = 8):
+        self.client = ChatClient.wrap(azure_client)
+        self.scenario = scenario
+        self.max_turns = max_turns
+        self.turn = 0
+        self.transcript: List[Dict] = []
+
+    def generate_message(self, customer_message: str) -> str:
+        """Generate the representative's next message in answer to the customer."""
+        if customer_message:
+            self.transcript.append({"speaker": "Customer", "content": customer_message})
+        self.turn += 1
+
+        try:
+            response = self.client.complete(
+                agent="sales_rep",
+                prompt_type="sales_rep_turn",
+                messages=[
+                    {"role": "system", "content": self._build_prompt()},
+                    {"role": "user", "content": "Write your next message to the customer."}
+                ],
+            )
+            message = response.choices[0].message.content
+            message = re.sub(r'^(Representative|Microsoft Representative|You)\s*:', '', message).strip().strip('"')
+        except Exception as e:
+            print(f"Error generating representative message: {e}")
+            message = "Thank you for your time. Let's schedule a follow up to discuss the next steps."
+
+        self.transcript.append({"speaker": "Microsoft Representative", "content": message})
+        return message
+
+    def current_goal(self):
+        """Returns the phase and goal planned for the current turn."""
+        progress = self.turn / self.max_turns
+        for limit, phase, goal in PHASE_PLAN:
+            if progress <= limit:
+                return phase, goal
+        return PHASE_PLAN[-1][1], PHASE_PLAN[-1][2]
+
+    def _build_prompt(self) -> str:
+        """Build the prompt for the representative's next message."""
+        phase, goal = self.current_goal()
+        history = "\n".join(f"{item['speaker']}: {item['content']}" for item in self.transcript[-8:])
+        return f"""
+You are a Microsoft sales representative practicing a conversation about {PRODUCT_INFO['name']}.
+
+# SCENARIO:
+{self.scenario['title']} - {self.scenario['description']}
+
+# KEY FEATURES:
+{', '.join(PRODUCT_INFO['key_features'])}
+
+# CONVERSATION SO FAR:
+{history}
+
+# CURRENT GOAL (Turn {self.turn} of {self.max_turns}, phase {phase}):
+{goal}
+
+# INSTRUCTIONS:
+1. Write only your next message, 1-3 sentences, without a prefix
+2. Respond to what the customer just said before moving the conversation forward
+3. Sound natural and professional
+"""
@@ -0,0 +1,86 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from monitoring.metrics import SCENARIO_POOL
+from storage.catalog import get_catalog
+
+# Scenarios kept prepared for new sessions; 0 prepares them on the request thread
+SCENARIO_POOL_SIZE = int(os.environ.get("SCENARIO_POOL_SIZE", "4"))
+# Personalize each scenario's opening line with the LLM while preparing it
+OPENING_LINE_LLM = os.environ.get("OPENING_LINE_LLM", "0") == "1"
+
+
+class PreparedScenario:
+    """A drawn scenario and customer profile with its agents, before its session starts."""
+
+    def __init__(self, session_id: str, scenario: Dict, customer_profile: Dict, initial_query: str,
+                 usage_meter, customer_agent, observer, catalog_version: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.session_id = session_id
+        self.scenario = scenario
+        self.customer_profile = customer_profile
+        self.initial_query = initial_query
+        self.usage_meter = usage_meter
+        self.customer_agent = customer_agent
+        self.observer = observer
+        self.catalog_version = catalog_version
+        # Seed the scenario and profile were drawn with
+        self.seed = seed
+
+
+class ScenarioPool:
+    """Background-refilled pool of prepared scenarios.
+
+    A worker thread keeps up to size scenarios prepared by factory, so starting
+    a session pops one instead of reading the catalog, building the agents and
+    possibly calling the LLM on the request thread. If the pool is empty or
+    disabled, the scenario is prepared by the caller. Scenarios prepared from
+    an older catalog version are dropped.
+    """
+
+    def __init__(self, factory: Callable[[], PreparedScenario], size: int = SCENARIO_POOL_SIZE):
+        self.factory = factory
+        self.size = size
+        self._ready: "queue.Queue[PreparedScenario]" = queue.Queue(maxsize=max(size, 1))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts the refill thread, if the pool is enabled and not started yet."""
+        with self._lock:
+            if self.size > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scenario-pool", daemon=True)
+                self._thread.start()
+
+    def pop(self) -> PreparedScenario:
+        """Returns a prepared scenario, from the pool when one is ready."""
+        self.start()
+        catalog_version = get_catalog().get().version
+        while True:
+            try:
+                prepared = self._ready.get_nowait()
+            except queue.Empty:
+                SCENARIO_POOL.inc("miss")
+                return self.factory()
+            if prepared.catalog_version == catalog_version:
+                SCENARIO_POOL.inc("hit")
+                return prepared
+            SCENARIO_POOL.inc("stale")
+
+    def ready(self) -> int:
+        """Number of scenarios currently prepared."""
+        return self._ready.qsize()
+
+    def _run(self):
+        while True:
+            try:
+                prepared = self.factory()
+            except Exception as e:
+                print(f"Error preparing a scenario for the pool: {e}")
+                time.sleep(1)
+                continue
+            # Blocks while the pool is full
+            self._ready.put(prepared)
@@ -0,0 +1,92 @@
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from agents.conversation_phase import ConversationPhase
+
+# Turns kept by the histories that only read a recent window of the conversation
+RECENT_TURNS = 20
+
+
+class Turn:
+    """One exchange between the representative and the customer.
+
+    A single record is shared by every history of a session (RoleplaySystem,
+    CustomerAgent and ObserverCoach), which only hold references to it. The
+    phase is a ConversationPhase member, and the lowercased texts used by the
+    keyword rubric are computed once, on first use.
+    """
+
+    __slots__ = ("user", "_customer", "phase", "timestamp", "_user_lower", "_customer_lower")
+
+    def __init__(self, user: str, customer: Optional[str] = None,
+                 phase: Optional[ConversationPhase] = None, timestamp: Optional[float] = None):
+        self.user = user
+        self._customer = customer
+        self.phase = phase
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self._user_lower = None
+        self._customer_lower = None
+
+    @property
+    def customer(self) -> Optional[str]:
+        return self._customer
+
+    @customer.setter
+    def customer(self, value: Optional[str]):
+        self._customer = value
+        self._customer_lower = None
+
+    @property
+    def user_lower(self) -> str:
+        if self._user_lower is None:
+            self._user_lower = self.user.lower()
+        return self._user_lower
+
+    @property
+    def customer_lower(self) -> str:
+        if self._customer_lower is None:
+            self._customer_lower = (self._customer or "").lower()
+        return self._customer_lower
+
+    # Read access by key, for code written against the former dict entries
+    def __getitem__(self, key: str):
+        if key not in ("user", "customer", "phase", "timestamp"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def to_dict(self, fields: Sequence[str] = ("user", "customer")) -> Dict:
+        """Returns the given fields as plain data, with the phase as its value."""
+        data = {}
+        for field in fields:
+            value = getattr(self, field)
+            data[field] = value.value if isinstance(value, ConversationPhase) else value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Turn":
+        """Recreates a turn saved by to_dict."""
+        phase = data.get("phase")
+        return cls(
+            data.get("user", ""), data.get("customer"),
+            ConversationPhase(phase) if phase else None, data.get("timestamp")
+        )
+
+
+def turns_from_messages(messages: Iterable[Dict]) -> List[Turn]:
+    """Rebuilds turns from {"user", "customer"} entries or chat {"role", "content"} messages."""
+    turns: List[Turn] = []
+    for message in messages:
+        if "role" not in message:
+            turns.append(Turn.from_dict(message))
+        elif message["role"] == "user":
+            turns.append(Turn(message["content"]))
+        elif turns:
+            turns[-1].customer = message["content"]
+    return turns
@@ -0,0 +1,62 @@
+# Scripted trainee (sales representative) conversations used by the benchmarks.
+# Each one walks through the four phases and ends with a closing message.
+SCRIPTED_CONVERSATIONS = [
+    [
+        "Hi, thanks for reaching out! I'm Alex from Microsoft. Could you tell me a bit about your team and your goals?",
+        "What are the main challenges your team struggles with day to day?",
+        "Copilot can summarize Teams meetings and draft follow-up emails, which saves a lot of time for most teams.",
+        "Many customers see a clear ROI within a few months because people spend less time on repetitive work.",
+        "I understand the concern about cost. Let's look at how much time each user could save per week.",
+        "On security, Copilot respects your existing Microsoft 365 permissions and compliance policies.",
+        "Would a small pilot with one department help you measure the impact?",
+        "Great, I'll schedule a follow up next week to plan the next steps. Thank you for your time!"
+    ],
+    [
+        "Hello! Before we dive in, what made you interested in Copilot?",
+        "How are you handling reporting in Excel today?",
+        "Copilot can analyze your Excel data with natural language questions, which improves productivity for analysts.",
+        "I hear you, the price is a concern. The value shows up in hours saved across the team.",
+        "Your data stays within your tenant and is covered by the same compliance commitments as Microsoft 365.",
+        "We also have adoption resources and training to help your users get value quickly.",
+        "Let's schedule a demo with your IT admin as the next step. Talk soon!"
+    ],
+    [
+        "Hi there, I'm Sam. What does a typical week look like for your team?",
+        "Which tasks take the most time and cause the most frustration?",
+        "A key benefit of Copilot is drafting documents in Word from your existing notes.",
+        "I understand you're worried about user adoption. We can track usage and measure results together.",
+        "Licensing requires a Microsoft 365 E3 or E5 plan; I can help you check your current subscription.",
+        "Shall we set up a follow up call to plan the rollout? Thank you for your time."
+    ]
+]
+
+# Building blocks for templated conversations: one message is drawn per phase
+TEMPLATED_PHASES = [
+    [
+        "Hi, I'm {name} from Microsoft. What are your main goals for this year?",
+        "Hello! Thanks for your time. Can you tell me how your team works today?",
+        "Hi {name} here. What challenges is your {team} team struggling with?"
+    ],
+    [
+        "Copilot can {feature}, which saves your {team} team several hours a week.",
+        "One benefit our customers value is how Copilot helps to {feature}.",
+        "The ROI usually comes from letting people {feature} in minutes instead of hours."
+    ],
+    [
+        "I understand the concern about {concern}. Here is how we address it.",
+        "That's a fair point on {concern}; many customers felt the same before the pilot.",
+        "I hear you on {concern}. We can measure the impact together during a trial."
+    ],
+    [
+        "Let's schedule a follow up next week to plan the next steps. Thank you for your time!",
+        "I'll send a summary and we can arrange a demo as the next step. Talk soon!",
+        "Shall we plan a pilot as a next step? Thank you for your time."
+    ]
+]
+
+TEMPLATE_VALUES = {
+    "name": ["Alex", "Sam", "Jordan", "Taylor"],
+    "team": ["sales", "finance", "HR", "IT"],
+    "feature": ["summarize Teams meetings", "draft emails in Outlook", "analyze Excel reports", "create PowerPoint decks"],
+    "concern": ["pricing", "data security", "compliance", "user adoption"]
+}
@@ -0,0 +1,244 @@
+"""Synthetic trainee load generator for concurrent-session stress tests.
+
+Starts virtual trainees at a configurable arrival rate. Each one creates a
+session with /api/sessions, replays a scripted or templated conversation through
+/api/chat and fetches /api/feedback. The tool reports the latency distribution
+per endpoint, the error rate and the server memory growth.
+
+By default it spawns a local uvicorn server with the fake LLM backend and no
+transcript store, so the whole run is offline. Usage (from the backend directory):
+    python -m benchmarks.load --trainees 50 --rate 5 --think-ms 200
+    python -m benchmarks.load --url http://localhost:8000 --server-pid 1234
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.conversations import SCRIPTED_CONVERSATIONS, TEMPLATE_VALUES, TEMPLATED_PHASES
+from utils.stats import summarize_latencies
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def templated_conversation(rng: random.Random, turns_per_phase: int = 1) -> List[str]:
+    """Builds a conversation that walks through every phase from the templates."""
+    messages = []
+    for templates in TEMPLATED_PHASES:
+        for _ in range(turns_per_phase):
+            values = {key: rng.choice(options) for key, options in TEMPLATE_VALUES.items()}
+            messages.append(rng.choice(templates).format(**values))
+    return messages
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    """Returns the resident memory of a process in KB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class LoadStats:
+    """Collects request latencies and errors per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.error_samples: List[str] = []
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            response.raise_for_status()
+            return response
+        except Exception as e:
+            self.errors[endpoint] += 1
+            if len(self.error_samples) < 20:
+                self.error_samples.append(f"{endpoint}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+
+    def to_dict(self) -> Dict:
+        endpoints = {}
+        for endpoint, values in self.latencies.items():
+            endpoints[endpoint] = {
+                **summarize_latencies(values),
+                "errors": self.errors[endpoint],
+                "error_rate": round(self.errors[endpoint] / len(values), 4) if values else 0.0
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "endpoints": endpoints,
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            "error_samples": self.error_samples
+        }
+
+
+async def run_trainee(client: httpx.AsyncClient, stats: LoadStats, conversation: List[str], think_time: float):
+    """Plays one trainee session from reset to feedback."""
+    response = await stats.request(client, "api_sessions", "POST", "/api/sessions")
+    session_id = response.json().get("session_id") if response is not None else None
+
+    for message in conversation:
+        await stats.request(client, "api_chat", "POST", "/api/chat",
+                            json={"text": message, "phase": "", "session_id": session_id})
+        if think_time:
+            await asyncio.sleep(think_time)
+
+    await stats.request(client, "api_feedback", "GET", "/api/feedback", params={"session_id": session_id})
+
+
+async def sample_memory(pid: int, samples: List[Dict], stop: asyncio.Event, interval: float = 0.5):
+    """Samples the server RSS until stop is set."""
+    start = time.perf_counter()
+    while not stop.is_set():
+        rss = read_rss_kb(pid)
+        if rss is not None:
+            samples.append({"t": round(time.perf_counter() - start, 2), "rss_kb": rss})
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(args, server_pid: Optional[int]) -> Dict:
+    """Starts trainees with exponential inter-arrival times and waits for all of them."""
+    rng = random.Random(args.seed)
+    stats = LoadStats()
+    memory: List[Dict] = []
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=args.max_connections)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        sampler = asyncio.create_task(sample_memory(server_pid, memory, stop)) if server_pid else None
+        start = time.perf_counter()
+        tasks = []
+        for index in range(args.trainees):
+            if args.templated:
+                conversation = templated_conversation(rng)
+            else:
+                conversation = SCRIPTED_CONVERSATIONS[index % len(SCRIPTED_CONVERSATIONS)]
+            tasks.append(asyncio.create_task(run_trainee(client, stats, conversation, args.think_ms / 1000)))
+            if args.rate:
+                await asyncio.sleep(rng.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        if sampler:
+            await sampler
+
+    results = stats.to_dict()
+    results["duration_seconds"] = round(elapsed, 3)
+    results["throughput_rps"] = round(results["requests"] / elapsed, 3) if elapsed else 0.0
+    if memory:
+        results["memory"] = {
+            "start_rss_kb": memory[0]["rss_kb"],
+            "end_rss_kb": memory[-1]["rss_kb"],
+            "peak_rss_kb": max(sample["rss_kb"] for sample in memory),
+            "growth_kb": memory[-1]["rss_kb"] - memory[0]["rss_kb"],
+            "samples": memory
+        }
+    return results
+
+
+def spawn_server(port: int, latency_ms: float, workers: int = 1) -> subprocess.Popen:
+    """Starts the backend with the fake LLM backend and waits until it answers."""
+    # Load-test sessions are kept out of the transcript store
+    env = {**os.environ, "LLM_BACKEND": "fake", "FAKE_LLM_LATENCY_MS": str(latency_ms), "PERSISTENCE_PATH": ""}
+    if workers > 1 and env.get("SESSION_STORE_URL", "memory") == "memory":
+        raise RuntimeError("Several workers need a shared SESSION_STORE_URL (sqlite:/// or redis://)")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/scenario", timeout=1).raise_for_status()
+            return process
+        except Exception:
+            if process.poll() is not None:
+                raise RuntimeError("Backend server exited during startup")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Backend server did not start in time")
+
+
+def print_report(results: Dict):
+    print(f"\nLoad test: {results['config']['trainees']} trainees in {results['duration_seconds']} s "
+          f"({results['throughput_rps']} req/s, error rate {results['error_rate'] * 100:.2f}%)")
+    print(f"{'endpoint':16} {'count':>6} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"{endpoint:16} {stats['count']:>6} {stats['errors']:>7} {stats['p50_ms']:>10.2f} "
+              f"{stats['p95_ms']:>10.2f} {stats['p99_ms']:>10.2f} {stats['max_ms']:>10.2f}")
+    if "memory" in results:
+        memory = results["memory"]
+        print(f"\nServer RSS: {memory['start_rss_kb']} KB -> {memory['end_rss_kb']} KB "
+              f"(peak {memory['peak_rss_kb']} KB, growth {memory['growth_kb']} KB)")
+    for sample in results["error_samples"][:5]:
+        print(f"  error: {sample}")
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Simulate concurrent trainees against the chat API")
+    parser.add_argument("--trainees", type=int, default=20, help="number of trainee sessions")
+    parser.add_argument("--rate", type=float, default=5, help="trainee arrivals per second (0 = all at once)")
+    parser.add_argument("--think-ms", type=float, default=0, help="pause between a reply and the next message")
+    parser.add_argument("--templated", action="store_true", help="generate messages from templates")
+    parser.add_argument("--url", help="target an already running backend instead of spawning one")
+    parser.add_argument("--server-pid", type=int, help="pid of the target backend, to sample its memory")
+    parser.add_argument("--port", type=int, default=8765, help="port of the spawned backend")
+    parser.add_argument("--latency-ms", type=float, default=50, help="fake LLM latency of the spawned backend")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the spawned backend")
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    server = None
+    server_pid = args.server_pid
+    if not args.url:
+        server = spawn_server(args.port, args.latency_ms, args.workers)
+        server_pid = server.pid
+        args.url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        results = asyncio.run(run_load(args, server_pid))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    results["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_report(results)
+    print(f"\nResults written to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""End-to-end latency benchmarks driven by the fake LLM backend.
+
+Runs the scripted trainee conversations through RoleplaySystem and the FastAPI
+endpoints, and reports per-stage and end-to-end latency percentiles,
+throughput and memory allocations. Results are stored as JSON so that runs
+can be compared across commits.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --latency-ms 20 --repeat 5
+    python -m benchmarks.run --compare benchmarks/results/<previous>.json
+    python -m benchmarks.run --cassette run.jsonl --cassette-mode replay
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from benchmarks.conversations import SCRIPTED_CONVERSATIONS
+from utils.stats import summarize_latencies
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _timed(samples: Dict[str, List[float]], stage: str, func: Callable) -> Callable:
+    """Wraps a function so that each call's duration is appended to samples[stage]."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples[stage].append(time.perf_counter() - start)
+    return wrapper
+
+
+def _instrument(system, samples: Dict[str, List[float]]):
+    """Times the stages of a freshly set up scenario."""
+    agent = system.customer_agent
+    agent.phase_manager.analyze_message = _timed(samples, "phase_classification", agent.phase_manager.analyze_message)
+    agent.generate_response = _timed(samples, "customer_generate", agent.generate_response)
+    system.observer.add_interaction = _timed(samples, "observer_add_interaction", system.observer.add_interaction)
+
+
+def run_core(system, repeat: int, seed: int = 0) -> Dict:
+    """Benchmarks RoleplaySystem.process_user_message and ObserverCoach.get_summary.
+
+    Scenario i of every repetition is drawn with seed + i, so runs compare like with like.
+    """
+    samples: Dict[str, List[float]] = defaultdict(list)
+    turns = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for index, conversation in enumerate(SCRIPTED_CONVERSATIONS):
+            setup_start = time.perf_counter()
+            system.setup_scenario(seed=seed + index)
+            samples["setup_scenario"].append(time.perf_counter() - setup_start)
+            _instrument(system, samples)
+
+            conversation_start = time.perf_counter()
+            for message in conversation:
+                turn_start = time.perf_counter()
+                system.process_user_message(message)
+                samples["process_user_message"].append(time.perf_counter() - turn_start)
+
+                summary_start = time.perf_counter()
+                summary = system.observer.get_summary()
+                samples["get_summary"].append(time.perf_counter() - summary_start)
+
+                serialize_start = time.perf_counter()
+                json.dumps(summary, default=str)
+                samples["summary_serialization"].append(time.perf_counter() - serialize_start)
+                turns += 1
+            samples["conversation"].append(time.perf_counter() - conversation_start)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "stages": {stage: summarize_latencies(values) for stage, values in samples.items()},
+        "throughput": {
+            "turns": turns,
+            "seconds": round(elapsed, 3),
+            "turns_per_second": round(turns / elapsed, 3) if elapsed else 0.0
+        }
+    }
+
+
+def run_api(app, repeat: int, seed: int = 0) -> Dict:
+    """Benchmarks the FastAPI endpoints in-process with the test client."""
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    samples: Dict[str, List[float]] = defaultdict(list)
+
+    def call(stage: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        response = client.request(method, path, **kwargs)
+        samples[stage].append(time.perf_counter() - start)
+        response.raise_for_status()
+        return response
+
+    for _ in range(repeat):
+        for index, conversation in enumerate(SCRIPTED_CONVERSATIONS):
+            call("api_reset", "POST", "/api/reset", params={"seed": seed + index})
+            call("api_scenario", "GET", "/api/scenario")
+            for message in conversation:
+                call("api_chat", "POST", "/api/chat", json={"text": message, "phase": ""})
+            call("api_feedback", "GET", "/api/feedback")
+
+    return {"stages": {stage: summarize_latencies(values) for stage, values in samples.items()}}
+
+
+def run_allocations(system, seed: int = 0) -> Dict:
+    """Measures memory allocated per turn and retained per session with tracemalloc.
+
+    restored_session_kb is the memory of the same session once restored from
+    its serialized state, as after a session store load or a snapshot resume.
+    """
+    tracemalloc.start()
+    try:
+        before_session, _ = tracemalloc.get_traced_memory()
+        system.setup_scenario(seed=seed)
+        peaks = []
+        for message in SCRIPTED_CONVERSATIONS[0]:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            system.process_user_message(message)
+            system.observer.get_summary()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+        after_session, _ = tracemalloc.get_traced_memory()
+
+        state = json.dumps(system.to_state(), default=str)
+        before_restore, _ = tracemalloc.get_traced_memory()
+        restored = type(system)(azure=system.azure)
+        restored.load_state(json.loads(state))
+        after_restore, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "turn_peak_kb_mean": round(sum(peaks) / len(peaks) / 1024, 2),
+        "turn_peak_kb_max": round(max(peaks) / 1024, 2),
+        "session_retained_kb": round((after_session - before_session) / 1024, 2),
+        "restored_session_kb": round((after_restore - before_restore) / 1024, 2)
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict, previous: Dict):
+    """Prints the p50/p95 change of every stage against a previous run."""
+    print(f"\nComparison with {previous.get('commit')} ({previous.get('timestamp')}):")
+    print(f"{'stage':32} {'p50 ms':>10} {'Δ p50':>9} {'p95 ms':>10} {'Δ p95':>9}")
+    previous_stages = {**previous.get("core", {}).get("stages", {}), **previous.get("api", {}).get("stages", {})}
+    current_stages = {**current.get("core", {}).get("stages", {}), **current.get("api", {}).get("stages", {})}
+    for stage, stats in current_stages.items():
+        old = previous_stages.get(stage)
+        if not old:
+            continue
+        delta_p50 = (stats["p50_ms"] / old["p50_ms"] - 1) * 100 if old["p50_ms"] else 0.0
+        delta_p95 = (stats["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+        print(f"{stage:32} {stats['p50_ms']:>10.2f} {delta_p50:>+8.1f}% {stats['p95_ms']:>10.2f} {delta_p95:>+8.1f}%")
+
+
+def print_report(results: Dict):
+    """Prints the stage latencies of a benchmark run."""
+    print(f"\nBenchmark {results['commit']} - fake LLM latency {results['config']['latency_ms']} ms")
+    print(f"{'stage':32} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for section in ("core", "api"):
+        for stage, stats in results.get(section, {}).get("stages", {}).items():
+            print(f"{stage:32} {stats['count']:>6} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} {stats['p99_ms']:>10.2f}")
+    throughput = results["core"]["throughput"]
+    print(f"\nThroughput: {throughput['turns_per_second']} turns/s ({throughput['turns']} turns)")
+    if "allocations" in results:
+        print(f"Allocations: {results['allocations']}")
+    if "cassette" in results:
+        print(f"Cassette {results['config']['cassette']}: {results['cassette']}")
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmarks with a fake LLM backend")
+    parser.add_argument("--latency-ms", type=float, default=20, help="base latency of each fake completion")
+    parser.add_argument("--jitter-ms", type=float, default=5, help="random extra latency per completion")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="simulated generation speed (0 = instant)")
+    parser.add_argument("--repeat", type=int, default=3, help="times each scripted conversation is replayed")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first scenario (scenario i uses seed + i)")
+    parser.add_argument("--cassette", help="LLM cassette file to record responses to or replay them from")
+    parser.add_argument("--cassette-mode", choices=("record", "replay", "auto"), default="auto",
+                        help="record, replay (no LLM calls at all) or auto (replay, recording missing responses)")
+    parser.add_argument("--skip-api", action="store_true", help="do not benchmark the FastAPI endpoints")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    # The fake backend must be selected before main.py builds its module-level system
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    # Benchmark sessions are not practice sessions: keep them out of the transcript store
+    os.environ["PERSISTENCE_PATH"] = ""
+    if args.cassette:
+        os.environ["LLM_CASSETTE"] = args.cassette
+        os.environ["LLM_CASSETTE_MODE"] = args.cassette_mode
+    import main as backend
+    from agents.roleplay import RoleplaySystem
+    from monitoring.metrics import LLM_CASSETTE
+
+    system = RoleplaySystem()
+    if not system.initialize():
+        sys.exit(1)
+
+    results = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "config": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "cassette": args.cassette,
+            "cassette_mode": args.cassette_mode if args.cassette else None,
+            "conversations": len(SCRIPTED_CONVERSATIONS)
+        },
+        "core": run_core(system, args.repeat, args.seed),
+        "allocations": run_allocations(system, args.seed),
+        "routes": system.azure.route_table.to_dict()
+    }
+    if not args.skip_api:
+        results["api"] = run_api(backend.app, args.repeat, args.seed)
+    if args.cassette:
+        results["cassette"] = {result: int(count) for (result,), count in LLM_CASSETTE.values.items()}
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_report(results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,8 @@ def print_scenario_info(scenario_info: Dict, product_info: Dict) -> None:
     print(f"Role: {profile['role']}")
     print(f"Industry: {profile['industry']}")
     print(f"Company Size: {profile['company_size']}")
+    if scenario_info.get('seed') is not None:
+        print(f"Seed: {scenario_info['seed']}")
     
     print_colored("\nPRODUCT:", "yellow")
     print(f"{product_info['name']} - {product_info['description']}")
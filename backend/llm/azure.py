@@ -0,0 +1,113 @@
+import os
+
+from dotenv import load_dotenv
+from openai import AzureOpenAI
+
+from llm.cassette import CASSETTE_MODE, CASSETTE_PATH, Cassette, CassetteClient
+from llm.fake import FakeAzureOpenAI
+from llm.routing import RouteTable, set_route_table
+
+
+class AzureConnection:
+    """Manages Azure OpenAI connection and configuration."""
+    
+    def __init__(self):
+        # Load environment variables
+        load_dotenv()
+        
+        # Get Azure configuration
+        self.endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT")
+        self.api_key = os.environ.get("AZURE_OPENAI_KEY")
+        self.deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
+        # "fake" serves canned responses locally (benchmarks, load tests)
+        self.backend = os.environ.get("LLM_BACKEND", "azure")
+        self.client = None
+        
+        # Per call type deployments (phase classification, customer reply, ...)
+        self.route_table = RouteTable.from_env(self.deployment)
+        set_route_table(self.route_table)
+    
+    def initialize(self) -> bool:
+        """Initialize Azure OpenAI client."""
+        if CASSETTE_PATH and CASSETTE_MODE == "replay":
+            # Recorded responses only, no LLM backend at all
+            self.client = CassetteClient(None, Cassette(CASSETTE_PATH), "replay")
+            print(f"\n✅ Replaying {len(self.client.cassette)} recorded LLM responses from {CASSETTE_PATH}")
+            return True
+        
+        if self.backend == "fake":
+            self.client = self._with_cassette(FakeAzureOpenAI())
+            return self.test_connection()
+        
+        try:
+            if not self.endpoint or not self.api_key:
+                raise ValueError("Azure OpenAI credentials not found in environment variables")
+            
+            if not self.deployment:
+                raise ValueError("Azure OpenAI deployment name not found in environment variables")
+            
+            self.client = self._with_cassette(AzureOpenAI(
+                api_key=self.api_key,
+                api_version="2024-10-21",
+                azure_endpoint=self.endpoint
+            ))
+            
+            # Test the connection
+            self.test_connection()
+            return True
+            
+        except Exception as e:
+            print("\n❌ Error initializing Azure OpenAI:")
+            print(f"Error: {str(e)}")
+            return False
+    
+    def _with_cassette(self, client):
+        """Records the client's completions to LLM_CASSETTE (and replays them in auto mode)."""
+        if not CASSETTE_PATH:
+            return client
+        print(f"Recording LLM responses to {CASSETTE_PATH} ({CASSETTE_MODE} mode)")
+        return CassetteClient(client, Cassette(CASSETTE_PATH), CASSETTE_MODE)
+    
+    def test_connection(self) -> bool:
+        """Test Azure OpenAI connection."""
+        try:
+            if not self.client:
+                raise ValueError("Azure OpenAI client not initialized")
+            
+            # Try a simple call
+            response = self.client.chat.completions.create(
+                model=self.deployment,
+                messages=[
+                    {"role": "system", "content": "You are a test assistant."},
+                    {"role": "user", "content": "Say 'hello'"}
+                ],
+                max_tokens=10
+            )
+            
+            print("\n✅ Successfully connected to Azure OpenAI!")
+            print(f"Endpoint: {self.endpoint}")
+            print(f"Deployment: {self.deployment}")
+            for name, route in self.route_table.routes.items():
+                if route.deployment != self.deployment:
+                    print(f"Route {name}: {route.deployment}")
+            print(f"Test response: {response.choices[0].message.content}")
+            return True
+            
+        except ValueError as e:
+            print("\n❌ Configuration Error:")
+            print(f"Error: {str(e)}")
+            print("\nPlease ensure you have set the following environment variables:")
+            print("export AZURE_OPENAI_ENDPOINT='your-endpoint'")
+            print("export AZURE_OPENAI_KEY='your-key'")
+            print("export AZURE_OPENAI_DEPLOYMENT='your-deployment-name'")
+            return False
+        except Exception as e:
+            print("\n❌ Error connecting to Azure OpenAI:")
+            print(f"Error: {str(e)}")
+            return False
+    
+    def get_client(self) -> AzureOpenAI:
+        """Get the Azure OpenAI client."""
+        if not self.client:
+            raise ValueError("Azure OpenAI client not initialized")
+        return self.client
@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+_current_token: ContextVar[Optional["CancelToken"]] = ContextVar("current_cancel_token", default=None)
+
+
+class TurnCancelled(BaseException):
+    """Raised at the next LLM call of a turn that was cancelled.
+
+    Like asyncio.CancelledError it is not an Exception, so the agents'
+    fallbacks for failed completions do not turn it into a reply.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """Cancellation state of one turn.
+
+    cancel() is called from another thread (e.g. when the client
+    disconnects); poll, if given, is asked on every check and returns a
+    reason when the turn was cancelled elsewhere (e.g. by another worker).
+    """
+
+    def __init__(self, poll: Optional[Callable[[], Optional[str]]] = None):
+        self.poll = poll
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.poll:
+            reason = self.poll()
+            if reason:
+                self.cancel(reason)
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise TurnCancelled(self.reason)
+
+
+def current_token() -> Optional[CancelToken]:
+    """Returns the token of the turn running in this context, if any."""
+    return _current_token.get()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Makes token the current token for the LLM calls made inside the block."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from monitoring.metrics import LLM_CASSETTE
+
+# JSONL file of recorded completions; empty disables recording and replay
+CASSETTE_PATH = os.environ.get("LLM_CASSETTE", "")
+# record: call the LLM and store every response; replay: only serve stored
+# responses, without any LLM client; auto: replay, recording the missing ones
+CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "replay")
+MODES = ("record", "replay", "auto")
+
+# Request parameters that do not change the completion
+IGNORED_PARAMS = ("timeout", "extra_headers", "extra_query", "user")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(request: Dict) -> str:
+    """Returns the key of a completion request: a hash of its model, messages and parameters."""
+    normalized = {
+        name: value for name, value in request.items()
+        if name not in IGNORED_PARAMS and value is not None
+    }
+    normalized["messages"] = [
+        {"role": message["role"], "content": message.get("content")}
+        for message in request.get("messages", [])
+    ]
+    data = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+
+def response_to_entry(key: str, response) -> Dict:
+    """Keeps the parts of a completion the agents read: texts, finish reasons, logprobs and usage."""
+    choices = []
+    for choice in response.choices:
+        logprobs = getattr(choice, "logprobs", None)
+        choices.append({
+            "content": choice.message.content,
+            "finish_reason": getattr(choice, "finish_reason", None),
+            "logprobs": [[item.token, item.logprob] for item in logprobs.content]
+            if logprobs and getattr(logprobs, "content", None) else None
+        })
+    usage = getattr(response, "usage", None)
+    return {
+        "key": key,
+        "model": getattr(response, "model", None),
+        "choices": choices,
+        "usage": [usage.prompt_tokens, usage.completion_tokens] if usage else None
+    }
+
+
+def entry_to_response(entry: Dict):
+    """Rebuilds an object shaped like the OpenAI response from a cassette entry."""
+    usage = None
+    if entry.get("usage"):
+        prompt_tokens, completion_tokens = entry["usage"]
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens
+        )
+    return SimpleNamespace(
+        id=f"cassette-{entry['key']}",
+        model=entry.get("model"),
+        choices=[
+            SimpleNamespace(
+                index=index,
+                message=SimpleNamespace(role="assistant", content=choice["content"]),
+                logprobs=SimpleNamespace(content=[
+                    SimpleNamespace(token=token, logprob=logprob) for token, logprob in choice["logprobs"]
+                ]) if choice.get("logprobs") else None,
+                finish_reason=choice.get("finish_reason")
+            )
+            for index, choice in enumerate(entry["choices"])
+        ],
+        usage=usage
+    )
+
+
+class Cassette:
+    """Recorded completions, keyed by request, in an append-only JSONL file.
+
+    Every recorded response is one compact line, appended as soon as it is
+    received, so a recording survives an interrupted run. When a key was
+    recorded more than once, the last response wins.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, response):
+        entry = response_to_entry(key, response)
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            self.entries[key] = entry
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+class CassetteClient:
+    """Stand-in for the AzureOpenAI client that records completions to a cassette or replays them.
+
+    It sits under ChatClient, so every completion of every agent goes through
+    it. In replay mode no LLM client is needed and a request that was not
+    recorded raises CassetteMiss.
+    """
+
+    def __init__(self, client, cassette: Cassette, mode: str = CASSETTE_MODE):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if client is None and mode != "replay":
+            raise ValueError(f"Cassette mode {mode} needs an LLM client")
+        self.client = client
+        self.cassette = cassette
+        self.mode = mode
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options) -> "CassetteClient":
+        """Applies client options (e.g. max_retries) to the wrapped client."""
+        client = self.client
+        if client is not None and hasattr(client, "with_options"):
+            client = client.with_options(**options)
+        return CassetteClient(client, self.cassette, self.mode)
+
+    def create(self, **request):
+        """Mimics chat.completions.create, serving or recording the response."""
+        key = request_key(request)
+        if self.mode != "record":
+            entry = self.cassette.get(key)
+            if entry is not None:
+                LLM_CASSETTE.inc("hit")
+                return entry_to_response(entry)
+            if self.mode == "replay":
+                LLM_CASSETTE.inc("miss")
+                raise CassetteMiss(f"No recorded response for request {key} in {self.cassette.path}")
+        response = self.client.chat.completions.create(**request)
+        self.cassette.put(key, response)
+        LLM_CASSETTE.inc("recorded")
+        return response
@@ -0,0 +1,189 @@
+import os
+import time
+from typing import Optional
+
+import openai
+
+from llm.cancellation import TurnCancelled, current_token
+from llm.cassette import request_key
+from llm.routing import RouteTable, get_route_table
+from llm.singleflight import SingleFlight
+from llm.tokens import estimate_messages_tokens, estimate_tokens
+from llm.usage import TokenBudgetExceeded, UsageMeter
+from monitoring.metrics import (
+    LLM_CANCELLED, LLM_COALESCED, LLM_REQUEST_SECONDS, LLM_REQUESTS, LLM_TOKENS, LLM_TOKENS_SAVED
+)
+from monitoring.tracing import start_span
+
+# Errors worth retrying: rate limits, timeouts, connection and server errors
+TRANSIENT_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+# Identical requests made at the same time share one upstream call; LLM_COALESCE=0 sends each one
+COALESCE_REQUESTS = os.environ.get("LLM_COALESCE", "1") == "1"
+
+# Calls in flight in this process, shared by the clients of every session
+_IN_FLIGHT = SingleFlight()
+
+
+class ChatClient:
+    """Single entry point for the chat completions made by the agents.
+
+    Wraps the Azure OpenAI client so that every call is attributed to an agent
+    and a prompt type. The prompt type selects the route (deployment,
+    max_tokens, temperature) used for the call, its latency is recorded on the
+    route and its token usage on the session meter.
+
+    Transient errors are retried here rather than inside the OpenAI SDK, so
+    that every attempt is visible on the call's trace span. Calls (and
+    retries) of a cancelled turn are not sent: TurnCancelled is raised instead
+    and the tokens they would have used are counted as saved. A request
+    identical to one already in flight (same deployment, messages and
+    parameters) waits for that call and gets its response.
+    """
+
+    def __init__(self, client, usage_meter: Optional[UsageMeter] = None,
+                 route_table: Optional[RouteTable] = None, max_retries: Optional[int] = None):
+        if hasattr(client, "with_options"):
+            client = client.with_options(max_retries=0)
+        self.client = client
+        self.usage_meter = usage_meter
+        self.route_table = route_table
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("LLM_MAX_RETRIES", "2"))
+
+    @classmethod
+    def wrap(cls, client, usage_meter: Optional[UsageMeter] = None) -> Optional["ChatClient"]:
+        """Returns the client as a ChatClient, wrapping raw Azure clients."""
+        if client is None or isinstance(client, ChatClient):
+            return client
+        return cls(client, usage_meter)
+
+    def complete(self, agent: str, prompt_type: str, **params):
+        """Creates a chat completion on the route of its prompt type and records its usage."""
+        if self.usage_meter and self.usage_meter.is_over_budget():
+            raise TokenBudgetExceeded(
+                f"Session {self.usage_meter.session_id} used its budget of {self.usage_meter.token_budget} tokens"
+            )
+
+        route_table = self.route_table or get_route_table()
+        request = route_table.get(prompt_type).apply(params)
+
+        deployment = request["model"]
+        estimated_prompt_tokens = estimate_messages_tokens(request.get("messages", []))
+        self._check_cancelled(agent, prompt_type, request, estimated_prompt_tokens)
+        with start_span("llm.completion", {
+            "llm.agent": agent,
+            "llm.prompt_type": prompt_type,
+            "llm.deployment": deployment,
+            "llm.max_tokens": request.get("max_tokens"),
+            "llm.estimated_prompt_tokens": estimated_prompt_tokens
+        }, kind="client") as span:
+            response, shared = self._send(agent, prompt_type, request, route_table, span, estimated_prompt_tokens)
+            prompt_tokens, completion_tokens = self._record_usage(
+                agent, prompt_type, deployment, response, estimated_prompt_tokens, shared
+            )
+            span.set_attribute("llm.prompt_tokens", prompt_tokens)
+            span.set_attribute("llm.completion_tokens", completion_tokens)
+        return response
+
+    def _check_cancelled(self, agent: str, prompt_type: str, request: dict, estimated_prompt_tokens: int):
+        """Raises TurnCancelled, instead of sending the request, if the current turn was cancelled."""
+        token = current_token()
+        if token is None or not token.cancelled:
+            return
+        LLM_CANCELLED.inc(agent, prompt_type, token.reason)
+        LLM_TOKENS_SAVED.inc(agent, "prompt", amount=estimated_prompt_tokens)
+        LLM_TOKENS_SAVED.inc(agent, "max_completion", amount=request.get("max_tokens") or 0)
+        raise TurnCancelled(token.reason)
+
+    def _send(self, agent: str, prompt_type: str, request: dict, route_table: RouteTable, span,
+              estimated_prompt_tokens: int):
+        """Sends the request, or shares the response of an identical one in flight.
+
+        Returns the response and whether it came from another caller's call.
+        """
+        def create():
+            return self._create(agent, prompt_type, request, route_table, span, estimated_prompt_tokens)
+
+        def check_cancelled():
+            self._check_cancelled(agent, prompt_type, request, estimated_prompt_tokens)
+
+        if not COALESCE_REQUESTS:
+            return create(), False
+        key = request_key(request)
+        while True:
+            try:
+                response, shared = _IN_FLIGHT.do(key, create, poll=check_cancelled)
+                break
+            except TurnCancelled:
+                token = current_token()
+                if token is not None and token.cancelled:
+                    raise
+                # The call this one waited for belonged to a cancelled turn; send it again
+        if shared:
+            LLM_COALESCED.inc(agent, prompt_type)
+            span.set_attribute("llm.coalesced", True)
+        return response, shared
+
+    def _create(self, agent: str, prompt_type: str, request: dict, route_table: RouteTable, span,
+                estimated_prompt_tokens: int = 0):
+        """Sends the request, retrying transient errors with exponential backoff."""
+        deployment = request["model"]
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                response = self.client.chat.completions.create(**request)
+                break
+            except TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    self._record_failure(agent, prompt_type, deployment, route_table, start, span, attempt)
+                    raise
+                attempt += 1
+                span.add_event("retry", {"attempt": attempt, "error": type(e).__name__})
+                time.sleep(min(0.5 * 2 ** (attempt - 1), 8))
+                try:
+                    self._check_cancelled(agent, prompt_type, request, estimated_prompt_tokens)
+                except TurnCancelled:
+                    self._record_failure(agent, prompt_type, deployment, route_table, start, span, attempt)
+                    raise
+            except Exception:
+                self._record_failure(agent, prompt_type, deployment, route_table, start, span, attempt)
+                raise
+        span.set_attribute("llm.retry_attempts", attempt)
+        elapsed = time.perf_counter() - start
+        route_table.record(prompt_type, elapsed)
+        LLM_REQUEST_SECONDS.observe(elapsed, agent, prompt_type, deployment)
+        LLM_REQUESTS.inc(agent, prompt_type, deployment, "ok")
+        return response
+
+    def _record_failure(self, agent: str, prompt_type: str, deployment: str, route_table: RouteTable,
+                        start: float, span, attempt: int):
+        """Records the latency and outcome of a call that failed for good."""
+        elapsed = time.perf_counter() - start
+        route_table.record(prompt_type, elapsed, ok=False)
+        LLM_REQUEST_SECONDS.observe(elapsed, agent, prompt_type, deployment)
+        LLM_REQUESTS.inc(agent, prompt_type, deployment, "error")
+        span.set_attribute("llm.retry_attempts", attempt)
+
+    def _record_usage(self, agent: str, prompt_type: str, deployment: str, response,
+                      estimated_prompt_tokens: int, shared: bool = False):
+        """Records the tokens of a completed call and returns (prompt, completion) tokens.
+
+        A shared response counts on the session meter but not on the token
+        metrics, which were recorded once by the call that produced it.
+        """
+        # Prefer the usage reported by the API, fall back to local estimates
+        usage = getattr(response, "usage", None)
+        if usage:
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens
+        else:
+            prompt_tokens = estimated_prompt_tokens
+            completion_tokens = sum(
+                estimate_tokens(choice.message.content or "") for choice in response.choices
+            )
+        if not shared:
+            LLM_TOKENS.inc(agent, deployment, "prompt", amount=prompt_tokens)
+            LLM_TOKENS.inc(agent, deployment, "completion", amount=completion_tokens)
+        if self.usage_meter:
+            self.usage_meter.record(agent, prompt_type, estimated_prompt_tokens, prompt_tokens, completion_tokens)
+        return prompt_tokens, completion_tokens
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from llm.tokens import estimate_messages_tokens, estimate_tokens
+
+CUSTOMER_REPLIES = [
+    "Okay, that sounds interesting. How long would it take to get our team using it?",
+    "Honestly our biggest problem is the time we lose in meetings. Can it help with that?",
+    "I'm not sure about the cost though. $30 per user adds up quickly for us.",
+    "We're worried about where our data goes. Is it compliant with our regulations?",
+    "That makes sense. What would the next steps look like if we wanted a pilot?",
+    "Hmm, we tried something similar before and nobody used it. Why would this be different?",
+    "Can it pull numbers from our Excel reports automatically? That's a big time sink.",
+    "Alright, send me the details and I'll talk to my manager about it."
+]
+
+# Representative messages for self-play, by phase (1 to 4)
+REP_MESSAGES = {
+    1: [
+        "Hi, I'm Alex from Microsoft. What are your main goals this year and what challenges slow your team down?",
+        "Thanks for sharing. What do you need most from a tool like this?"
+    ],
+    2: [
+        "Copilot can summarize Teams meetings and draft emails, which improves productivity and frees hours every week.",
+        "Many customers see a clear ROI because people spend less time on repetitive work."
+    ],
+    3: [
+        "I understand the concern about cost and security. Your data stays in your tenant and we can measure the impact together.",
+        "I hear you. A small pilot lets us address that risk before a wider rollout."
+    ],
+    4: [
+        "Let's schedule a follow up next week to plan the next steps and a pilot. Thank you for your time!"
+    ]
+}
+
+# Keywords used to pick a plausible phase for the last representative message
+PHASE_KEYWORDS = [
+    (4, re.compile(r"\b(next steps?|follow up|schedule|thank you for your time|bye|talk soon)\b", re.IGNORECASE)),
+    (3, re.compile(r"\b(concern|worried|price|cost|security|compliance|risk)\b", re.IGNORECASE)),
+    (2, re.compile(r"\b(feature|benefit|value|roi|save|improve|productivity)\b", re.IGNORECASE))
+]
+
+PHASE_NAMES = {1: "INTRODUCTION_DISCOVERY", 2: "VALUE_PROPOSITION", 3: "OBJECTION_HANDLING", 4: "CLOSING"}
+
+
+class FakeAzureOpenAI:
+    """Local stand-in for the AzureOpenAI client, used for offline benchmarks and load tests.
+
+    Answers every chat completion with a plausible canned response after a
+    configurable delay: a base latency plus random jitter plus, optionally, a
+    per-token generation time. Responses are deterministic for a given request.
+    """
+
+    def __init__(self, latency_ms: float = None, jitter_ms: float = None,
+                 tokens_per_second: float = None, seed: int = 0):
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.environ.get("FAKE_LLM_LATENCY_MS", "50"))
+        self.jitter_ms = jitter_ms if jitter_ms is not None else float(os.environ.get("FAKE_LLM_JITTER_MS", "10"))
+        self.tokens_per_second = (
+            tokens_per_second if tokens_per_second is not None
+            else float(os.environ.get("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+        )
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model: str, messages: List[Dict], max_tokens: int = None, logit_bias: Dict = None,
+               logprobs: bool = False, **kwargs):
+        """Mimics chat.completions.create and returns an object shaped like the OpenAI response."""
+        self.calls += 1
+        content = self._answer(messages, max_tokens, logit_bias)
+        completion_tokens = estimate_tokens(content)
+
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if self.tokens_per_second:
+            delay += completion_tokens / self.tokens_per_second * 1000
+        time.sleep(delay / 1000)
+
+        prompt_tokens = estimate_messages_tokens(messages)
+        choice_logprobs = None
+        if logprobs:
+            choice_logprobs = SimpleNamespace(content=[SimpleNamespace(token=content, logprob=-0.05)])
+        return SimpleNamespace(
+            id=f"fake-{self.calls}",
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=content),
+                logprobs=choice_logprobs,
+                finish_reason="stop"
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
+
+    def _answer(self, messages: List[Dict], max_tokens: int, logit_bias: Dict) -> str:
+        """Picks a response that fits the kind of request."""
+        system = messages[0]["content"] if messages else ""
+        prompt = messages[-1]["content"] if messages else ""
+
+        if "sales representative practicing" in system:
+            return self._rep_message(system)
+        if "conversation analyst" in system:
+            phase = self._guess_phase(prompt)
+            return str(phase) if logit_bias or max_tokens == 1 else PHASE_NAMES[phase]
+        if "JSON" in prompt:
+            return json.dumps({
+                "feedback": "The representative kept the conversation focused on the customer's needs.",
+                "suggestion": "Quantify the value with a concrete example from the customer's industry.",
+                "strength": "Clear and friendly communication.",
+                "opportunity": "Ask more about the customer's success metrics."
+            })
+        if "summarize" in system.lower():
+            return "The customer described their needs and raised concerns about cost and data security."
+
+        digest = hashlib.sha1("".join(message["content"] for message in messages).encode()).digest()
+        return CUSTOMER_REPLIES[digest[0] % len(CUSTOMER_REPLIES)]
+
+    def _rep_message(self, prompt: str) -> str:
+        """Picks a representative message that fits the turn of a self-play prompt."""
+        match = re.search(r"Turn (\d+) of (\d+)", prompt)
+        turn, total = (int(match.group(1)), int(match.group(2))) if match else (1, 1)
+        phase = min(4, 1 + (4 * (turn - 1)) // max(total, 1))
+        options = REP_MESSAGES[phase]
+        return options[(turn - 1) % len(options)]
+
+    def _guess_phase(self, prompt: str) -> int:
+        """Guesses a phase from the last representative message of an analysis prompt."""
+        agent_lines = re.findall(r"^\s*Agent: (.*)$", prompt, re.MULTILINE)
+        last_message = agent_lines[-1] if agent_lines else ""
+        for phase, pattern in PHASE_KEYWORDS:
+            if pattern.search(last_message):
+                return phase
+        return 1
@@ -0,0 +1,127 @@
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from utils.stats import percentile
+
+# Default parameters of every call type, matching what each agent used to hard-code
+DEFAULT_ROUTES = {
+    "phase_classification": {"max_tokens": 50, "temperature": 0.2},
+    "customer_reply": {"max_tokens": 800, "temperature": 0.5},
+    "opening_line": {"max_tokens": 100, "temperature": 0.8},
+    "context_summary": {"max_tokens": 300, "temperature": 0.0},
+    "naturalization": {"max_tokens": 300, "temperature": 0.7},
+    "verbose_fix": {"max_tokens": 300, "temperature": 0.4},
+    "phase_feedback": {"max_tokens": 500, "temperature": 0.3},
+    "sales_rep_turn": {"max_tokens": 200, "temperature": 0.8}
+}
+
+# Number of recent latencies kept per route for percentiles
+LATENCY_WINDOW = 500
+
+
+class Route:
+    """Deployment and generation parameters used for one call type."""
+
+    def __init__(self, name: str, deployment: str, max_tokens: int, temperature: float):
+        self.name = name
+        self.deployment = deployment
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def apply(self, params: Dict) -> Dict:
+        """Returns the request parameters with this route's deployment and defaults."""
+        request = dict(params)
+        request["model"] = self.deployment
+        request.setdefault("max_tokens", self.max_tokens)
+        request.setdefault("temperature", self.temperature)
+        return request
+
+    def to_dict(self) -> Dict:
+        """Returns the route configuration and its latency metrics."""
+        latencies = sorted(self.latencies)
+        return {
+            "deployment": self.deployment,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0
+        }
+
+
+class RouteTable:
+    """Maps each call type to its own deployment, max_tokens and temperature.
+
+    Every route defaults to AZURE_OPENAI_DEPLOYMENT and can be overridden with
+    LLM_ROUTE_<CALL_TYPE>_DEPLOYMENT, LLM_ROUTE_<CALL_TYPE>_MAX_TOKENS and
+    LLM_ROUTE_<CALL_TYPE>_TEMPERATURE, e.g. LLM_ROUTE_PHASE_CLASSIFICATION_DEPLOYMENT.
+    """
+
+    def __init__(self, routes: Dict[str, Route], default_deployment: str):
+        self.routes = routes
+        self.default_deployment = default_deployment
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_deployment: Optional[str] = None) -> "RouteTable":
+        """Builds the route table from the environment variables."""
+        default_deployment = default_deployment or os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
+        routes = {}
+        for name, defaults in DEFAULT_ROUTES.items():
+            prefix = f"LLM_ROUTE_{name.upper()}_"
+            routes[name] = Route(
+                name,
+                deployment=os.environ.get(prefix + "DEPLOYMENT", default_deployment),
+                max_tokens=int(os.environ.get(prefix + "MAX_TOKENS", defaults["max_tokens"])),
+                temperature=float(os.environ.get(prefix + "TEMPERATURE", defaults["temperature"]))
+            )
+        return cls(routes, default_deployment)
+
+    def get(self, name: str) -> Route:
+        """Returns the route of a call type, creating a default one for unknown types."""
+        route = self.routes.get(name)
+        if route is None:
+            with self._lock:
+                route = self.routes.setdefault(name, Route(name, self.default_deployment, 300, 0.5))
+        return route
+
+    def record(self, name: str, seconds: float, ok: bool = True):
+        """Records the latency of one call on its route."""
+        route = self.get(name)
+        with self._lock:
+            route.calls += 1
+            route.total_seconds += seconds
+            route.latencies.append(seconds)
+            if not ok:
+                route.errors += 1
+
+    def to_dict(self) -> Dict:
+        """Returns every route with its configuration and latency metrics."""
+        with self._lock:
+            return {name: route.to_dict() for name, route in self.routes.items()}
+
+
+_route_table: Optional[RouteTable] = None
+
+
+def get_route_table() -> RouteTable:
+    """Returns the process-wide route table, built from the environment on first use."""
+    global _route_table
+    if _route_table is None:
+        _route_table = RouteTable.from_env()
+    return _route_table
+
+
+def set_route_table(route_table: RouteTable):
+    """Replaces the process-wide route table."""
+    global _route_table
+    _route_table = route_table
@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Flight:
+    """One call in progress and the outcome its waiters receive."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time, sharing its outcome with concurrent callers.
+
+    The first caller of a key runs fn; callers arriving while it runs wait and
+    get the same result (or exception) instead of running fn again. Nothing is
+    cached: once the call finishes, the next caller of the key runs fn anew.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], poll: Optional[Callable[[], None]] = None,
+           poll_interval: float = 0.05) -> Tuple[Any, bool]:
+        """Returns (result of fn, whether it came from another caller's call).
+
+        While waiting for another caller, poll is called every poll_interval
+        seconds; an exception it raises stops the wait (e.g. a cancelled turn).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            while not flight.done.wait(poll_interval if poll else None):
+                poll()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
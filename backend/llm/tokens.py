@@ -0,0 +1,46 @@
+import re
+from typing import Dict, List
+
+# Words, numbers and individual punctuation marks roughly line up with BPE pieces
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Per-message overhead used by the chat completion format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Every reply is primed with the assistant role
+REPLY_PRIMING_TOKENS = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens in a text without calling the API.
+
+    The estimate is deliberately conservative: short words count as one token
+    and long words are split into chunks of roughly five characters, which
+    slightly overestimates typical English text for GPT-4 class tokenizers.
+    """
+    if not text:
+        return 0
+    return sum(max(1, (len(piece) + 3) // 5) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def estimate_messages_tokens(messages: List[Dict]) -> int:
+    """Estimates the prompt tokens of a list of chat messages."""
+    total = REPLY_PRIMING_TOKENS
+    for message in messages:
+        total += MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content") or "")
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts a text so that its estimated token count fits in max_tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    used = 0
+    end = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        cost = max(1, (len(match.group()) + 3) // 5)
+        if used + cost > max_tokens:
+            break
+        used += cost
+        end = match.end()
+    return text[:end].rstrip() + "..."
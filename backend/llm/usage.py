@@ -0,0 +1,69 @@
+import threading
+from typing import Dict, Optional
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a session has used up its token budget."""
+
+
+def _empty_bucket() -> Dict[str, int]:
+    return {
+        "calls": 0,
+        "estimated_prompt_tokens": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0
+    }
+
+
+class UsageMeter:
+    """Aggregates the tokens used by one session, per agent and per prompt type."""
+
+    def __init__(self, session_id: str, token_budget: Optional[int] = None):
+        self.session_id = session_id
+        self.token_budget = token_budget or None
+        self.totals = _empty_bucket()
+        self.by_agent: Dict[str, Dict[str, int]] = {}
+        self.by_prompt_type: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, prompt_type: str, estimated_prompt_tokens: int,
+               prompt_tokens: int, completion_tokens: int):
+        """Adds the usage of one completion call."""
+        with self._lock:
+            buckets = (
+                self.totals,
+                self.by_agent.setdefault(agent, _empty_bucket()),
+                self.by_prompt_type.setdefault(prompt_type, _empty_bucket())
+            )
+            for bucket in buckets:
+                bucket["calls"] += 1
+                bucket["estimated_prompt_tokens"] += estimated_prompt_tokens
+                bucket["prompt_tokens"] += prompt_tokens
+                bucket["completion_tokens"] += completion_tokens
+                bucket["total_tokens"] += prompt_tokens + completion_tokens
+
+    def is_over_budget(self) -> bool:
+        """Checks if the session has reached its token budget."""
+        return bool(self.token_budget) and self.totals["total_tokens"] >= self.token_budget
+
+    def to_dict(self) -> Dict:
+        """Returns a JSON-serializable report of the session usage."""
+        with self._lock:
+            return {
+                "session_id": self.session_id,
+                "token_budget": self.token_budget,
+                "over_budget": self.is_over_budget(),
+                "totals": dict(self.totals),
+                "by_agent": {name: dict(bucket) for name, bucket in self.by_agent.items()},
+                "by_prompt_type": {name: dict(bucket) for name, bucket in self.by_prompt_type.items()}
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UsageMeter":
+        """Recreates a meter from its to_dict report."""
+        meter = cls(data["session_id"], token_budget=data.get("token_budget"))
+        meter.totals.update(data.get("totals", {}))
+        meter.by_agent = {name: dict(bucket) for name, bucket in data.get("by_agent", {}).items()}
+        meter.by_prompt_type = {name: dict(bucket) for name, bucket in data.get("by_prompt_type", {}).items()}
+        return meter
@@ -1,175 +1,23 @@
-import random
 import sys
 import os
-from typing import Dict
-from openai import AzureOpenAI
-from dotenv import load_dotenv
+from typing import Optional
 
 from frontend.display import print_colored, print_scenario_info
-from agents.customer import CustomerAgent
 from agents.evaluator import ObserverCoach
-from agents.conversation_phase import ConversationPhase
-from profiles import CUSTOMER_PROFILES, PRODUCT_INFO, SCENARIOS
+from agents.roleplay import RoleplaySystem
+from agents.rubric import reload_rubric
+from agents.scenario_pool import ScenarioPool
+from llm.azure import AzureConnection
+from llm.cancellation import CancelToken, TurnCancelled, cancel_scope
+from monitoring.metrics import render_prometheus, stage_timer
+from monitoring.tracing import start_span
+from storage.catalog import get_catalog
+from storage.session_store import SESSION_TTL_SECONDS, create_session_store, decode_state, encode_state
+from storage.snapshots import SNAPSHOT_VERSION, SnapshotError, SnapshotStore
+from storage.transcript_store import get_transcript_store
+from storage.turn_queue import TurnLease, TurnQueue
+from profiles import PRODUCT_INFO
 
-class AzureConnection:
-    """Manages Azure OpenAI connection and configuration."""
-    
-    def __init__(self):
-        # Load environment variables
-        load_dotenv()
-        
-        # Get Azure configuration
-        self.endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT")
-        self.api_key = os.environ.get("AZURE_OPENAI_KEY")
-        self.deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
-        self.client = None
-    
-    def initialize(self) -> bool:
-        """Initialize Azure OpenAI client."""
-        try:
-            if not self.endpoint or not self.api_key:
-                raise ValueError("Azure OpenAI credentials not found in environment variables")
-            
-            if not self.deployment:
-                raise ValueError("Azure OpenAI deployment name not found in environment variables")
-            
-            self.client = AzureOpenAI(
-                api_key=self.api_key,
-                api_version="2024-10-21",
-                azure_endpoint=self.endpoint
-            )
-            
-            # Test the connection
-            self.test_connection()
-            return True
-            
-        except Exception as e:
-            print("\n❌ Error initializing Azure OpenAI:")
-            print(f"Error: {str(e)}")
-            return False
-    
-    def test_connection(self) -> bool:
-        """Test Azure OpenAI connection."""
-        try:
-            if not self.client:
-                raise ValueError("Azure OpenAI client not initialized")
-            
-            # Try a simple call
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
-                    {"role": "system", "content": "You are a test assistant."},
-                    {"role": "user", "content": "Say 'hello'"}
-                ],
-                max_tokens=10
-            )
-            
-            print("\n✅ Successfully connected to Azure OpenAI!")
-            print(f"Endpoint: {self.endpoint}")
-            print(f"Deployment: {self.deployment}")
-            print(f"Test response: {response.choices[0].message.content}")
-            return True
-            
-        except ValueError as e:
-            print("\n❌ Configuration Error:")
-            print(f"Error: {str(e)}")
-            print("\nPlease ensure you have set the following environment variables:")
-            print("export AZURE_OPENAI_ENDPOINT='your-endpoint'")
-            print("export AZURE_OPENAI_KEY='your-key'")
-            print("export AZURE_OPENAI_DEPLOYMENT='your-deployment-name'")
-            return False
-        except Exception as e:
-            print("\n❌ Error connecting to Azure OpenAI:")
-            print(f"Error: {str(e)}")
-            return False
-    
-    def get_client(self) -> AzureOpenAI:
-        """Get the Azure OpenAI client."""
-        if not self.client:
-            raise ValueError("Azure OpenAI client not initialized")
-        return self.client
-
-class RoleplaySystem:
-    """Main system that manages the roleplay scenario."""
-    
-    def __init__(self):
-        self.scenario = None
-        self.customer_agent = None
-        self.observer = None
-        self.conversation_history = []
-        self.azure = AzureConnection()
-    
-    def initialize(self) -> bool:
-        """Initialize the roleplay system."""
-        return self.azure.initialize()
-    
-    def setup_scenario(self):
-        """Set up a new roleplay scenario."""
-        # Choose a random scenario
-        self.scenario = random.choice(SCENARIOS)
-        
-        # Choose random customer attributes
-        personality = random.choice(list(CUSTOMER_PROFILES["personalities"].keys()))
-        tech_level = random.choice(list(CUSTOMER_PROFILES["tech_levels"].keys()))
-        role = random.choice(list(CUSTOMER_PROFILES["roles"].keys()))
-        industry = random.choice(list(CUSTOMER_PROFILES["industries"].keys()))
-        company_size = random.choice(list(CUSTOMER_PROFILES["company_size"].keys()))
-        
-        # Create customer agent with Azure client
-        self.customer_agent = CustomerAgent(
-            personality, tech_level, role, industry, company_size,
-            azure_client=self.azure.get_client()
-        )
-        
-        # Create observer
-        self.observer = ObserverCoach()
-        
-        # Format initial query with product name
-        initial_query = self.scenario["initial_query"].format(product_name=PRODUCT_INFO["name"])
-        
-        # Reset conversation history
-        self.conversation_history = []
-        
-        return {
-            "scenario": self.scenario["title"],
-            "description": self.scenario["description"],
-            "customer_profile": {
-                "personality": personality,
-                "tech_level": tech_level,
-                "role": role,
-                "industry": industry,
-                "company_size": company_size
-            },
-            "initial_query": initial_query
-        }
-    
-    def process_user_message(self, message: str) -> str:
-        """Process user message and get customer response."""
-        if not self.customer_agent:
-            return "Error: No scenario has been set up. Please set up a scenario first."
-        
-        try:
-            # Generate customer response
-            customer_response = self.customer_agent.generate_response(message)
-            
-            # Add to conversation history
-            self.conversation_history.append({
-                "user": message,
-                "customer": customer_response
-            })
-            
-            # Update observer
-            self.observer.add_interaction(message, customer_response)
-            
-            return customer_response
-            
-        except Exception as e:
-            print_colored(f"\nError generating customer response: {str(e)}", "red")
-            return "I apologize, but I encountered an error processing your message. Please try again."
-
-    def get_product_info(self) -> Dict:
-        """Return product information."""
-        return PRODUCT_INFO
 
 def main():
     """Main function to run the roleplay system."""
@@ -195,11 +43,13 @@ def main():
         if user_input.lower() in ['/quit', '/exit', '/q']:
             print_colored("\n=== FINAL SUMMARY ===", "yellow")
             print_colored(system.observer.get_summary(), "cyan")
+            system.end_session()
             print_colored("\nExiting roleplay. Thanks for practicing!", "yellow")
             break
         
-        if user_input.lower() in ['/new', '/reset']:
-            scenario_info = system.setup_scenario()
+        command, _, argument = user_input.lower().partition(' ')
+        if command in ['/new', '/reset'] and (not argument or argument.isdigit()):
+            scenario_info = system.setup_scenario(seed=int(argument) if argument else None)
             system.observer = ObserverCoach()  # Reset observer
             print_colored("\n\n", "reset")
             print_scenario_info(scenario_info, PRODUCT_INFO)
@@ -207,13 +57,14 @@ def main():
             
         if user_input.lower() in ['/help', '/?']:
             print_colored("\nCOMMANDS:", "cyan")
-            print("/new or /reset - Start a new scenario")
+            print("/new or /reset [seed] - Start a new scenario (the same seed gives the same scenario)")
             print("/quit or /exit - Exit the roleplay")
             print("/help - Show this help message")
             print("/info - Show current scenario and product information")
             print("/list - Show all possible scenarios")
             print("/feedback - Show current conversation feedback")
             print("/phase - Show current conversation phase")
+            print("/usage - Show token usage of the current session")
             continue
             
         if user_input.lower() == '/feedback':
@@ -226,6 +77,14 @@ def main():
             print_colored(f"\nCurrent Conversation Phase: {current_phase.value}", "cyan")
             continue
             
+        if user_input.lower() == '/usage':
+            usage = system.get_usage()
+            print_colored("\nTOKEN USAGE:", "cyan")
+            print(f"Total: {usage['totals']['total_tokens']} tokens in {usage['totals']['calls']} calls")
+            for prompt_type, bucket in usage["by_prompt_type"].items():
+                print(f"- {prompt_type}: {bucket['total_tokens']} tokens ({bucket['calls']} calls)")
+            continue
+            
         if user_input.lower() == '/info':
             print_colored("\nCURRENT SCENARIO:", "cyan")
             profile = scenario_info['customer_profile']
@@ -236,7 +95,7 @@ def main():
             
         if user_input.lower() == '/list':
             print_colored("\nAVAILABLE SCENARIOS:", "cyan")
-            for i, scenario in enumerate(SCENARIOS, 1):
+            for i, scenario in enumerate(get_catalog().scenarios(), 1):
                 print(f"{i}. {scenario['title']} - {scenario['description']}")
             continue
         
@@ -246,6 +105,8 @@ def main():
         
         # Print customer response
         print_colored(f"Customer: {customer_response}", "magenta")
+        for alert in system.alerts:
+            print_colored(f"⚠ Red flag: {alert['message']}", "red")
         print()
 
 if __name__ == "__main__":
@@ -259,7 +120,10 @@ if __name__ == "__main__":
 # -------------------------------
 # FastAPI backend (modo web/API)
 # -------------------------------
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -278,48 +142,354 @@ app.add_middleware(
 class Message(BaseModel):
     text: str
     phase: str
+    session_id: Optional[str] = None
+    # Clave para reintentar un mensaje sin que se procese dos veces
+    idempotency_key: Optional[str] = None
 
-# Instanciar el sistema (una vez)
-roleplay_system = RoleplaySystem()
-roleplay_system.initialize()
-scenario_info = roleplay_system.setup_scenario()
+# Conexión a Azure OpenAI compartida por todas las sesiones
+azure_connection = AzureConnection()
+azure_connection.initialize()
 
-@app.post("/api/chat")
-def chat(msg: Message):
-    response = roleplay_system.process_user_message(msg.text)
+# Estado de las sesiones fuera del proceso, para poder usar varios workers
+session_store = create_session_store()
+# Sesión usada por los clientes que no envían un session_id
+DEFAULT_SESSION_KEY = "alias:default"
+# Cola de turnos de cada sesión: de uno en uno y en orden de llegada, también entre workers
+turn_queue = TurnQueue(session_store)
+# Snapshots de sesiones en disco, para reanudarlas tras un reinicio
+snapshot_store = SnapshotStore()
+# Escenarios preparados en segundo plano, para que /api/reset no los construya en la petición
+scenario_pool = ScenarioPool(lambda: RoleplaySystem(azure=azure_connection).prepare_scenario())
+scenario_pool.start()
+# Cada cuánto se comprueba si el cliente de /api/chat se ha desconectado
+DISCONNECT_POLL_SECONDS = float(os.environ.get("DISCONNECT_POLL_SECONDS", "0.25"))
+# Tiempo durante el que se guarda la respuesta de cada idempotency key
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+
+
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def _idempotency_key(session_id: str, key: str) -> str:
+    return f"idempotency:{session_id}:{key}"
+
+
+def _resolve_session_id(session_id: Optional[str]) -> str:
+    """Id de la sesión indicada, o de la sesión por defecto (creándola si no existe)"""
+    if session_id:
+        return session_id
+    default_id = session_store.get(DEFAULT_SESSION_KEY)
+    return default_id.decode() if default_id else load_session().session_id
+
+
+def _end_expired_session(key: str, data: bytes):
+    """Guarda el scorecard final de una sesión que caducó en el session store"""
+    if not key.startswith("session:"):
+        return
+    system = RoleplaySystem(azure=azure_connection)
+    system.load_state(decode_state(data))
+    system.end_session()
+
+
+session_store.on_expire = _end_expired_session
+
+
+def save_session(system: RoleplaySystem):
+    """Guarda el estado completo de una sesión en el session store"""
+    session_store.set(_session_key(system.session_id), encode_state(system.to_state()), ttl=SESSION_TTL_SECONDS)
+
+
+def new_session(replaces: Optional[RoleplaySystem] = None, make_default: bool = True,
+                seed: Optional[int] = None) -> RoleplaySystem:
+    """Crea una sesión nueva; la sesión reemplazada guarda su scorecard final.
+    
+    Con seed el escenario y el perfil se eligen con esa semilla (sin usar el pool).
+    """
+    if replaces:
+        replaces.end_session()
+        session_store.delete(_session_key(replaces.session_id))
+    system = RoleplaySystem(azure=azure_connection)
+    system.setup_scenario(scenario_pool.pop() if seed is None else None, seed=seed)
+    save_session(system)
+    if make_default:
+        session_store.set(DEFAULT_SESSION_KEY, system.session_id.encode(), ttl=SESSION_TTL_SECONDS)
+    return system
+
+
+def restore_snapshot(session_id: str) -> Optional[RoleplaySystem]:
+    """Restaura una sesión desde su snapshot y la vuelve a guardar en el session store"""
+    try:
+        data = snapshot_store.load(session_id)
+        if data is None:
+            return None
+        system = RoleplaySystem.from_snapshot(data, azure=azure_connection)
+    except SnapshotError as e:
+        print(f"Error restoring snapshot of session {session_id}: {e}")
+        return None
+    save_session(system)
+    return system
+
+
+def load_session(session_id: Optional[str] = None) -> RoleplaySystem:
+    """Carga una sesión por id, o la sesión por defecto si no se indica ninguno"""
+    if not session_id:
+        default_id = session_store.get(DEFAULT_SESSION_KEY)
+        session_id = default_id.decode() if default_id else None
+        if not session_id:
+            # Tras un reinicio se reanuda la última sesión por defecto, si tiene snapshot
+            default_id = snapshot_store.get_default()
+            system = restore_snapshot(default_id) if default_id else None
+            if system is None:
+                system = new_session(make_default=False)
+            if session_store.add(DEFAULT_SESSION_KEY, system.session_id.encode(), ttl=SESSION_TTL_SECONDS):
+                return system
+            # Otro worker creó la sesión por defecto a la vez: se descarta la propia, aún vacía
+            if session_store.get(DEFAULT_SESSION_KEY) != system.session_id.encode():
+                session_store.delete(_session_key(system.session_id))
+            return load_session()
+    
+    data = session_store.get(_session_key(session_id))
+    if data is None:
+        system = restore_snapshot(session_id)
+        if system is None:
+            raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired")
+        return system
+    system = RoleplaySystem(azure=azure_connection)
+    system.load_state(decode_state(data))
+    return system
+
+
+def snapshot_session(system: RoleplaySystem) -> int:
+    """Escribe el snapshot de una sesión y devuelve su tamaño en bytes"""
+    data = system.snapshot()
+    snapshot_store.save(system.session_id, data)
+    return len(data)
+
+
+# Crear la sesión por defecto al arrancar si no existe
+load_session()
+
+@app.on_event("shutdown")
+def shutdown():
+    """Guarda snapshots de las sesiones en memoria y vacía la cola de persistencia.
+    
+    Las sesiones se reanudan desde su snapshot tras el reinicio, así que su
+    scorecard final se guarda cuando se reemplazan o caducan, no aquí.
+    """
+    if not session_store.persistent:
+        for key in session_store.keys("session:"):
+            data = session_store.get(key)
+            if data:
+                system = RoleplaySystem(azure=azure_connection)
+                system.load_state(decode_state(data))
+                try:
+                    snapshot_session(system)
+                except Exception as e:
+                    print(f"Error saving snapshot of session {system.session_id}: {e}")
+        default_id = session_store.get(DEFAULT_SESSION_KEY)
+        if default_id:
+            try:
+                snapshot_store.set_default(default_id.decode())
+            except Exception as e:
+                print(f"Error saving the default session pointer: {e}")
+    store = get_transcript_store()
+    if store:
+        store.close()
+
+async def _cancel_on_disconnect(request: Request, token: CancelToken):
+    """Cancela el turno si el cliente se desconecta antes de recibir la respuesta"""
+    while True:
+        if await request.is_disconnected():
+            token.cancel("disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+def _stored_response(session_id: str, key: Optional[str]) -> Optional[dict]:
+    data = session_store.get(_idempotency_key(session_id, key)) if key else None
+    return decode_state(data) if data else None
+
+def _chat_turn(msg: Message, session_id: Optional[str], idempotency_key: Optional[str],
+               token: CancelToken) -> dict:
+    session_id = _resolve_session_id(session_id)
+    # Un reintento de un mensaje ya respondido devuelve la misma respuesta sin llamar al LLM
+    stored = _stored_response(session_id, idempotency_key)
+    if stored:
+        return stored
+    # Un reintento que llega mientras el original está en curso espera detrás de él
+    with turn_queue.turn(session_id, token) as lease:
+        stored = _stored_response(session_id, idempotency_key)
+        if stored:
+            return stored
+        token.raise_if_cancelled()
+        result = _apply_turn(msg, load_session(session_id), token, lease)
+        if idempotency_key:
+            session_store.set(_idempotency_key(session_id, idempotency_key), encode_state(result),
+                              ttl=IDEMPOTENCY_TTL_SECONDS)
+    return result
+
+def _apply_turn(msg: Message, system: RoleplaySystem, token: CancelToken, lease: TurnLease) -> dict:
+    with start_span("POST /api/chat", {
+        "session.id": system.session_id,
+        "message.length": len(msg.text)
+    }, kind="server", root=True) as span:
+        # Un turno cancelado no llega a guardarse, así que la sesión queda como antes del mensaje
+        with cancel_scope(token):
+            response = system.process_user_message(msg.text)
+        with stage_timer("get_summary", "observer"):
+            feedback = system.observer.get_summary()
+        with stage_timer("session_save"):
+            # Si el lock caducó durante el turno, otro turno puede estar modificando la sesión
+            if not lease.holds_lock():
+                raise TurnCancelled("expired")
+            save_session(system)
+        span.set_attribute("conversation.phase", system.customer_agent.phase_manager.get_current_phase().value)
     return {
+        "session_id": system.session_id,
         "response": response,
         "phase": msg.phase,
-        "feedback": roleplay_system.observer.get_summary()
+        "feedback": feedback,
+        "alerts": system.alerts,
+        "usage": system.get_usage()
     }
 
+@app.post("/api/chat")
+async def chat(msg: Message, request: Request, x_session_id: Optional[str] = Header(None),
+               idempotency_key: Optional[str] = Header(None)):
+    """Genera la respuesta del cliente a un mensaje.
+    
+    Los mensajes de una sesión se procesan de uno en uno y en orden de llegada,
+    y un mensaje repetido con la misma Idempotency-Key devuelve la respuesta
+    guardada. Si el cliente se desconecta o se llama a /api/cancel, las
+    llamadas al LLM que queden del turno no se hacen.
+    """
+    token = CancelToken()
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, token))
+    try:
+        return await run_in_threadpool(
+            _chat_turn, msg, msg.session_id or x_session_id, msg.idempotency_key or idempotency_key, token
+        )
+    except TurnCancelled as e:
+        raise HTTPException(status_code=409, detail=f"Turn cancelled ({e.reason})")
+    finally:
+        watcher.cancel()
+
+@app.post("/api/cancel")
+def cancel_turn(session_id: Optional[str] = None, x_session_id: Optional[str] = Header(None)):
+    """Cancela el turno en curso y los que esperan en una sesión (o en la sesión por defecto)"""
+    session_id = session_id or x_session_id
+    if not session_id:
+        default_id = session_store.get(DEFAULT_SESSION_KEY)
+        if default_id is None:
+            raise HTTPException(status_code=404, detail="No default session")
+        session_id = default_id.decode()
+    turn_queue.cancel(session_id)
+    return {"session_id": session_id, "cancelled": True}
+
 @app.get("/api/scenario")
-def get_scenario():
-    if not roleplay_system.scenario:
-        roleplay_system.setup_scenario()
+def get_scenario(session_id: Optional[str] = None, x_session_id: Optional[str] = Header(None)):
+    system = load_session(session_id or x_session_id)
     
     return {
-        "title": roleplay_system.scenario["title"],
-        "description": roleplay_system.scenario["description"],
-        "customer_profile": scenario_info["customer_profile"],
-        "initial_query": scenario_info["initial_query"]
+        "session_id": system.session_id,
+        "title": system.scenario["title"],
+        "description": system.scenario["description"],
+        "customer_profile": system.scenario_info["customer_profile"],
+        "initial_query": system.scenario_info["initial_query"],
+        "seed": system.scenario_info.get("seed")
     }
 @app.get("/api/feedback")
-def get_feedback():
+def get_feedback(session_id: Optional[str] = None, x_session_id: Optional[str] = Header(None)):
     """Devuelve el feedback de la conversación actual"""
-    feedback = roleplay_system.observer.get_summary()
-    return { "feedback": feedback }
+    session_id = _resolve_session_id(session_id or x_session_id)
+    with turn_queue.turn(session_id) as lease:
+        system = load_session(session_id)
+        with stage_timer("get_summary", "observer"):
+            feedback = system.observer.get_summary()
+        # get_summary puede generar la evaluación final, que se conserva
+        if lease.holds_lock():
+            save_session(system)
+    return { "feedback": feedback, "usage": system.get_usage() }
+
+@app.get("/api/usage")
+def get_usage(session_id: Optional[str] = None, x_session_id: Optional[str] = Header(None)):
+    """Devuelve el consumo de tokens de la sesión actual, por agente y por tipo de prompt"""
+    return load_session(session_id or x_session_id).get_usage()
+
+@app.get("/api/routes")
+def get_routes():
+    """Devuelve la tabla de rutas de modelos con sus métricas de latencia"""
+    return azure_connection.route_table.to_dict()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/catalog/invalidate")
+def invalidate_catalog():
+    """Descarta el catálogo en caché de este worker tras editar escenarios, fases o aspectos"""
+    catalog = get_catalog()
+    catalog.invalidate()
+    return {"version": catalog.get().version, "scenarios": len(catalog.scenarios())}
+
+@app.post("/api/rubric/reload")
+def reload_evaluation_rubric():
+    """Vuelve a cargar la rúbrica de evaluación desde RUBRIC_PATH en este worker"""
+    rubric = reload_rubric()
+    return {"version": rubric.version, "aspects": sum(len(aspects) for aspects in rubric.table.values())}
+
+@app.post("/api/sessions")
+def create_session(seed: Optional[int] = None):
+    """Crea una sesión independiente de la sesión por defecto y devuelve su id y su semilla"""
+    scenario_info = new_session(make_default=False, seed=seed).scenario_info
+    return scenario_info
+
+@app.post("/api/sessions/{session_id}/snapshot")
+def create_snapshot(session_id: str):
+    """Guarda un snapshot de la sesión, que se puede reanudar tras un reinicio"""
+    system = load_session(session_id)
+    try:
+        size = snapshot_session(system)
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": system.session_id, "bytes": size, "version": SNAPSHOT_VERSION}
+
+@app.post("/api/sessions/{session_id}/resume")
+def resume_session(session_id: str):
+    """Reanuda una sesión, desde el session store o desde su snapshot"""
+    system = load_session(session_id)
+    return {
+        **system.scenario_info,
+        "conversation_history": [turn.to_dict() for turn in system.conversation_history],
+        "usage": system.get_usage()
+    }
 
 @app.post("/api/reset")
-def reset_scenario():
-    """Reinicia el escenario y el observador."""
-    scenario_info = roleplay_system.setup_scenario()
-    roleplay_system.observer = ObserverCoach()  # Reinicia el observador
+def reset_scenario(session_id: Optional[str] = None, seed: Optional[int] = None,
+                   x_session_id: Optional[str] = Header(None)):
+    """Reinicia el escenario y el observador.
+    
+    Sin session_id se reinicia la sesión por defecto; con session_id se crea una
+    sesión nueva que la reemplaza y cuyo id se devuelve. Con seed se repite el
+    mismo escenario y perfil de cliente que cualquier otra sesión con esa semilla.
+    """
+    session_id = session_id or x_session_id
+    previous_id = _resolve_session_id(session_id)
+    # Espera a los turnos en curso de la sesión: su guardado no debe resucitarla tras el reinicio
+    with turn_queue.turn(previous_id):
+        try:
+            previous = load_session(previous_id)
+        except HTTPException:
+            previous = None
+        scenario_info = new_session(replaces=previous, make_default=not session_id, seed=seed).scenario_info
     return {
+        "session_id": scenario_info["session_id"],
         "scenario": scenario_info["scenario"],
         "description": scenario_info["description"],
         "customer_profile": scenario_info["customer_profile"],
-        "initial_query": scenario_info["initial_query"]
+        "initial_query": scenario_info["initial_query"],
+        "seed": scenario_info["seed"]
     }
 # Alternativa para levantar como servidor
 def run_api():
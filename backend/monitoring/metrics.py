@@ -0,0 +1,260 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from monitoring.tracing import NULL_SPAN, start_span
+
+# Latency buckets in seconds, from in-process stages up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics are on by default; METRICS_ENABLED=0 turns every call into a no-op
+ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        """Increments the counter of the given label values."""
+        if not ENABLED:
+            return
+        key = tuple(str(value) for value in labelvalues)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self.series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        """Records one observation for the given label values."""
+        if not ENABLED:
+            return
+        key = tuple(str(label) for label in labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues) -> "Timer":
+        """Returns a context manager that observes the duration of its block."""
+        if not ENABLED:
+            return NULL_TIMER
+        return Timer(self, labelvalues)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Timer:
+    """Context manager that records the duration of a block on a histogram."""
+
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram: Histogram, labelvalues: tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+        return False
+
+
+class _NullTimer:
+    """Timer used when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Stage:
+    """Times a stage on the stage histogram and records it as a span of the current trace."""
+
+    __slots__ = ("timer", "span")
+
+    def __init__(self, timer, span):
+        self.timer = timer
+        self.span = span
+
+    def __enter__(self):
+        self.span.__enter__()
+        self.timer.__enter__()
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.timer.__exit__(exc_type, exc, traceback)
+        self.span.__exit__(exc_type, exc, traceback)
+        return False
+
+
+STAGE_SECONDS = Histogram(
+    "roleplay_stage_seconds",
+    "Time spent in each stage of a chat turn",
+    ("stage", "agent")
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "Latency of chat completion calls",
+    ("agent", "prompt_type", "deployment")
+)
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "Chat completion calls by outcome",
+    ("agent", "prompt_type", "deployment", "status")
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens used by chat completion calls",
+    ("agent", "deployment", "kind")
+)
+PHASE_TRANSITIONS = Counter(
+    "phase_transitions_total",
+    "Conversation phase transitions",
+    ("from_phase", "to_phase")
+)
+EVALUATOR_RUNS = Counter(
+    "evaluator_runs_total",
+    "Evaluator runs by kind",
+    ("kind",)
+)
+PERSISTENCE_FLUSH_SECONDS = Histogram(
+    "persistence_flush_seconds",
+    "Time to write and commit one batch of transcript records"
+)
+PERSISTENCE_RECORDS = Counter(
+    "persistence_records_total",
+    "Transcript records persisted by outcome",
+    ("status",)
+)
+CATALOG_LOOKUPS = Counter(
+    "catalog_lookups_total",
+    "Catalog reads by cache outcome",
+    ("result",)
+)
+RED_FLAGS = Counter(
+    "red_flags_total",
+    "Red flag alerts raised during conversations by rubric aspect",
+    ("aspect",)
+)
+SCENARIO_POOL = Counter(
+    "scenario_pool_total",
+    "Scenarios taken for new sessions by pool outcome",
+    ("result",)
+)
+LLM_CASSETTE = Counter(
+    "llm_cassette_total",
+    "Completions served from, missing from or recorded to the LLM cassette",
+    ("result",)
+)
+LLM_CANCELLED = Counter(
+    "llm_cancelled_total",
+    "LLM calls not sent because their turn was cancelled",
+    ("agent", "prompt_type", "reason")
+)
+LLM_TOKENS_SAVED = Counter(
+    "llm_tokens_saved_total",
+    "Tokens not spent on calls of cancelled turns (prompt estimate and completion budget)",
+    ("agent", "kind")
+)
+LLM_COALESCED = Counter(
+    "llm_coalesced_total",
+    "Completions shared with an identical call already in flight instead of sent",
+    ("agent", "prompt_type")
+)
+DIALOGUE_REWRITES = Counter(
+    "dialogue_rewrites_total",
+    "Customer responses checked by the dialogue controller, by how they were fixed",
+    ("result",)
+)
+
+REGISTRY = [STAGE_SECONDS, LLM_REQUEST_SECONDS, LLM_REQUESTS, LLM_TOKENS, PHASE_TRANSITIONS, EVALUATOR_RUNS,
+            PERSISTENCE_FLUSH_SECONDS, PERSISTENCE_RECORDS, CATALOG_LOOKUPS, RED_FLAGS, SCENARIO_POOL, LLM_CASSETTE,
+            LLM_CANCELLED, LLM_TOKENS_SAVED, LLM_COALESCED, DIALOGUE_REWRITES]
+
+
+def stage_timer(stage: str, agent: str = "system"):
+    """Returns a context manager timing one stage of a turn.
+
+    The stage is also recorded as a child span when the current turn is traced.
+    """
+    timer = STAGE_SECONDS.time(stage, agent)
+    span = start_span(stage, {"agent": agent})
+    if span is NULL_SPAN:
+        return timer
+    return _Stage(timer, span)
+
+
+def render_prometheus() -> str:
+    """Renders every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,168 @@
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+SERVICE_NAME = "roleplay-backend"
+
+# Share of root spans (chat turns) that are recorded, between 0 and 1
+SAMPLE_RATE = float(os.environ.get("TRACING_SAMPLE_RATE", "0"))
+EXPORT_PATH = os.environ.get("TRACING_EXPORT_PATH", "traces.jsonl")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation of a trace, following the OpenTelemetry span data model."""
+
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_span_id", "name", "kind", "start_time",
+                 "end_time", "attributes", "events", "status", "status_message", "trace_spans", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent: Optional["Span"],
+                 kind: str, attributes: Optional[Dict]):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else ""
+        self.name = name
+        self.kind = kind
+        self.start_time = 0
+        self.end_time = 0
+        self.attributes = dict(attributes or {})
+        self.events: List[Dict] = []
+        self.status = "STATUS_CODE_UNSET"
+        self.status_message = ""
+        # Every span of a trace is collected on the root and exported together
+        self.trace_spans: List["Span"] = parent.trace_spans if parent else []
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict] = None):
+        self.events.append({"name": name, "timeUnixNano": time.time_ns(), "attributes": attributes or {}})
+
+    def record_exception(self, exc: BaseException):
+        self.add_event("exception", {"exception.type": type(exc).__name__, "exception.message": str(exc)})
+        self.status = "STATUS_CODE_ERROR"
+        self.status_message = str(exc)
+
+    def __enter__(self):
+        self.start_time = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.end_time = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.record_exception(exc)
+        elif self.status == "STATUS_CODE_UNSET":
+            self.status = "STATUS_CODE_OK"
+        self.trace_spans.append(self)
+        if not self.parent_span_id:
+            self.tracer.exporter.export(self.trace_spans)
+        return False
+
+    def to_dict(self) -> Dict:
+        """Returns the span in an OTLP-like JSON shape."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "kind": f"SPAN_KIND_{self.kind.upper()}",
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.end_time,
+            "durationMs": round((self.end_time - self.start_time) / 1e6, 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": {"code": self.status, "message": self.status_message},
+            "resource": {"service.name": SERVICE_NAME}
+        }
+
+
+class _NullSpan:
+    """Span returned when the current trace is not sampled."""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict] = None):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class JsonlSpanExporter:
+    """Appends finished traces to a local JSONL file, one span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"Error exporting trace: {e}")
+
+
+class Tracer:
+    """Creates spans; root spans are sampled at sample_rate and children follow their root."""
+
+    def __init__(self, sample_rate: float = SAMPLE_RATE, exporter: Optional[JsonlSpanExporter] = None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter or JsonlSpanExporter(EXPORT_PATH)
+
+    def start_span(self, name: str, attributes: Optional[Dict] = None, kind: str = "internal", root: bool = False):
+        """Returns a span context manager, or a no-op span if the trace is not recorded.
+
+        Only spans created with root=True can start a new trace; other spans are
+        recorded only inside a sampled trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            if not root or not self.sample_rate or random.random() >= self.sample_rate:
+                return NULL_SPAN
+            return Span(self, name, os.urandom(16).hex(), None, kind, attributes)
+        return Span(self, name, parent.trace_id, parent, kind, attributes)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer."""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    """Replaces the process-wide tracer."""
+    global _tracer
+    _tracer = tracer
+
+
+def start_span(name: str, attributes: Optional[Dict] = None, kind: str = "internal", root: bool = False):
+    """Starts a span on the process-wide tracer."""
+    return _tracer.start_span(name, attributes, kind, root)
+
+
+def current_span():
+    """Returns the active span, or a no-op span outside a recorded trace."""
+    return _current_span.get() or NULL_SPAN
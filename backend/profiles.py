@@ -195,4 +195,57 @@ SCENARIOS = [
         "customer_context": "Concerned about user adoption of {product_name}",
         "initial_query": "What kind of training and change management do we need to implement to ensure our users actually get value from Copilot?"
     }
-] 
\ No newline at end of file
+]
+
+# Conversation phases of every scenario and the aspects evaluated in each one
+PHASES = [
+    {
+        "name": "introduction_discovery",
+        "system_prompt": "Share your context, current challenges and goals as the representative asks about them.",
+        "on_success": "value_proposition",
+        "on_failure": "introduction_discovery",
+        "aspects": [
+            {"name": "Uncovers the customer's pain points", "type": "critical"},
+            {"name": "Identifies the customer's goals", "type": "critical"},
+            {"name": "Explores the customer's needs and requirements", "type": "optional"},
+            {"name": "Pitches the product before asking any question", "type": "red_flag"}
+        ]
+    },
+    {
+        "name": "value_proposition",
+        "system_prompt": "Weigh the benefits the representative presents against your needs and budget.",
+        "on_success": "objection_handling",
+        "on_failure": "introduction_discovery",
+        "aspects": [
+            {"name": "Connects the value to the customer's pain points", "type": "critical"},
+            {"name": "Explains the business impact", "type": "critical"},
+            {"name": "Discusses ROI or cost savings", "type": "optional"},
+            {"name": "Makes claims that cannot be supported", "type": "red_flag"}
+        ]
+    },
+    {
+        "name": "objection_handling",
+        "system_prompt": "Raise your concerns about pricing, security or adoption and see how they are addressed.",
+        "on_success": "closing",
+        "on_failure": "value_proposition",
+        "aspects": [
+            {"name": "Acknowledges the customer's objections", "type": "critical"},
+            {"name": "Shows empathy before answering", "type": "optional"},
+            {"name": "Resolves the blockers raised by the customer", "type": "critical"},
+            {"name": "Dismisses or argues with the customer's concerns", "type": "red_flag"}
+        ]
+    },
+    {
+        "name": "closing",
+        "system_prompt": "Agree on next steps if you are convinced, otherwise end the conversation politely.",
+        "on_success": None,
+        "on_failure": "objection_handling",
+        "aspects": [
+            {"name": "Agrees on clear next steps", "type": "critical"},
+            {"name": "Defines success metrics", "type": "optional"},
+            {"name": "Discusses expansion opportunities", "type": "optional"},
+            {"name": "Offers support and resources", "type": "optional"},
+            {"name": "Pressures the customer into a decision", "type": "red_flag"}
+        ]
+    }
+]
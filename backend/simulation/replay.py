@@ -0,0 +1,147 @@
+"""Replays recorded transcripts against the same scenario and customer profile.
+
+Each recorded representative message is sent again through RoleplaySystem,
+in a session drawn with the recorded seed (or set to the recorded scenario
+and profile), and the new customer responses are compared with the recorded
+ones. Background summaries are awaited after every turn, so with a
+deterministic LLM backend (the fake backend, or recorded responses) a replay
+gives the same responses and scores every time.
+
+Accepted records (one JSON object per line):
+    {"id": "...", "seed": 42, "turns": [{"user": "...", "customer": "..."}, ...]}
+    {"scenario": "<title>", "customer_profile": {...}, "turns": [...]}
+    self-play output ("scenario", "profile" and "transcript")
+
+Usage (from the backend directory):
+    python -m simulation.replay sessions.jsonl --output replay.jsonl
+    python -m simulation.replay --db roleplay.db --session <session_id>
+    LLM_BACKEND=fake python -m simulation.replay --db roleplay.db --limit 20
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+from simulation.rescore import parse_turns
+from storage.catalog import get_catalog
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Yields the records of a JSONL file."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_store(path: str, session_ids: Optional[List[str]] = None) -> Iterator[Dict]:
+    """Yields the sessions recorded in a transcript store database, with their turns."""
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        sessions = connection.execute("SELECT * FROM sessions ORDER BY created_at").fetchall()
+        for session in sessions:
+            if session_ids and session["session_id"] not in session_ids:
+                continue
+            turns = connection.execute(
+                "SELECT user_message, customer_response FROM turns WHERE session_id = ? ORDER BY turn_index",
+                (session["session_id"],)
+            ).fetchall()
+            yield {
+                "id": session["session_id"],
+                "seed": session["seed"] if "seed" in session.keys() else None,
+                "scenario": session["scenario"],
+                "customer_profile": json.loads(session["customer_profile"] or "null"),
+                "turns": [{"user": turn[0], "customer": turn[1]} for turn in turns]
+            }
+    finally:
+        connection.close()
+
+
+def replay(record: Dict, azure) -> Dict:
+    """Replays the representative messages of one record and compares the customer responses."""
+    from agents.roleplay import RoleplaySystem
+
+    start = time.perf_counter()
+    system = RoleplaySystem(azure=azure)
+    # A replay is not a new practice session
+    system.store = None
+
+    scenario = None
+    if record.get("scenario"):
+        scenario = next(
+            (item for item in get_catalog().scenarios() if item["title"] == record["scenario"]), None
+        )
+        if scenario is None:
+            raise ValueError(f"Unknown scenario: {record['scenario']}")
+    prepared = system.prepare_scenario(
+        record.get("seed"), scenario, record.get("customer_profile") or record.get("profile")
+    )
+    system.setup_scenario(prepared)
+
+    turns = []
+    diverged_at = None
+    for index, (user_message, recorded) in enumerate(parse_turns(record)):
+        response = system.process_user_message(user_message)
+        # Summaries are part of the next prompt, so they must not depend on timing
+        system.customer_agent.context.wait_for_refresh()
+        turns.append({"user": user_message, "customer": response, "recorded_customer": recorded})
+        if diverged_at is None and response != recorded:
+            diverged_at = index
+
+    evaluation = system.observer.analyze_conversation()
+    return {
+        "id": record.get("id") or record.get("run_id") or record.get("session_id"),
+        "seed": prepared.seed,
+        "scenario": prepared.scenario["title"],
+        "customer_profile": prepared.customer_profile,
+        "turns": turns,
+        "diverged_at": diverged_at,
+        "score": evaluation.get("score", 0),
+        "phase_scores": evaluation.get("phase_scores", {}),
+        "usage": system.get_usage(),
+        "duration_seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Replay recorded transcripts against the same scenario and profile")
+    parser.add_argument("input", nargs="?", help="JSONL file of recorded transcripts")
+    parser.add_argument("--db", help="transcript store database to read the sessions from instead")
+    parser.add_argument("--session", action="append", help="session id to replay from --db (repeatable)")
+    parser.add_argument("--output", default="replay.jsonl", help="JSONL file of replayed transcripts")
+    parser.add_argument("--limit", type=int, default=0, help="replay at most this many records")
+    args = parser.parse_args(argv)
+    if not args.input and not args.db:
+        parser.error("an input file or --db is required")
+
+    from llm.azure import AzureConnection
+
+    azure = AzureConnection()
+    if not azure.initialize():
+        sys.exit(1)
+
+    records = read_store(args.db, args.session) if args.db else read_records(args.input)
+    summary = {"replayed": 0, "identical": 0, "errors": 0}
+    with open(args.output, "w") as output:
+        for index, record in enumerate(records):
+            if args.limit and index >= args.limit:
+                break
+            try:
+                result = replay(record, azure)
+                summary["replayed"] += 1
+                summary["identical"] += result["diverged_at"] is None
+            except Exception as e:
+                result = {"id": record.get("id"), "error": f"{type(e).__name__}: {e}"}
+                summary["errors"] += 1
+            output.write(json.dumps(result) + "\n")
+
+    print(f"Replayed {summary['replayed']} transcripts ({summary['identical']} identical, "
+          f"{summary['errors']} errors) -> {args.output}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
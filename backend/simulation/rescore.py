@@ -0,0 +1,204 @@
+"""Offline bulk evaluation of JSONL transcripts with the ObserverCoach rubric.
+
+Reads transcripts line by line, scores them on a multiprocessing pool in
+chunks and appends one scorecard per transcript to the output as chunks
+finish. Only a bounded number of chunks is in flight at any time, so memory
+does not grow with the size of the input.
+
+Accepted transcript records (one JSON object per line):
+    {"id": "...", "turns": [{"user": "...", "customer": "..."}, ...]}
+    {"run_id": "...", "transcript": [{"speaker": "...", "content": "..."}, ...]}  (self-play output)
+
+Usage (from the backend directory):
+    python -m simulation.rescore transcripts.jsonl --output scorecards.jsonl --processes 8
+    python -m simulation.rescore selfplay.jsonl --ai-feedback
+    python -m simulation.rescore archive.jsonl --vectorized --chunk-size 5000
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agents.evaluator import ObserverCoach
+
+REPRESENTATIVE = "Microsoft Representative"
+
+# Set in each worker when AI feedback is requested
+_azure = None
+
+
+def _init_worker(ai_feedback: bool):
+    """Silences the agents' console output and connects to the LLM when AI feedback is on."""
+    global _azure
+    sys.stdout = open(os.devnull, "w")
+    if ai_feedback:
+        from llm.azure import AzureConnection
+
+        _azure = AzureConnection()
+        if not _azure.initialize():
+            raise RuntimeError("Could not initialize the LLM connection")
+
+
+def parse_turns(record: Dict) -> List[Tuple[str, str]]:
+    """Returns the (representative message, customer response) pairs of a transcript record."""
+    if "turns" in record:
+        return [(turn.get("user", ""), turn.get("customer", "")) for turn in record["turns"]]
+
+    turns = []
+    pending = None
+    for message in record.get("transcript", []):
+        if message.get("speaker") == REPRESENTATIVE:
+            pending = message.get("content", "")
+        elif pending is not None:
+            turns.append((pending, message.get("content", "")))
+            pending = None
+    return turns
+
+
+def score_transcript(record: Dict) -> Dict:
+    """Replays a transcript through a fresh ObserverCoach and returns its scorecard."""
+    client = None
+    if _azure:
+        from llm.client import ChatClient
+        client = ChatClient(_azure.get_client(), route_table=_azure.route_table)
+    observer = ObserverCoach(azure_client=client, deployment=_azure.deployment if _azure else None)
+
+    turns = parse_turns(record)
+    for user_message, customer_response in turns:
+        observer.add_interaction(user_message, customer_response)
+
+    evaluation = observer.analyze_conversation()
+    scorecard = {
+        "id": record.get("id") or record.get("run_id") or record.get("session_id"),
+        "turns": len(turns),
+        "score": evaluation["score"],
+        "phase_scores": evaluation.get("phase_scores", {}),
+        "strengths": evaluation.get("strengths", []),
+        "feedback": evaluation.get("feedback", []),
+        "suggestions": evaluation.get("suggestions", []),
+        "missed_opportunities": evaluation.get("missed_opportunities", []),
+        "pain_points": len(observer.pain_points),
+        "objections": len(observer.objections),
+        "blockers": len(observer.blockers)
+    }
+    if client:
+        scorecard["ai_feedback"] = observer.add_ai_feedback()
+    return scorecard
+
+
+def score_chunk(chunk: List[Tuple[int, str]]) -> List[Dict]:
+    """Scores a chunk of (line number, raw JSON line) pairs."""
+    scorecards = []
+    for line_number, line in chunk:
+        try:
+            record = json.loads(line)
+            scorecard = score_transcript(record)
+            if scorecard["id"] is None:
+                scorecard["id"] = f"line-{line_number}"
+        except Exception as e:
+            scorecard = {"id": f"line-{line_number}", "error": f"{type(e).__name__}: {e}"}
+        scorecards.append(scorecard)
+    return scorecards
+
+
+def score_chunk_vectorized(chunk: List[Tuple[int, str]]) -> List[Dict]:
+    """Scores a chunk with the vectorized batch scorer (scores only, no feedback texts)."""
+    from agents.batch_evaluator import BatchScorer
+
+    parsed = []
+    for line_number, line in chunk:
+        try:
+            record = json.loads(line)
+            parsed.append((line_number, record, parse_turns(record), None))
+        except Exception as e:
+            parsed.append((line_number, None, [], f"{type(e).__name__}: {e}"))
+
+    results = BatchScorer().score_records([turns for _, _, turns, _ in parsed])
+    scorecards = []
+    for (line_number, record, turns, error), result in zip(parsed, results):
+        if error:
+            scorecards.append({"id": f"line-{line_number}", "error": error})
+            continue
+        record_id = record.get("id") or record.get("run_id") or record.get("session_id")
+        scorecards.append({"id": record_id or f"line-{line_number}", "turns": len(turns), **result})
+    return scorecards
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Yields chunks of non-empty lines of a JSONL file, reading it lazily."""
+    with open(path) as f:
+        lines = ((number, line) for number, line in enumerate(f, 1) if line.strip())
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def rescore(input_path: str, output_path: str, processes: Optional[int] = None, chunk_size: int = 200,
+            ai_feedback: bool = False, vectorized: bool = False) -> Dict:
+    """Scores every transcript of input_path and appends the scorecards to output_path."""
+    processes = processes or os.cpu_count() or 1
+    max_pending = processes * 2
+    score = score_chunk_vectorized if vectorized else score_chunk
+    transcripts = errors = total_score = 0
+    start = time.perf_counter()
+
+    with Pool(processes, initializer=_init_worker, initargs=(ai_feedback,)) as pool, open(output_path, "a") as output:
+        pending = deque()
+
+        def write_next():
+            nonlocal transcripts, errors, total_score
+            for scorecard in pending.popleft().get():
+                output.write(json.dumps(scorecard, default=str) + "\n")
+                transcripts += 1
+                if "error" in scorecard:
+                    errors += 1
+                else:
+                    total_score += scorecard["score"]
+            output.flush()
+
+        for chunk in read_chunks(input_path, chunk_size):
+            pending.append(pool.apply_async(score, (chunk,)))
+            if len(pending) >= max_pending:
+                write_next()
+        while pending:
+            write_next()
+
+    elapsed = time.perf_counter() - start
+    scored = transcripts - errors
+    return {
+        "transcripts": transcripts,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "transcripts_per_second": round(transcripts / elapsed, 2) if elapsed else 0.0,
+        "mean_score": round(total_score / scored, 2) if scored else 0.0
+    }
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Rescore JSONL transcripts with the ObserverCoach rubric")
+    parser.add_argument("input", help="JSONL file with one transcript per line")
+    parser.add_argument("--output", default="scorecards.jsonl", help="JSONL file the scorecards are appended to")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="transcripts sent to a worker at a time")
+    parser.add_argument("--ai-feedback", action="store_true", help="also generate the AI feedback of each phase")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="compute the scores with the NumPy batch scorer (no feedback texts)")
+    args = parser.parse_args(argv)
+    if args.vectorized and args.ai_feedback:
+        parser.error("--ai-feedback is not available with --vectorized")
+
+    stats = rescore(args.input, args.output, args.processes, args.chunk_size, args.ai_feedback, args.vectorized)
+    print(json.dumps(stats, indent=2))
+    print(f"Scorecards appended to {args.output}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
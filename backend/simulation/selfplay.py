@@ -0,0 +1,190 @@
+"""Headless self-play: an LLM sales representative plays against CustomerAgent.
+
+Every combination of scenario and customer profile (optionally several times)
+is played for a fixed number of turns and scored by ObserverCoach. Runs are
+executed concurrently on a thread pool (LLM calls are I/O bound) or, with
+--processes, on a process pool, and the graded transcripts are appended to a
+JSONL file as they complete, so memory stays bounded for thousands of runs.
+
+Usage (from the backend directory):
+    python -m simulation.selfplay --concurrency 32 --output selfplay.jsonl
+    LLM_BACKEND=fake python -m simulation.selfplay --limit 100 --turns 6
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List
+
+from agents.customer import CustomerAgent
+from agents.evaluator import ObserverCoach
+from agents.sales_rep import SalesRepAgent
+from llm.client import ChatClient
+from llm.usage import UsageMeter
+from profiles import CUSTOMER_PROFILES, PRODUCT_INFO, SCENARIOS
+
+# Connection shared by the runs of one worker process (or of every thread)
+_azure = None
+
+
+def _init_worker():
+    """Creates the Azure connection of a worker."""
+    global _azure
+    from llm.azure import AzureConnection
+
+    _azure = AzureConnection()
+    if not _azure.initialize():
+        raise RuntimeError("Could not initialize the LLM connection")
+
+
+def build_jobs(repeat: int = 1, limit: int = 0, shuffle: bool = False, seed: int = 0) -> List[Dict]:
+    """Returns one job per scenario, customer profile combination and repetition."""
+    combinations = itertools.product(
+        range(len(SCENARIOS)),
+        CUSTOMER_PROFILES["personalities"],
+        CUSTOMER_PROFILES["tech_levels"],
+        CUSTOMER_PROFILES["roles"],
+        CUSTOMER_PROFILES["industries"],
+        CUSTOMER_PROFILES["company_size"]
+    )
+    jobs = [
+        {
+            "run_id": f"{scenario}-{personality}-{tech_level}-{role}-{industry}-{company_size}-{attempt}",
+            "scenario": scenario,
+            "profile": {
+                "personality": personality,
+                "tech_level": tech_level,
+                "role": role,
+                "industry": industry,
+                "company_size": company_size
+            },
+            "attempt": attempt
+        }
+        for scenario, personality, tech_level, role, industry, company_size in combinations
+        for attempt in range(repeat)
+    ]
+    if shuffle:
+        random.Random(seed).shuffle(jobs)
+    return jobs[:limit] if limit else jobs
+
+
+def play(job: Dict, turns: int) -> Dict:
+    """Plays and scores one conversation."""
+    start = time.perf_counter()
+    scenario = SCENARIOS[job["scenario"]]
+    profile = job["profile"]
+    usage_meter = UsageMeter(job["run_id"])
+    client = ChatClient(_azure.get_client(), usage_meter, _azure.route_table)
+
+    customer = CustomerAgent(
+        profile["personality"], profile["tech_level"], profile["role"],
+        profile["industry"], profile["company_size"], azure_client=client
+    )
+    rep = SalesRepAgent(client, scenario, max_turns=turns)
+    observer = ObserverCoach()
+
+    transcript = []
+    customer_message = scenario["initial_query"].format(product_name=PRODUCT_INFO["name"])
+    transcript.append({"speaker": "Customer", "content": customer_message})
+    for _ in range(turns):
+        rep_message = rep.generate_message(customer_message)
+        customer_message = customer.generate_response(rep_message)
+        observer.add_interaction(rep_message, customer_message)
+        transcript.append({"speaker": "Microsoft Representative", "content": rep_message})
+        transcript.append({
+            "speaker": "Customer",
+            "content": customer_message,
+            "phase": customer.phase_manager.get_current_phase().value
+        })
+
+    return {
+        **job,
+        "scenario": scenario["title"],
+        "transcript": transcript,
+        "phase_transitions": [
+            {"from": item["from_phase"].value, "to": item["to_phase"].value}
+            for item in customer.phase_manager.get_phase_history()
+        ],
+        "evaluation": observer.analyze_conversation(),
+        "usage": usage_meter.to_dict(),
+        "duration_seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def _play_safely(job: Dict, turns: int) -> Dict:
+    try:
+        return play(job, turns)
+    except Exception as e:
+        return {**job, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_bounded(executor, jobs: Iterable[Dict], turns: int, max_in_flight: int) -> Iterator[Dict]:
+    """Yields finished runs, keeping at most max_in_flight jobs submitted at a time."""
+    jobs = iter(jobs)
+    pending = set()
+    while True:
+        for job in itertools.islice(jobs, max_in_flight - len(pending)):
+            pending.add(executor.submit(_play_safely, job, turns))
+        if not pending:
+            return
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def main(argv: List[str] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Headless self-play between a sales rep agent and CustomerAgent")
+    parser.add_argument("--turns", type=int, default=8, help="representative messages per conversation")
+    parser.add_argument("--repeat", type=int, default=1, help="conversations per scenario and profile combination")
+    parser.add_argument("--limit", type=int, default=0, help="maximum number of conversations (0 = all)")
+    parser.add_argument("--shuffle", action="store_true", help="play the combinations in random order")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16, help="conversations played at the same time")
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    parser.add_argument("--output", default="selfplay.jsonl", help="JSONL file the graded transcripts are appended to")
+    args = parser.parse_args(argv)
+
+    jobs = build_jobs(args.repeat, args.limit, args.shuffle, args.seed)
+    print(f"Playing {len(jobs)} conversations with concurrency {args.concurrency}")
+
+    if args.processes:
+        executor = ProcessPoolExecutor(max_workers=args.concurrency, initializer=_init_worker)
+    else:
+        _init_worker()
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+
+    start = time.perf_counter()
+    completed = errors = 0
+    total_score = total_tokens = 0
+    with executor, open(args.output, "a") as output:
+        for result in run_bounded(executor, jobs, args.turns, args.concurrency * 2):
+            output.write(json.dumps(result, default=str) + "\n")
+            completed += 1
+            if "error" in result:
+                errors += 1
+            else:
+                total_score += result["evaluation"]["score"]
+                total_tokens += result["usage"]["totals"]["total_tokens"]
+            if completed % 100 == 0:
+                output.flush()
+                print(f"{completed}/{len(jobs)} conversations ({completed / (time.perf_counter() - start):.2f}/s)")
+    elapsed = time.perf_counter() - start
+
+    scored = completed - errors
+    stats = {
+        "conversations": completed,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "conversations_per_second": round(completed / elapsed, 3) if elapsed else 0.0,
+        "mean_score": round(total_score / scored, 2) if scored else 0.0,
+        "total_tokens": total_tokens
+    }
+    print(json.dumps(stats, indent=2))
+    print(f"Graded transcripts appended to {args.output}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
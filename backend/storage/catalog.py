@@ -0,0 +1,297 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from monitoring.metrics import CATALOG_LOOKUPS
+from profiles import PHASES, SCENARIOS
+
+# sqlite:///catalog.db (local stand-in for Supabase), supabase (SUPABASE_URL and SUPABASE_KEY) or builtin
+CATALOG_URL = os.environ.get("CATALOG_URL", "sqlite:///catalog.db")
+# Seconds a loaded catalog is served before its version is checked again
+CATALOG_TTL_SECONDS = float(os.environ.get("CATALOG_TTL_SECONDS", "300"))
+
+TABLES = ("scenarios", "phases", "aspects")
+
+# Same tables as the Supabase project (see the README), plus a version row
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    context TEXT,
+    initial_prompt TEXT
+);
+CREATE TABLE IF NOT EXISTS phases (
+    id INTEGER PRIMARY KEY,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios (id),
+    name TEXT NOT NULL,
+    system_prompt TEXT,
+    on_success TEXT,
+    on_failure TEXT
+);
+CREATE TABLE IF NOT EXISTS aspects (
+    id INTEGER PRIMARY KEY,
+    phase_id INTEGER NOT NULL REFERENCES phases (id),
+    name TEXT NOT NULL,
+    type TEXT NOT NULL CHECK (type IN ('critical', 'optional', 'red_flag'))
+);
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO catalog_version VALUES (1, 0);
+"""
+
+# Every write to a catalog table bumps the version, so caches revalidate with a single query
+VERSION_TRIGGERS = "".join(
+    f"CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_version AFTER {operation} ON {table} "
+    f"BEGIN UPDATE catalog_version SET version = version + 1; END;\n"
+    for table in TABLES
+    for operation in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+class Catalog:
+    """Immutable snapshot of the scenarios, phases and aspects tables."""
+
+    def __init__(self, version: Optional[int], scenarios: List[Dict], phases: List[Dict], aspects: List[Dict]):
+        self.version = version
+        self.loaded_at = time.time()
+        # Scenarios in the shape of profiles.SCENARIOS, plus their id
+        self.scenarios = [
+            {
+                "id": row["id"],
+                "title": row["name"],
+                "description": row["description"],
+                "customer_context": row["context"],
+                "initial_query": row["initial_prompt"]
+            }
+            for row in scenarios
+        ]
+        aspects_by_phase: Dict[int, List[Dict]] = {}
+        for row in aspects:
+            aspects_by_phase.setdefault(row["phase_id"], []).append(dict(row))
+        self.phases_by_scenario: Dict[int, List[Dict]] = {}
+        for row in phases:
+            phase = {**row, "aspects": aspects_by_phase.get(row["id"], [])}
+            self.phases_by_scenario.setdefault(row["scenario_id"], []).append(phase)
+
+    def scenario(self, scenario_id: int) -> Optional[Dict]:
+        return next((scenario for scenario in self.scenarios if scenario["id"] == scenario_id), None)
+
+    def phases(self, scenario_id: int) -> List[Dict]:
+        return self.phases_by_scenario.get(scenario_id, [])
+
+
+def seed_rows() -> Dict[str, List[Dict]]:
+    """Returns the catalog defined in profiles.py as rows of the catalog tables."""
+    rows: Dict[str, List[Dict]] = {table: [] for table in TABLES}
+    for scenario_id, scenario in enumerate(SCENARIOS, 1):
+        rows["scenarios"].append({
+            "id": scenario_id,
+            "name": scenario["title"],
+            "description": scenario["description"],
+            "context": scenario["customer_context"],
+            "initial_prompt": scenario["initial_query"]
+        })
+        for phase in PHASES:
+            phase_id = len(rows["phases"]) + 1
+            rows["phases"].append({
+                "id": phase_id,
+                "scenario_id": scenario_id,
+                "name": phase["name"],
+                "system_prompt": phase["system_prompt"],
+                "on_success": phase["on_success"],
+                "on_failure": phase["on_failure"]
+            })
+            for aspect in phase["aspects"]:
+                rows["aspects"].append({
+                    "id": len(rows["aspects"]) + 1,
+                    "phase_id": phase_id,
+                    "name": aspect["name"],
+                    "type": aspect["type"]
+                })
+    return rows
+
+
+def builtin_catalog() -> Catalog:
+    """The catalog defined in profiles.py, used when no database is available."""
+    rows = seed_rows()
+    return Catalog(None, rows["scenarios"], rows["phases"], rows["aspects"])
+
+
+class SQLiteCatalogSource:
+    """Catalog tables in a local SQLite file, standing in for Supabase.
+
+    An empty database is created and seeded from profiles.py.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as connection:
+            connection.executescript(SCHEMA + VERSION_TRIGGERS)
+            if connection.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0] == 0:
+                for table, rows in seed_rows().items():
+                    if rows:
+                        columns = ", ".join(rows[0])
+                        placeholders = ", ".join(f":{column}" for column in rows[0])
+                        connection.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def fetch_version(self) -> Optional[int]:
+        connection = self._connect()
+        try:
+            return connection.execute("SELECT version FROM catalog_version").fetchone()[0]
+        finally:
+            connection.close()
+
+    def fetch(self) -> Catalog:
+        connection = self._connect()
+        try:
+            # One read transaction, so the version matches the rows
+            with connection:
+                connection.execute("BEGIN")
+                version = connection.execute("SELECT version FROM catalog_version").fetchone()[0]
+                tables = {
+                    table: [dict(row) for row in connection.execute(f"SELECT * FROM {table} ORDER BY id")]
+                    for table in TABLES
+                }
+        finally:
+            connection.close()
+        return Catalog(version, tables["scenarios"], tables["phases"], tables["aspects"])
+
+
+class SupabaseCatalogSource:
+    """Catalog tables read through the Supabase REST API."""
+
+    def __init__(self, url: str, key: str, timeout: float = 5.0):
+        self.url = url.rstrip("/")
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+        self.timeout = timeout
+
+    def fetch_version(self) -> Optional[int]:
+        # The Supabase tables have no version row, so every expiry reloads them
+        return None
+
+    def fetch(self) -> Catalog:
+        import requests  # only needed for this backend
+
+        tables = {}
+        for table in TABLES:
+            response = requests.get(
+                f"{self.url}/rest/v1/{table}", params={"select": "*", "order": "id"},
+                headers=self.headers, timeout=self.timeout
+            )
+            response.raise_for_status()
+            tables[table] = response.json()
+        return Catalog(None, tables["scenarios"], tables["phases"], tables["aspects"])
+
+
+class BuiltinCatalogSource:
+    """The catalog defined in profiles.py."""
+
+    def fetch_version(self) -> Optional[int]:
+        return 0
+
+    def fetch(self) -> Catalog:
+        catalog = builtin_catalog()
+        catalog.version = 0
+        return catalog
+
+
+class CatalogRepository:
+    """Read-through, versioned in-process cache of the catalog.
+
+    Lookups are served from the cached snapshot until its TTL expires. The next
+    lookup then asks the source for its version and only reloads the tables
+    when it changed; invalidate() forces a reload. If the source fails, the
+    stale snapshot (or the built-in catalog) keeps being served, so setting up
+    a scenario never waits on or fails because of the database.
+    """
+
+    def __init__(self, source, ttl: float = CATALOG_TTL_SECONDS):
+        self.source = source
+        self.ttl = ttl
+        self._catalog: Optional[Catalog] = None
+        self._expires_at = 0.0
+        self._invalidated = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Catalog:
+        """Returns the current catalog snapshot."""
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() < self._expires_at:
+            CATALOG_LOOKUPS.inc("hit")
+            return catalog
+        with self._lock:
+            if self._catalog is None or time.monotonic() >= self._expires_at:
+                self._refresh()
+            else:
+                CATALOG_LOOKUPS.inc("hit")
+            return self._catalog
+
+    def invalidate(self):
+        """Drops the cached snapshot; the next lookup reloads the tables."""
+        with self._lock:
+            self._invalidated = True
+            self._expires_at = 0.0
+
+    def scenarios(self) -> List[Dict]:
+        return self.get().scenarios
+
+    def phases(self, scenario_id: int) -> List[Dict]:
+        return self.get().phases(scenario_id)
+
+    def _refresh(self):
+        try:
+            current = self._catalog
+            if current is not None and current.version is not None and not self._invalidated:
+                if self.source.fetch_version() == current.version:
+                    CATALOG_LOOKUPS.inc("revalidated")
+                    self._expires_at = time.monotonic() + self.ttl
+                    return
+            self._catalog = self.source.fetch()
+            self._invalidated = False
+            CATALOG_LOOKUPS.inc("loaded")
+        except Exception as e:
+            print(f"Error loading the scenario catalog: {e}")
+            CATALOG_LOOKUPS.inc("error")
+            if self._catalog is None:
+                self._catalog = builtin_catalog()
+        self._expires_at = time.monotonic() + self.ttl
+
+
+def create_catalog_source(url: str = CATALOG_URL):
+    """Creates the catalog source described by a CATALOG_URL value."""
+    if url.startswith("sqlite:///"):
+        return SQLiteCatalogSource(url[len("sqlite:///"):])
+    if url == "supabase":
+        return SupabaseCatalogSource(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    if url == "builtin":
+        return BuiltinCatalogSource()
+    raise ValueError(f"Unsupported CATALOG_URL: {url}")
+
+
+_catalog: Optional[CatalogRepository] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogRepository:
+    """Returns the process-wide catalog repository."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                try:
+                    source = create_catalog_source()
+                except Exception as e:
+                    print(f"Error opening catalog {CATALOG_URL}: {e}")
+                    source = BuiltinCatalogSource()
+                _catalog = CatalogRepository(source)
+    return _catalog
@@ -0,0 +1,301 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# memory (single worker), sqlite:///path/to/sessions.db or redis://host:port/db
+SESSION_STORE_URL = os.environ.get("SESSION_STORE_URL", "memory")
+# Sessions not updated for this long are dropped (0 keeps them forever)
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", str(24 * 3600)))
+# Seconds between purges of expired keys in the memory and SQLite stores (Redis expires them itself)
+SESSION_SWEEP_SECONDS = int(os.environ.get("SESSION_SWEEP_SECONDS", "60"))
+
+
+def encode_state(state: Dict) -> bytes:
+    """Serializes a session state for a session store."""
+    return json.dumps(state, separators=(",", ":"), default=str).encode()
+
+
+def decode_state(data: bytes) -> Dict:
+    """Deserializes a session state read from a session store."""
+    return json.loads(data)
+
+
+class SessionStore(ABC):
+    """Key-value interface of session stores, modeled on the Redis GET/SET/SET NX/INCR/DEL commands.
+
+    Any object with these methods can back the API, so another shared store
+    only needs a small adapter.
+    """
+
+    # False when the sessions die with the process
+    persistent = True
+    # Called with (key, value) of the keys purged because they expired, on a background thread
+    on_expire: Optional[Callable[[str, bytes], None]] = None
+
+    def _expired(self, items: List[Tuple[str, bytes]]):
+        """Hands the purged keys to on_expire without blocking the write that purged them."""
+        if not self.on_expire or not items:
+            return
+
+        def notify():
+            for key, value in items:
+                try:
+                    self.on_expire(key, value)
+                except Exception as e:
+                    print(f"Error handling the expiry of {key}: {e}")
+
+        threading.Thread(target=notify, name="session-expiry", daemon=True).start()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value of key, or None if it does not exist or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        """Sets key, expiring it after ttl seconds if given."""
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """Sets key only if it does not exist (or expired); returns whether it was set."""
+
+    @abstractmethod
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        """Atomically increments the integer value of key (0 if missing) and returns it."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Deletes key if it exists."""
+
+    @abstractmethod
+    def delete_if(self, key: str, value: bytes) -> bool:
+        """Deletes key only if it still holds value; returns whether it was deleted."""
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store; only valid with a single uvicorn worker."""
+
+    persistent = False
+
+    def __init__(self):
+        self.values: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + SESSION_SWEEP_SECONDS
+
+    def _sweep(self):
+        """Drops expired keys, at most every SESSION_SWEEP_SECONDS; called with the lock held on writes."""
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SESSION_SWEEP_SECONDS
+        expired = [
+            (key, value) for key, (value, expires_at) in self.values.items() if expires_at and expires_at < now
+        ]
+        for key, _ in expired:
+            del self.values[key]
+        self._expired(expired)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self.values.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            # Expired keys are left to the sweep, which reports them to on_expire
+            if expires_at and expires_at < time.time():
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        with self._lock:
+            self._sweep()
+            self.values[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        with self._lock:
+            self._sweep()
+            item = self.values.get(key)
+            if item is not None and not (item[1] and item[1] < time.time()):
+                return False
+            self.values[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        with self._lock:
+            self._sweep()
+            item = self.values.get(key)
+            current = int(item[0]) if item is not None and not (item[1] and item[1] < time.time()) else 0
+            self.values[key] = (str(current + 1).encode(), time.time() + ttl if ttl else None)
+            return current + 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self.values.pop(key, None)
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        with self._lock:
+            item = self.values.get(key)
+            if item is None or item[0] != value:
+                return False
+            del self.values[key]
+            return True
+
+    def keys(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            return [key for key in self.values if key.startswith(prefix)]
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store shared by every worker process of one host through a local SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_state ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        connection.commit()
+        self._next_sweep = time.time()
+
+    def _sweep(self):
+        """Deletes expired rows, at most every SESSION_SWEEP_SECONDS; called on writes."""
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SESSION_SWEEP_SECONDS
+        connection = self._connection()
+        with connection:
+            # One transaction, so two workers sweeping at once never both report a key
+            connection.execute("BEGIN IMMEDIATE")
+            expired = connection.execute(
+                "SELECT key, value FROM session_state WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            ).fetchall() if self.on_expire else []
+            connection.execute(
+                "DELETE FROM session_state WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            )
+        self._expired(expired)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM session_state WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self._sweep()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO session_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl if ttl else None)
+            )
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        self._sweep()
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute(
+                "DELETE FROM session_state WHERE key = ? AND expires_at IS NOT NULL AND expires_at < ?", (key, now)
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO session_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl if ttl else None)
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        self._sweep()
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            # Takes the write lock before reading, so concurrent workers never read the same value
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT value, expires_at FROM session_state WHERE key = ?", (key,)
+            ).fetchone()
+            value = int(row[0]) + 1 if row is not None and not (row[1] and row[1] < now) else 1
+            connection.execute(
+                "INSERT OR REPLACE INTO session_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, str(value).encode(), now + ttl if ttl else None)
+            )
+        return value
+
+    def delete(self, key: str):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM session_state WHERE key = ?", (key,))
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute("DELETE FROM session_state WHERE key = ? AND value = ?", (key, value))
+        return cursor.rowcount == 1
+
+
+class RedisSessionStore(SessionStore):
+    """Store shared across hosts, on a redis-py compatible client."""
+
+    # GET and DEL in one atomic step
+    DELETE_IF_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisSessionStore":
+        import redis  # only needed for this backend
+
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.client.set(key, value, ex=ttl or None)
+
+    def add(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        return bool(self.client.set(key, value, ex=ttl or None, nx=True))
+
+    def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        pipeline = self.client.pipeline()
+        pipeline.incr(key)
+        if ttl:
+            pipeline.expire(key, ttl)
+        return int(pipeline.execute()[0])
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        return bool(self.client.eval(self.DELETE_IF_SCRIPT, 1, key, value))
+
+
+def create_session_store(url: str = SESSION_STORE_URL) -> SessionStore:
+    """Creates the session store described by a SESSION_STORE_URL value."""
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisSessionStore.from_url(url)
+    if url == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unsupported SESSION_STORE_URL: {url}")
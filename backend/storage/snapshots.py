@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import struct
+import zlib
+from typing import Dict, Optional
+
+# Directory of the session snapshots, one file per session
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+
+# Header: magic, format version, flags, CRC32 of the payload
+SNAPSHOT_MAGIC = b"RPSN"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct(">4sBBI")
+FLAG_ZLIB = 1
+
+# Session ids come from requests, so they are validated before being used as file names
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot is corrupted or uses an unsupported version."""
+
+
+def encode_snapshot(state: Dict) -> bytes:
+    """Encodes a session state as a versioned, checksummed, zlib-compressed snapshot."""
+    payload = zlib.compress(json.dumps(state, separators=(",", ":"), default=str).encode(), 1)
+    return HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, FLAG_ZLIB, zlib.crc32(payload)) + payload
+
+
+def decode_snapshot(data: bytes) -> Dict:
+    """Decodes a snapshot produced by encode_snapshot."""
+    if len(data) < HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, flags, checksum = HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a session snapshot")
+    if version > SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    payload = data[HEADER.size:]
+    if zlib.crc32(payload) != checksum:
+        raise SnapshotError("Snapshot checksum mismatch")
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+
+class SnapshotStore:
+    """Keeps session snapshots as files, written atomically."""
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+
+    def _path(self, name: str) -> str:
+        if not SESSION_ID_PATTERN.fullmatch(name or ""):
+            raise SnapshotError(f"Invalid session id: {name!r}")
+        return os.path.join(self.directory, f"{name}.snap")
+
+    def save(self, session_id: str, data: bytes):
+        path = self._path(session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        try:
+            with open(self._path(session_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set_default(self, session_id: str):
+        """Remembers the default session, so it can be resumed after a restart."""
+        self._path(session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "default"), "w") as f:
+            f.write(session_id)
+
+    def get_default(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "default")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
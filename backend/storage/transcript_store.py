@@ -0,0 +1,224 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from monitoring.metrics import PERSISTENCE_FLUSH_SECONDS, PERSISTENCE_RECORDS
+
+# Local SQLite file for transcripts and scorecards; an empty value disables persistence
+PERSISTENCE_PATH = os.environ.get("PERSISTENCE_PATH", "roleplay.db")
+# Records written per transaction and the longest wait to fill a batch
+BATCH_SIZE = int(os.environ.get("PERSISTENCE_BATCH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.environ.get("PERSISTENCE_FLUSH_INTERVAL", "0.05"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT NOT NULL,
+    scenario TEXT,
+    customer_profile TEXT,
+    created_at REAL NOT NULL,
+    seed INTEGER
+);
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL,
+    turn_index INTEGER NOT NULL,
+    user_message TEXT NOT NULL,
+    customer_response TEXT NOT NULL,
+    phase TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phase_transitions (
+    session_id TEXT NOT NULL,
+    from_phase TEXT NOT NULL,
+    to_phase TEXT NOT NULL,
+    confidence REAL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scorecards (
+    session_id TEXT NOT NULL,
+    score INTEGER,
+    scorecard TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, turn_index);
+CREATE INDEX IF NOT EXISTS scorecards_session ON scorecards (session_id);
+"""
+
+INSERTS = {
+    "sessions": "INSERT INTO sessions (session_id, scenario, customer_profile, created_at, seed) VALUES (?, ?, ?, ?, ?)",
+    "turns": "INSERT INTO turns VALUES (?, ?, ?, ?, ?, ?)",
+    "phase_transitions": "INSERT INTO phase_transitions VALUES (?, ?, ?, ?, ?)",
+    "scorecards": "INSERT INTO scorecards VALUES (?, ?, ?, ?)"
+}
+
+_STOP = object()
+
+
+class TranscriptStore:
+    """Append-only SQLite store of sessions, turns, phase transitions and scorecards.
+
+    The record_* methods only enqueue the row. A background thread writes the
+    queued rows in batches, one transaction per batch, so the fsync cost of a
+    commit is shared by every row of the batch and the request path never
+    waits on the disk. The database runs in WAL mode, so readers are not
+    blocked by the writer.
+    """
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue" = queue.Queue()
+        self.written = 0
+        self.batches = 0
+        self._closed = False
+        self._ready = threading.Event()
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="transcript-store", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+
+    def record_session(self, session_id: str, scenario: str, customer_profile: Dict, seed: Optional[int] = None):
+        self._put("sessions", (session_id, scenario, json.dumps(customer_profile), time.time(), seed))
+
+    def record_turn(self, session_id: str, turn_index: int, user_message: str, customer_response: str,
+                    phase: Optional[str] = None):
+        self._put("turns", (session_id, turn_index, user_message, customer_response, phase, time.time()))
+
+    def record_phase_transition(self, session_id: str, from_phase: str, to_phase: str,
+                                confidence: Optional[float] = None):
+        self._put("phase_transitions", (session_id, from_phase, to_phase, confidence, time.time()))
+
+    def record_scorecard(self, session_id: str, scorecard: Dict):
+        score = scorecard.get("score") if isinstance(scorecard, dict) else None
+        self._put("scorecards", (session_id, score, json.dumps(scorecard, default=str), time.time()))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every queued record is written; returns False on timeout."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Writes the remaining records and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(_STOP)
+        self._thread.join()
+
+    def read_turns(self, session_id: str) -> List[Tuple]:
+        """Returns the persisted turns of a session in order."""
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(
+                "SELECT turn_index, user_message, customer_response, phase FROM turns "
+                "WHERE session_id = ? ORDER BY turn_index", (session_id,)
+            ).fetchall()
+
+    def _put(self, table: str, row: Tuple):
+        if not self._closed:
+            self.queue.put((table, row))
+
+    def _run(self):
+        try:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # FULL fsyncs the WAL on every commit, i.e. once per batch
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.executescript(SCHEMA)
+            # Databases created before sessions had a seed
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(sessions)")]
+            if "seed" not in columns:
+                connection.execute("ALTER TABLE sessions ADD COLUMN seed INTEGER")
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows: Dict[str, List[Tuple]] = {}
+            waiters = []
+            for item in batch:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.setdefault(item[0], []).append(item[1])
+
+            if rows:
+                self._write(connection, rows)
+            for waiter in waiters:
+                waiter.set()
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, rows: Dict[str, List[Tuple]]):
+        start = time.perf_counter()
+        count = sum(len(values) for values in rows.values())
+        try:
+            with connection:
+                for table, values in rows.items():
+                    connection.executemany(INSERTS[table], values)
+            written = count
+            PERSISTENCE_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        except Exception as e:
+            # A bad row or a transient error must not lose the rest of the batch
+            print(f"Error persisting transcript records, retrying them one by one: {e}")
+            written = self._write_rows(connection, rows)
+        if written < count:
+            PERSISTENCE_RECORDS.inc("error", amount=count - written)
+        if written:
+            PERSISTENCE_RECORDS.inc("written", amount=written)
+            self.written += written
+            self.batches += 1
+
+    def _write_rows(self, connection: sqlite3.Connection, rows: Dict[str, List[Tuple]]) -> int:
+        """Writes each row in its own transaction; returns how many were written."""
+        written = 0
+        for table, values in rows.items():
+            for row in values:
+                try:
+                    with connection:
+                        connection.execute(INSERTS[table], row)
+                    written += 1
+                except Exception as e:
+                    print(f"Error persisting a {table} record: {e}")
+        return written
+
+_store: Optional[TranscriptStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> Optional[TranscriptStore]:
+    """Returns the process-wide store, or None when PERSISTENCE_PATH is empty."""
+    global _store, _store_failed
+    if _store is None and PERSISTENCE_PATH and not _store_failed:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                try:
+                    _store = TranscriptStore(PERSISTENCE_PATH)
+                    atexit.register(_store.close)
+                except Exception as e:
+                    print(f"Error opening transcript store {PERSISTENCE_PATH}: {e}")
+                    _store_failed = True
+    return _store
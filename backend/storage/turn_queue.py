@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from llm.cancellation import CancelToken, TurnCancelled
+from storage.session_store import SESSION_TTL_SECONDS, SessionStore
+
+# Longest a turn can hold its session's lock; it expires if the worker dies
+TURN_LOCK_TTL_SECONDS = int(os.environ.get("TURN_LOCK_TTL_SECONDS", "120"))
+# How often a waiting turn checks whether it is its turn
+TURN_POLL_SECONDS = 0.02
+
+
+class TurnLease:
+    """The session lock held by one turn, identified by its ticket."""
+
+    def __init__(self, queue: "TurnQueue", session_id: str, ticket: int):
+        self.queue = queue
+        self.session_id = session_id
+        self.ticket = ticket
+        self.owner = f"{ticket}:{uuid.uuid4().hex}".encode()
+
+    def holds_lock(self) -> bool:
+        """False once the lock expired (the turn took longer than its TTL) and may belong to another turn."""
+        return self.queue.store.get(self.queue.key("lock", self.session_id)) == self.owner
+
+
+class TurnQueue:
+    """Runs the turns of each session one at a time, in arrival order, across workers.
+
+    Every turn takes a ticket from a per-session counter in the session store
+    and waits until the tickets before it were served (or skipped, when their
+    turn was cancelled while waiting) and the session lock is free. The lock
+    has a TTL, so a worker that dies holding it only stalls the session until
+    it expires, and a ticket whose turn never shows up is skipped after the
+    same time. cancel() cancels every turn that already has a ticket.
+    """
+
+    def __init__(self, store: SessionStore, lock_ttl: int = TURN_LOCK_TTL_SECONDS,
+                 poll_interval: float = TURN_POLL_SECONDS, ttl: int = SESSION_TTL_SECONDS):
+        self.store = store
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+
+    @staticmethod
+    def key(kind: str, session_id: str) -> str:
+        return f"{kind}:{session_id}"
+
+    @contextmanager
+    def turn(self, session_id: str, token: Optional[CancelToken] = None) -> Iterator[TurnLease]:
+        """Waits for the session's turn and holds its lock for the block.
+
+        With a token, the turn is cancelled by cancel() and a cancelled turn
+        leaves the queue with TurnCancelled instead of waiting.
+        """
+        ticket = self.store.incr(self.key("ticket", session_id), ttl=self.ttl)
+        lease = TurnLease(self, session_id, ticket)
+        if token:
+            token.poll = lambda: self.cancelled(session_id, ticket)
+        try:
+            self._wait(lease, token)
+        except BaseException:
+            self._skip(session_id, ticket)
+            raise
+        try:
+            yield lease
+        finally:
+            if lease.holds_lock():
+                self.store.set(self.key("served", session_id), str(ticket).encode(), ttl=self.ttl)
+                self.store.delete_if(self.key("lock", session_id), lease.owner)
+            else:
+                self._skip(session_id, ticket)
+
+    def cancel(self, session_id: str) -> int:
+        """Cancels the turn in progress and the waiting ones; returns the last cancelled ticket."""
+        ticket = int(self.store.get(self.key("ticket", session_id)) or 0)
+        self.store.set(self.key("cancel", session_id), str(ticket).encode(), ttl=self.ttl)
+        return ticket
+
+    def cancelled(self, session_id: str, ticket: int) -> Optional[str]:
+        """Reason the turn of a ticket was cancelled, if it was."""
+        if ticket <= int(self.store.get(self.key("cancel", session_id)) or 0):
+            return "cancelled"
+        return None
+
+    def _wait(self, lease: TurnLease, token: Optional[CancelToken]):
+        session_id, ticket = lease.session_id, lease.ticket
+        stalled_on, since = None, time.monotonic()
+        while True:
+            served = int(self.store.get(self.key("served", session_id)) or 0)
+            if served >= ticket:
+                # Skipped as stalled and overtaken by later turns
+                raise TurnCancelled("expired")
+            first = self._first_pending(session_id, served, ticket)
+            if first == ticket:
+                if self.store.add(self.key("lock", session_id), lease.owner, ttl=self.lock_ttl):
+                    return
+            elif first != stalled_on:
+                stalled_on, since = first, time.monotonic()
+            elif time.monotonic() - since > self.lock_ttl:
+                # The turn of that ticket never came or its worker died
+                self._skip(session_id, first)
+            if token:
+                token.raise_if_cancelled()
+            time.sleep(self.poll_interval)
+
+    def _first_pending(self, session_id: str, served: int, ticket: int) -> int:
+        """First ticket after served that was not skipped, up to ticket."""
+        pending = served + 1
+        while pending < ticket and self.store.get(f"skip:{session_id}:{pending}"):
+            pending += 1
+        return pending
+
+    def _skip(self, session_id: str, ticket: int):
+        self.store.set(f"skip:{session_id}:{ticket}", b"1", ttl=self.ttl)
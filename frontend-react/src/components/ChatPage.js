@@ -79,19 +79,38 @@ export default function ChatPage() {
     setMessages((prev) => [...prev, newMessage]);
     setLoading(true);
 
-    try {
-      const res = await fetch("http://localhost:8000/api/chat", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text: userInput, phase: "exploration" })
-      });
-      const data = await res.json();
+    // Same key on a retry, so the backend answers it without processing the message twice
+    const idempotencyKey = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    const postMessage = () => fetch("http://localhost:8000/api/chat", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKey },
+      body: JSON.stringify({ text: userInput, phase: "exploration" })
+    });
 
-      setMessages((prev) => [
-        ...prev,
-        { sender: "bot", text: data.response }
-      ]);
-      speakResponse(data.response);
+    try {
+      // Retry once on a network error
+      const res = await postMessage().catch(() => postMessage());
+      const data = await res.json().catch(() => ({}));
+
+      if (res.ok) {
+        setMessages((prev) => [
+          ...prev,
+          { sender: "bot", text: data.response }
+        ]);
+        speakResponse(data.response);
+      } else {
+        // 409: the turn was cancelled (e.g. with /api/cancel) and the message was not applied
+        console.error("Backend error:", res.status, data.detail);
+        setMessages((prev) => [
+          ...prev,
+          {
+            sender: "bot",
+            text: res.status === 409
+              ? "Your message was not processed. Please send it again."
+              : `The backend could not process your message (${data.detail || res.status}).`
+          }
+        ]);
+      }
     } catch (err) {
       console.error("Error connecting to backend:", err);
       setMessages((prev) => [